@@ -0,0 +1,8 @@
+"""
+Micro-benchmarks for the calculation and rules layers.
+Run from apps/api, e.g. `python -m benchmarks.rules`.
+
+`python -m benchmarks.suite run` times every stage over synthetic charts
+(benchmarks.synthetic) and `python -m benchmarks.suite compare` checks a run
+against a stored baseline.
+"""
@@ -0,0 +1,115 @@
+"""
+Pydantic cost benchmark for /v1/chart
+Chart model construction (validated vs model_construct) and the response path
+(FastAPI response_model re-validation vs direct serialization)
+
+    python -m benchmarks.models --charts 200
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from core.models import (
+    Aspect, Astronomy, ChartInput, ChartResponse, PlanetPosition, VedicData,
+    VedicPlanetPosition, WesternData,
+)
+from core.pipeline import ChartPipeline
+
+
+def inputs(count: int, seed: int = 11) -> List[ChartInput]:
+    """Charts at random dates and mid-latitude coordinates (explicit, no geocoding)."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(count):
+        out.append(ChartInput(
+            name=f"bench-{i}",
+            local_datetime=datetime(1900, 1, 1) + timedelta(minutes=rng.randrange(60 * 24 * 365 * 120)),
+            place="benchmark",
+            lat=round(rng.uniform(-60, 60), 4),
+            lon=round(rng.uniform(-180, 180), 4),
+            timezone="UTC",
+        ))
+    return out
+
+
+def _per_call_us(fn: Callable[[Any], Any], items: List[Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - t0)
+    return round(best / len(items) * 1e6, 1)
+
+
+def _built(chart: ChartResponse) -> Dict[str, Any]:
+    """Field values as the pipeline passes them: nested models kept as instances."""
+    return {
+        "input_echo": chart.input_echo,
+        "planets": [p.model_dump() for p in chart.astronomy.planets],
+        "vedic_planets": [p.model_dump() for p in chart.vedic.planets],
+        "aspects": [a.model_dump() for a in chart.western.aspects],
+        "astronomy": chart.astronomy.model_dump(exclude={"planets"}),
+        "vedic": chart.vedic.model_dump(exclude={"planets", "ascendant"}),
+        "ascendant": chart.vedic.ascendant.model_dump(),
+        "western": chart.western.model_dump(exclude={"planets", "aspects"}),
+    }
+
+
+def _build(values: Dict[str, Any], make: Callable[..., Any]) -> ChartResponse:
+    """Rebuild a chart bottom-up the way ChartPipeline does, with make(model, **fields)."""
+    planets = [make(PlanetPosition, **p) for p in values["planets"]]
+    astronomy = make(Astronomy, planets=planets, **values["astronomy"])
+    vedic = make(VedicData, planets=[make(VedicPlanetPosition, **p) for p in values["vedic_planets"]],
+                 ascendant=make(VedicPlanetPosition, **values["ascendant"]), **values["vedic"])
+    western_fields = dict(values["western"])
+    western_fields["ascendant"] = make(PlanetPosition, **western_fields["ascendant"])
+    western_fields["mc"] = make(PlanetPosition, **western_fields["mc"])
+    western = make(WesternData, planets=planets, aspects=[make(Aspect, **a) for a in values["aspects"]],
+                   **western_fields)
+    return make(ChartResponse, input_echo=values["input_echo"], astronomy=astronomy, vedic=vedic, western=western)
+
+
+def _validated(model, **fields):
+    return model(**fields)
+
+
+def _constructed(model, **fields):
+    return model.model_construct(**fields)
+
+
+def _response_model_path(chart: ChartResponse) -> bytes:
+    """What FastAPI does with response_model: dump, validate again, serialize, json.dumps."""
+    again = ChartResponse.model_validate(chart.model_dump())
+    return json.dumps(again.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def run(chart_count: int, repeat: int = 3) -> Dict[str, Any]:
+    pipeline = ChartPipeline()
+    batch = inputs(chart_count)
+    charts = [pipeline.calculate(i) for i in batch]
+    values = [_built(c) for c in charts]
+    return {
+        "charts": chart_count,
+        "pipeline_us": _per_call_us(pipeline.calculate, batch, repeat),
+        "construct_validated_us": _per_call_us(lambda v: _build(v, _validated), values, repeat),
+        "construct_model_construct_us": _per_call_us(lambda v: _build(v, _constructed), values, repeat),
+        "response_model_revalidation_us": _per_call_us(_response_model_path, charts, repeat),
+        "response_direct_json_us": _per_call_us(lambda c: c.model_dump_json(), charts, repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--charts", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.charts, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
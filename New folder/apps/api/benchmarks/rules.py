@@ -0,0 +1,153 @@
+"""
+Rules engine micro-benchmark
+Reference interpreter vs compiled predicates vs the (path, value) rule index
+over a synthetic rule file
+
+    python -m benchmarks.rules --rules 5000 --charts 25
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from core.dasha import VimshottariDasha
+from core.models import ChartInput
+from core.pipeline import ChartPipeline
+from core.predictions import PredictionEngine
+from core.signals import COMBUST_PLANETS, PLANET_NAMES, SIGNALS, YOGAS, compute_signals
+from core.transits import TransitCalculator
+
+
+DIGNITIES = ["Exalted", "Own", "Mooltrikona", "Neutral", "Debilitated"]
+TIMEFRAMES = ["now", "next_90_days", "next_12_months"]
+
+
+def _atom(rng: random.Random, anchor: bool = False) -> Dict[str, Any]:
+    """One condition over a real signal path with a plausible value.
+
+    Anchor atoms are house/placement tests, like the first `all` atom of the
+    rules in vedic.json.
+    """
+    planet = rng.choice(PLANET_NAMES)
+    kind = rng.choice([0, 1, 6]) if anchor else rng.randrange(7)
+    if kind == 0:
+        path, op, value = f"natal.houses.{planet}.{rng.choice(['from_lagna', 'from_moon'])}", "eq", rng.randint(1, 12)
+    elif kind == 1:
+        path, op, value = f"transit.houses.{planet}.{rng.choice(['from_lagna', 'from_moon'])}", "in", rng.sample(range(1, 13), rng.randint(1, 4))
+    elif kind == 2:
+        path, op, value = f"natal.strength.{planet}", rng.choice(["ge", "le"]), round(rng.uniform(0.2, 0.9), 2)
+    elif kind == 3:
+        path, op, value = f"natal.dignity.{planet}", rng.choice(["eq", "ne"]), rng.choice(DIGNITIES)
+    elif kind == 4:
+        path, op, value = f"natal.yogas.{rng.choice(YOGAS)}", "eq", rng.random() < 0.5
+    elif kind == 5:
+        path, op, value = f"natal.combust.{rng.choice(COMBUST_PLANETS)}", "eq", rng.random() < 0.3
+    else:
+        path, op, value = f"dasha.maha.placement.{rng.choice(['house_from_lagna', 'house_from_moon'])}", "in", rng.sample(range(1, 13), rng.randint(2, 6))
+    return {"path": path, "op": op, "value": value, "why_format": "{path} = {cur}"}
+
+
+def synthetic_rules(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """n rules shaped like vedic.json: a house anchor plus 0-2 more `all` atoms, 0-3 `any` atoms."""
+    rng = random.Random(seed)
+    rules = []
+    for i in range(n):
+        conditions = {"all": [_atom(rng, anchor=True)] + [_atom(rng) for _ in range(rng.randint(0, 2))]}
+        any_count = rng.randint(0, 3)
+        if any_count:
+            conditions["any"] = [_atom(rng) for _ in range(any_count)]
+        rules.append({
+            "id": f"synthetic_{i:05d}",
+            "domain": rng.choice(["career", "finance", "relationships", "health", "growth"]),
+            "system": "vedic",
+            "tone": "neutral",
+            "headline": f"Synthetic rule {i}",
+            "timeframe": rng.choice(TIMEFRAMES),
+            "weight": round(rng.uniform(0.5, 0.85), 2),
+            "conditions": conditions,
+            "what": ["Synthetic outcome"],
+            "do": ["Synthetic action"],
+            "dont": ["Synthetic caution"],
+        })
+    return rules
+
+
+def sample_signals(count: int, seed: int = 11) -> List[Dict[str, Any]]:
+    """Full signals trees for `count` seeded random charts, transits at 2025-06-01."""
+    rng = random.Random(seed)
+    pipeline, dasha, transits = ChartPipeline(), VimshottariDasha(), TransitCalculator()
+    public = [name for name, spec in SIGNALS.items() if spec.public]
+    out = []
+    for _ in range(count):
+        birth = datetime(rng.randint(1950, 2005), rng.randint(1, 12), rng.randint(1, 28),
+                         rng.randrange(24), rng.randrange(60))
+        chart = pipeline.calculate(ChartInput(
+            name="Bench",
+            local_datetime=birth,
+            place="Coordinates",
+            lat=rng.uniform(-45, 60),
+            lon=rng.uniform(-180, 180),
+            timezone="UTC",
+            unknown_time=False
+        ))
+        dashas = dasha.calculate(chart.vedic.moon_longitude, birth)
+        out.append(compute_signals(chart, dashas, transits.calculate(chart, datetime(2025, 6, 1)), only=public))
+    return out
+
+
+def run(rule_count: int, chart_count: int) -> Dict[str, Any]:
+    rules = synthetic_rules(rule_count)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "synthetic.json"
+        path.write_text(json.dumps(rules), encoding="utf-8")
+        t0 = time.perf_counter()
+        engine = PredictionEngine(path)
+        load_s = time.perf_counter() - t0
+
+    rule_set = engine.rule_sets()[0]
+    signals = sample_signals(chart_count)
+
+    t0 = time.perf_counter()
+    interpreted = [[r["id"] for r in engine.rules if engine._evaluate(r, s)[0]] for s in signals]
+    interpreted_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    compiled = [[c.id for c in rule_set.compiled if c.match(s) is not None] for s in signals]
+    compiled_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    candidates = [rule_set.index.candidates(s) for s in signals]
+    indexed = [[c.id for c in cands if c.match(s) is not None] for cands, s in zip(candidates, signals)]
+    indexed_s = time.perf_counter() - t0
+
+    if compiled != interpreted or indexed != interpreted:
+        raise AssertionError("compiled rules disagree with the reference interpreter")
+    return {
+        "rules": rule_count,
+        "charts": chart_count,
+        "load_and_compile_ms": round(load_s * 1000, 2),
+        "interpreted_ms_per_chart": round(interpreted_s * 1000 / chart_count, 3),
+        "compiled_ms_per_chart": round(compiled_s * 1000 / chart_count, 3),
+        "indexed_ms_per_chart": round(indexed_s * 1000 / chart_count, 3),
+        "speedup": round(interpreted_s / compiled_s, 2) if compiled_s else None,
+        "indexed_speedup": round(interpreted_s / indexed_s, 2) if indexed_s else None,
+        "candidates_per_chart": round(sum(map(len, candidates)) / chart_count, 1),
+        "fired_per_chart": round(sum(map(len, compiled)) / chart_count, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--charts", type=int, default=25)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rules, args.charts), indent=2))
+
+
+if __name__ == "__main__":
+    main()
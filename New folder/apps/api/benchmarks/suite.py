@@ -0,0 +1,251 @@
+"""
+Calculation core benchmark suite
+Times each stage over deterministic synthetic charts, saves the results as
+JSON and compares a run against a stored baseline
+
+    python -m benchmarks.suite run --charts 50 --output benchmarks/results/current.json
+    python -m benchmarks.suite compare benchmarks/results/baseline.json benchmarks/results/current.json
+
+compare exits 1 when a stage's median is slower than the baseline by more
+than --threshold (default 15%). Baselines are machine specific: record one on
+the machine that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from core.dasha import VimshottariDasha
+from core.dasha_insights import generate_insights
+from core.pipeline import ChartPipeline
+from core.predictions import PredictionEngine
+from core.signals import compute_signals
+from core.transits import TransitCalculator, clear_sky_state_cache
+
+from .synthetic import chart_inputs
+
+
+TRANSIT_DATE = datetime(2025, 6, 1)
+DEFAULT_THRESHOLD = 0.15
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Any], Any]
+    items: Callable[["Fixtures"], Sequence[Any]]
+
+
+class Fixtures:
+    """Inputs for every stage, computed once and outside the timed region."""
+
+    def __init__(self, count: int, seed: int):
+        self.pipeline = ChartPipeline()
+        self.dasha = VimshottariDasha()
+        self.transits = TransitCalculator()
+        self.engine = PredictionEngine()
+        self.inputs = chart_inputs(count, seed)
+        p = self.pipeline
+        self.normalized = [p._normalize_input(i) for i in self.inputs]
+        self.resolved = [p._resolve_location(i) for i in self.normalized]
+        self.astronomy = [(p._calculate_astronomy(utc, lat, lon), lat, lon) for utc, lat, lon, _ in self.resolved]
+        self.charts = [p.calculate(i) for i in self.inputs]
+        self.dashas = [
+            self.dasha.calculate(c.vedic.moon_longitude, c.astronomy.utc_datetime.replace(tzinfo=None))
+            for c in self.charts
+        ]
+        self.sky = [self.transits.calculate(c, TRANSIT_DATE) for c in self.charts]
+        self.full = list(zip(self.charts, self.dashas, self.sky))
+
+
+def _transits_cold(chart) -> Any:
+    clear_sky_state_cache()
+    return TransitCalculator().calculate(chart, TRANSIT_DATE)
+
+
+def stages(fx: Fixtures) -> List[Stage]:
+    p = fx.pipeline
+    return [
+        Stage("pipeline.layer1_normalize", p._normalize_input, lambda f: f.inputs),
+        Stage("pipeline.layer2_resolve_location", p._resolve_location, lambda f: f.normalized),
+        Stage("pipeline.layer3_astronomy", lambda r: p._calculate_astronomy(*r[:3]), lambda f: f.resolved),
+        Stage("pipeline.layer4_vedic", lambda a: p._calculate_vedic(*a), lambda f: f.astronomy),
+        Stage("pipeline.layer5_western", lambda a: p._calculate_western(a[0]), lambda f: f.astronomy),
+        Stage("pipeline.calculate", p.calculate, lambda f: f.inputs),
+        Stage("dasha.calculate", lambda c: fx.dasha.calculate(c.vedic.moon_longitude,
+                                                              c.astronomy.utc_datetime.replace(tzinfo=None)),
+              lambda f: f.charts),
+        Stage("transits.calculate_hot", lambda c: fx.transits.calculate(c, TRANSIT_DATE), lambda f: f.charts),
+        Stage("transits.calculate_cold", _transits_cold, lambda f: f.charts),
+        Stage("signals.compute", lambda x: compute_signals(*x), lambda f: f.full),
+        Stage("predictions.generate", lambda x: fx.engine.generate(*x), lambda f: f.full),
+        Stage("insights.generate", lambda x: generate_insights(x[0], x[1]), lambda f: f.full),
+    ]
+
+
+def _time(fn: Callable[[Any], Any], items: Sequence[Any], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """Per-call statistics in microseconds."""
+    s = sorted(samples)
+    n = len(s)
+
+    def us(x: float) -> float:
+        return round(x * 1e6, 2)
+
+    return {
+        "n": n,
+        "median_us": us(s[n // 2] if n % 2 else (s[n // 2 - 1] + s[n // 2]) / 2),
+        "p95_us": us(s[min(n - 1, int(n * 0.95))]),
+        "mean_us": us(sum(s) / n),
+        "min_us": us(s[0]),
+    }
+
+
+def _horoscope_samples(cells: int, repeat: int) -> Dict[str, List[float]]:
+    """main._horoscope_for_date against a throwaway SQLite file.
+
+    Cold calls use a (day, cell) never seen before, so the horoscope is computed
+    and written to HoroscopeCache; hot calls repeat those keys and are served
+    from the cache table.
+    """
+    # Never write benchmark rows into a configured database
+    tmp = tempfile.mkdtemp(prefix="astro-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp) / 'bench.db'}"
+    if "db" in sys.modules:
+        raise RuntimeError("db was imported before the benchmark could point it at a scratch database")
+    import main
+    from db import AsyncSessionLocal, async_engine
+
+    locations = [(i.lat, i.lon, i.timezone or "UTC") for i in chart_inputs(cells, seed=23)]
+
+    async def run() -> Dict[str, List[float]]:
+        out: Dict[str, List[float]] = {"horoscope.for_date_cold": [], "horoscope.for_date_hot": []}
+        keys = []
+        for r in range(repeat):
+            for i, (lat, lon, tz) in enumerate(locations):
+                keys.append((date(2025, 1, 1) + timedelta(days=r * len(locations) + i), lat, lon, tz))
+        for phase, batch in (("horoscope.for_date_cold", keys), ("horoscope.for_date_hot", keys)):
+            for day, lat, lon, tz in batch:
+                async with AsyncSessionLocal() as db:
+                    t0 = time.perf_counter()
+                    await main._horoscope_for_date(day, "lagna", lat, lon, tz, db)
+                    out[phase].append(time.perf_counter() - t0)
+        await async_engine.dispose()
+        return out
+
+    return asyncio.run(run())
+
+
+def run(count: int, repeat: int, seed: int = 7, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    def wanted(name: str) -> bool:
+        return not only or any(fnmatch.fnmatch(name, pat) for pat in only)
+
+    fx = Fixtures(count, seed)
+    results: Dict[str, Any] = {}
+    for stage in stages(fx):
+        if wanted(stage.name):
+            items = stage.items(fx)
+            _time(stage.fn, items[:3], 1)  # warm-up
+            results[stage.name] = summarize(_time(stage.fn, items, repeat))
+    if wanted("horoscope.for_date_cold") or wanted("horoscope.for_date_hot"):
+        for name, samples in _horoscope_samples(count, repeat).items():
+            if wanted(name):
+                results[name] = summarize(samples)
+    return {
+        "meta": {
+            "created": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "charts": count,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Any]:
+    """Median-over-median ratios per stage; regressions are ratios above 1 + threshold."""
+    base, cur = baseline["benchmarks"], current["benchmarks"]
+    rows = {}
+    for name in sorted(set(base) & set(cur)):
+        before, after = base[name]["median_us"], cur[name]["median_us"]
+        ratio = after / before if before else float("inf")
+        rows[name] = {
+            "baseline_us": before,
+            "current_us": after,
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold,
+        }
+    return {
+        "threshold": threshold,
+        "stages": rows,
+        "regressions": [name for name, row in rows.items() if row["regression"]],
+        "missing": sorted(set(base) - set(cur)),
+        "new": sorted(set(cur) - set(base)),
+    }
+
+
+def _print_comparison(report: Dict[str, Any]) -> None:
+    print(f"{'stage':40} {'baseline us':>12} {'current us':>12} {'ratio':>7}")
+    for name, row in report["stages"].items():
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{name:40} {row['baseline_us']:12.1f} {row['current_us']:12.1f} {row['ratio']:7.3f}{flag}")
+    for key in ("missing", "new"):
+        if report[key]:
+            print(f"{key}: {', '.join(report[key])}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="run the suite and write JSON results")
+    run_p.add_argument("--charts", type=int, default=50)
+    run_p.add_argument("--repeat", type=int, default=3)
+    run_p.add_argument("--seed", type=int, default=7)
+    run_p.add_argument("--only", action="append", help="stage name glob, e.g. 'pipeline.*' (repeatable)")
+    run_p.add_argument("--output", type=Path, help="results file (default: print)")
+    cmp_p = sub.add_parser("compare", help="compare results against a baseline")
+    cmp_p.add_argument("baseline", type=Path)
+    cmp_p.add_argument("current", type=Path)
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                       help="allowed slowdown as a fraction (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args.charts, args.repeat, args.seed, args.only)
+        text = json.dumps(results, indent=2)
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(text + "\n", encoding="utf-8")
+        print(text)
+        return 0
+
+    report = compare(json.loads(args.baseline.read_text(encoding="utf-8")),
+                     json.loads(args.current.read_text(encoding="utf-8")), args.threshold)
+    _print_comparison(report)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
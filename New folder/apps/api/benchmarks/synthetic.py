@@ -0,0 +1,61 @@
+"""
+Deterministic synthetic chart inputs
+Birth dates from 1800 on, coordinates spread over the globe and the
+timezones real places at those coordinates use
+"""
+
+import math
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from timezonefinder import TimezoneFinder
+
+from core.models import ChartInput
+
+
+EARLIEST = datetime(1800, 1, 1)
+# Fixed upper bound instead of "now" so a seed always yields the same inputs
+LATEST = datetime(2025, 1, 1)
+# Placidus houses are undefined inside the polar circles
+MAX_LATITUDE = 66.0
+
+_tf: Optional[TimezoneFinder] = None
+
+
+def _timezone_at(lat: float, lon: float) -> str:
+    global _tf
+    if _tf is None:
+        _tf = TimezoneFinder()
+    return _tf.timezone_at(lat=lat, lng=lon) or "UTC"
+
+
+def chart_inputs(count: int, seed: int = 7, earliest: datetime = EARLIEST,
+                 latest: datetime = LATEST) -> List[ChartInput]:
+    """count ChartInputs, identical for the same arguments.
+
+    Latitudes are area-uniform up to MAX_LATITUDE and longitudes uniform, so
+    most points fall in ocean (Etc/GMT zones) and the rest in the local zones
+    of the land there. A quarter leave timezone unset for the pipeline to
+    resolve, and one in ten has an unknown birth time. Coordinates are always
+    given, so no input needs geocoding.
+    """
+    rng = random.Random(seed)
+    span = int((latest - earliest).total_seconds() // 60)
+    bound = math.sin(math.radians(MAX_LATITUDE))
+    out = []
+    for i in range(count):
+        lat = round(math.degrees(math.asin(rng.uniform(-bound, bound))), 4)
+        lon = round(rng.uniform(-180, 180), 4)
+        local = earliest + timedelta(minutes=rng.randrange(span))
+        resolve_tz = rng.random() < 0.25
+        out.append(ChartInput(
+            name=f"Synthetic {i}",
+            local_datetime=local,
+            place=f"{lat},{lon}",
+            lat=lat,
+            lon=lon,
+            timezone=None if resolve_tz else _timezone_at(lat, lon),
+            unknown_time=rng.random() < 0.1,
+        ))
+    return out
@@ -0,0 +1,201 @@
+"""
+Chart Store
+Computed charts persisted under a content-derived chart_id
+
+A chart_id is derived from the calculation version and the normalized
+ChartInput, so the same birth data always maps to the same id and a chart
+never has to be stored twice. Charts are kept as zlib-compressed JSON (about
+a fifth of the plain JSON); reads that only pass the chart on (GET
+/v1/charts/{id}, bulk fetch) return the stored JSON without decoding it.
+
+Retention: a chart unused for CHART_STORE_RETENTION_DAYS is deleted, and once
+the store holds more than CHART_STORE_MAX_CHARTS the least recently used
+are deleted down to that number. Both run every CHART_STORE_EVICT_INTERVAL
+seconds in each API worker (the deletes are idempotent). Reads refresh a
+chart's last use at most once per CHART_STORE_TOUCH_SECONDS, so lookups
+rarely write.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from core.models import ChartInput, ChartResponse
+from db import AsyncSessionLocal
+from models import ChartRecord
+
+
+CHART_STORE_ENABLED = os.getenv("CHART_STORE_ENABLED", "1") == "1"
+CHART_STORE_RETENTION_DAYS = float(os.getenv("CHART_STORE_RETENTION_DAYS", "180"))
+CHART_STORE_MAX_CHARTS = int(os.getenv("CHART_STORE_MAX_CHARTS", "100000"))
+CHART_STORE_EVICT_INTERVAL = float(os.getenv("CHART_STORE_EVICT_INTERVAL", "3600"))
+CHART_STORE_TOUCH_SECONDS = 3600
+
+CHART_ID_LENGTH = 32
+CHART_ID_PATTERN = f"^[0-9a-f]{{{CHART_ID_LENGTH}}}$"
+# Leading byte of a payload: its encoding, so the format can change without a migration
+_ZLIB_JSON = b"\x01"
+
+
+def chart_id_for(normalized: ChartInput, calculation_version: str = "1.0.0") -> str:
+    """Id of the chart for an input already passed through ChartPipeline.normalize."""
+    key = f"{calculation_version}\n{normalized.model_dump_json()}".encode("utf-8")
+    return hashlib.sha256(key).hexdigest()[:CHART_ID_LENGTH]
+
+
+def encode(chart: ChartResponse) -> bytes:
+    return _ZLIB_JSON + zlib.compress(chart.model_dump_json().encode("utf-8"))
+
+
+def decode_json(payload: bytes) -> bytes:
+    if payload[:1] != _ZLIB_JSON:
+        raise ValueError(f"Unknown chart encoding {payload[:1]!r}")
+    return zlib.decompress(payload[1:])
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class ChartStore:
+    """Charts in the chart_store table, with retention and LRU eviction."""
+
+    def __init__(self, sessions=AsyncSessionLocal, retention_days: float = CHART_STORE_RETENTION_DAYS,
+                 max_charts: int = CHART_STORE_MAX_CHARTS):
+        self._sessions = sessions
+        self.retention_days = retention_days
+        self.max_charts = max_charts
+        self._lock = threading.Lock()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+    def _count(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    async def put(self, chart: ChartResponse) -> bool:
+        """Store a chart carrying its chart_id; False if it was already stored."""
+        if not chart.chart_id:
+            raise ValueError("chart_id must be set before storing a chart")
+        payload = encode(chart)
+        now = datetime.now(timezone.utc)
+        async with self._sessions() as db:
+            db.add(ChartRecord(
+                chart_id=chart.chart_id,
+                payload=payload,
+                size=len(payload),
+                calculation_version=chart.calculation_version,
+                created_at=now,
+                last_used_at=now,
+            ))
+            try:
+                await db.commit()
+            except IntegrityError:  # stored meanwhile by another request or worker
+                await db.rollback()
+                return False
+        with self._lock:
+            self.stored += 1
+        return True
+
+    async def get(self, chart_id: str) -> Optional[ChartResponse]:
+        found = await self.get_json([chart_id])
+        return ChartResponse.model_validate_json(found[chart_id]) if chart_id in found else None
+
+    async def get_json(self, chart_ids: Iterable[str]) -> Dict[str, bytes]:
+        """Stored chart JSON by chart_id; unknown ids are left out."""
+        ids = list(dict.fromkeys(chart_ids))
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=CHART_STORE_TOUCH_SECONDS)
+        async with self._sessions() as db:
+            rows = (await db.execute(
+                select(ChartRecord.chart_id, ChartRecord.payload, ChartRecord.last_used_at)
+                .where(ChartRecord.chart_id.in_(ids))
+            )).all()
+            stale = [r.chart_id for r in rows if r.last_used_at is None or _utc(r.last_used_at) < stale_before]
+            if stale:
+                await db.execute(
+                    update(ChartRecord).where(ChartRecord.chart_id.in_(stale))
+                    .values(last_used_at=now).execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        self._count(hits=len(rows), misses=len(ids) - len(rows))
+        return {r.chart_id: decode_json(r.payload) for r in rows}
+
+    async def evict(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Delete charts past retention, then the least recently used over max_charts."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=self.retention_days)
+        async with self._sessions() as db:
+            expired = (await db.execute(
+                delete(ChartRecord).where(ChartRecord.last_used_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )).rowcount
+            count = (await db.execute(select(func.count()).select_from(ChartRecord))).scalar_one()
+            overflow = 0
+            if count > self.max_charts:
+                oldest = (select(ChartRecord.chart_id)
+                          .order_by(ChartRecord.last_used_at, ChartRecord.chart_id)
+                          .limit(count - self.max_charts))
+                overflow = (await db.execute(
+                    delete(ChartRecord).where(ChartRecord.chart_id.in_(oldest.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                )).rowcount
+            await db.commit()
+        with self._lock:
+            self.evicted += expired + overflow
+        return {"expired": expired, "over_capacity": overflow}
+
+    def start(self, interval: float = CHART_STORE_EVICT_INTERVAL) -> None:
+        if self._task is None and interval > 0:
+            self._task = asyncio.ensure_future(self._evict_every(interval))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _evict_every(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict()
+            except Exception:
+                # Database unavailable: try again next round
+                pass
+
+    async def snapshot(self) -> Dict[str, object]:
+        async with self._sessions() as db:
+            charts, size = (await db.execute(
+                select(func.count(), func.coalesce(func.sum(ChartRecord.size), 0)).select_from(ChartRecord)
+            )).one()
+        with self._lock:
+            return {
+                "charts": charts,
+                "stored_bytes": int(size),
+                "retention_days": self.retention_days,
+                "max_charts": self.max_charts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stored": self.stored,
+                "evicted": self.evicted,
+            }
+
+
+def charts_json(found: Dict[str, bytes], chart_ids: List[str]) -> bytes:
+    """{"charts": [...], "missing": [...]} built from stored JSON, in request order."""
+    ids = list(dict.fromkeys(chart_ids))
+    charts = b",".join(found[i] for i in ids if i in found)
+    missing = ",".join(f'"{i}"' for i in ids if i not in found)
+    return b'{"charts":[' + charts + b'],"missing":[' + missing.encode("ascii") + b"]}"
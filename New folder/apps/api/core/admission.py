@@ -0,0 +1,273 @@
+"""
+Admission Control
+Per-route concurrency limits, bounded priority queues and deadline shedding
+
+Each worker admits at most ADMISSION_CONCURRENCY requests to governed routes at
+once, and each route at most its own max_concurrent. Requests over either limit
+wait in a queue ordered by priority class, then arrival, so when a slot frees
+up cheap reads start before queued heavy computations. A request is rejected
+with 503 and Retry-After when its route's queue is full, when the expected wait
+already exceeds its deadline, or when the deadline passes while it waits. The
+deadline is the route's max_wait, shortened by an X-Request-Deadline-Ms header.
+
+Governed handlers run blocking work (calculations, geocoder calls) in the
+threadpool, so a route's slots bound how many of its requests compute at once
+while the event loop keeps serving everything else. Routes without a policy (health, metrics, debug)
+bypass admission and stay responsive while governed requests compute.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import ADMISSION_WAIT_SECONDS, METRICS_ENABLED, RouteLabels, Sample, metrics, record_stage
+
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# Governed requests handled at once per worker
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "16"))
+
+# Priority classes: lower starts first
+PRIORITY_CACHED_READ = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_HEAVY = 2
+
+# Weight of the newest request in the per-route service time average
+_EWMA_ALPHA = 0.2
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    priority: int
+    max_concurrent: int
+    max_queue: int
+    max_wait: float  # seconds a request may wait before it starts
+
+
+class Shed(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+@dataclass
+class _RouteState:
+    active: int = 0
+    queued: int = 0
+    admitted: int = 0
+    shed: Dict[str, int] = field(default_factory=dict)
+    service_s: float = 0.0  # moving average of handling time
+
+
+@dataclass
+class _Waiter:
+    route: str
+    policy: RoutePolicy
+    deadline: float
+    future: "asyncio.Future[None]"
+    settled: bool = False
+
+
+class AdmissionController:
+    """Admission decisions for one worker (one event loop)."""
+
+    def __init__(self, policies: Dict[str, RoutePolicy], capacity: int = ADMISSION_CONCURRENCY):
+        self.policies = policies
+        self.capacity = capacity
+        self.active = 0
+        self._routes: Dict[str, _RouteState] = {route: _RouteState() for route in policies}
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+
+    def _can_start(self, route: str, policy: RoutePolicy) -> bool:
+        return self.active < self.capacity and self._routes[route].active < policy.max_concurrent
+
+    def expected_wait(self, route: str, policy: RoutePolicy) -> float:
+        """Rough time until a new arrival would start: the waiters ahead of it on
+        this route go through max_concurrent at a time."""
+        state = self._routes[route]
+        rounds = 1 + state.queued // policy.max_concurrent
+        return rounds * state.service_s
+
+    async def acquire(self, route: str, budget: Optional[float] = None) -> float:
+        """Wait for a slot; returns the seconds waited or raises Shed."""
+        policy = self.policies[route]
+        state = self._routes[route]
+        if self._can_start(route, policy):
+            self._start(state)
+            return 0.0
+        max_wait = policy.max_wait if budget is None else min(policy.max_wait, budget)
+        expected = self.expected_wait(route, policy)
+        if state.queued >= policy.max_queue:
+            raise self._shed(state, "queue_full", expected or policy.max_wait)
+        if expected > max_wait:
+            raise self._shed(state, "deadline", expected)
+
+        loop = asyncio.get_running_loop()
+        now = monotonic()
+        waiter = _Waiter(route, policy, now + max_wait, loop.create_future())
+        state.queued += 1
+        heapq.heappush(self._queue, (policy.priority, next(self._seq), waiter))
+        timer = loop.call_later(max_wait, self._expire, waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Client went away: give back a slot granted in the meantime
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release(route, 0.0, record=False)
+            self._settle(waiter)
+            raise
+        finally:
+            timer.cancel()
+        return monotonic() - now
+
+    def release(self, route: str, elapsed: float, record: bool = True) -> None:
+        state = self._routes[route]
+        state.active -= 1
+        self.active -= 1
+        if record:
+            state.service_s = elapsed if not state.service_s else (
+                _EWMA_ALPHA * elapsed + (1 - _EWMA_ALPHA) * state.service_s)
+        self._dispatch()
+
+    def _start(self, state: _RouteState) -> None:
+        state.active += 1
+        state.admitted += 1
+        self.active += 1
+
+    def _shed(self, state: _RouteState, reason: str, retry_after: float) -> Shed:
+        state.shed[reason] = state.shed.get(reason, 0) + 1
+        return Shed(reason, retry_after)
+
+    def _settle(self, waiter: _Waiter) -> bool:
+        if waiter.settled:
+            return False
+        waiter.settled = True
+        self._routes[waiter.route].queued -= 1
+        return True
+
+    def _expire(self, waiter: _Waiter) -> None:
+        if not waiter.future.done() and self._settle(waiter):
+            state = self._routes[waiter.route]
+            waiter.future.set_exception(self._shed(state, "deadline", self.expected_wait(waiter.route, waiter.policy)))
+
+    def _dispatch(self) -> None:
+        """Start queued requests in priority order while slots are free."""
+        now = monotonic()
+        blocked = []
+        while self._queue and self.active < self.capacity:
+            item = heapq.heappop(self._queue)
+            waiter = item[2]
+            if waiter.settled or waiter.future.done():
+                continue
+            if waiter.deadline <= now:
+                self._expire(waiter)
+                continue
+            if not self._can_start(waiter.route, waiter.policy):
+                blocked.append(item)  # its route is at its own limit; others may go
+                continue
+            self._settle(waiter)
+            self._start(self._routes[waiter.route])
+            waiter.future.set_result(None)
+        for item in blocked:
+            heapq.heappush(self._queue, item)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "routes": {
+                route: {
+                    "priority": self.policies[route].priority,
+                    "active": s.active,
+                    "queued": s.queued,
+                    "admitted": s.admitted,
+                    "shed": dict(s.shed),
+                    "service_avg_s": round(s.service_s, 6),
+                }
+                for route, s in self._routes.items()
+            },
+        }
+
+    def samples(self) -> List[Sample]:
+        out: List[Sample] = [("astro_admission_capacity", (), self.capacity)]
+        for route, s in self._routes.items():
+            labels = (("route", route),)
+            out.append(("astro_admission_active", labels, s.active))
+            out.append(("astro_admission_queue_depth", labels, s.queued))
+            out.append(("astro_admission_admitted_total", labels, s.admitted))
+            for reason, n in s.shed.items():
+                out.append(("astro_admission_shed_total", labels + (("reason", reason),), n))
+        return out
+
+
+METRIC_KINDS = {
+    "astro_admission_capacity": ("gauge", "Governed requests a worker handles at once"),
+    "astro_admission_active": ("gauge", "Admitted requests being handled by route"),
+    "astro_admission_queue_depth": ("gauge", "Requests waiting for admission by route"),
+    "astro_admission_admitted_total": ("counter", "Requests admitted by route"),
+    "astro_admission_shed_total": ("counter", "Requests rejected with 503 by route and reason"),
+}
+
+
+def _budget(scope) -> Optional[float]:
+    for name, value in scope["headers"]:
+        if name == b"x-request-deadline-ms":
+            try:
+                return max(0.0, float(value) / 1000)
+            except ValueError:
+                return None
+    return None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to governed routes."""
+
+    def __init__(self, app, controller: AdmissionController, router=None):
+        self.app = app
+        self.controller = controller
+        self._route = RouteLabels(router)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = self._route(scope)
+        if route not in self.controller.policies:
+            await self.app(scope, receive, send)
+            return
+        try:
+            waited = await self.controller.acquire(route, _budget(scope))
+        except Shed as e:
+            await _reject(send, e)
+            return
+        if METRICS_ENABLED:
+            metrics.observe(ADMISSION_WAIT_SECONDS, (("route", route),), waited)
+            if waited:
+                record_stage("admission.wait", waited)
+        t0 = monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route, monotonic() - t0)
+
+
+async def _reject(send, shed: Shed) -> None:
+    body = json.dumps({"detail": f"Server busy ({shed.reason}), retry later"}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(shed.retry_after).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,312 @@
+"""
+Bulk Chart Export
+Charts for an uploaded CSV or NDJSON file of ChartInput records, streamed back as NDJSON
+
+The upload is copied to a temporary file (kept in memory only while small), so
+a large file never sits in memory and the client is free to send its whole
+body before reading the response. Records are then parsed from that file one
+at a time and computed by a pool of worker processes, each with its own
+ChartPipeline, so exports neither hold the event loop nor compete with
+interactive requests for it. At most `window` records are in flight or
+waiting for an earlier record, which bounds memory in either output order.
+
+Each output line is {"index": i, "chart": {...}} or {"index": i, "error": "..."},
+with i the record's 0-based position in the upload, and the last line is
+{"summary": {...}}. To resume after a dropped connection, upload the same file
+again with offset set to the number of records received (input order), or to
+the lowest index not yet received (completion order; drop duplicates by index).
+"""
+
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, Any, AsyncIterator, Dict, Iterator, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from .models import ChartInput
+from .pipeline import ChartPipeline
+
+
+# Worker processes computing charts for exports (shared by all exports of an API worker)
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Records in flight per export
+BULK_WINDOW = int(os.getenv("BULK_WINDOW", "32"))
+# Largest accepted upload
+BULK_MAX_UPLOAD_BYTES = int(os.getenv("BULK_MAX_UPLOAD_BYTES", str(256 * 1024 * 1024)))
+# Longest NDJSON line
+BULK_MAX_RECORD_BYTES = 64 * 1024
+# Uploads up to this size stay in memory instead of a file
+_SPOOL_MEMORY_BYTES = 1024 * 1024
+
+FORMATS = ("csv", "ndjson")
+ORDERS = ("input", "completion")
+CSV_FIELDS = tuple(ChartInput.model_fields)
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/x-jsonlines": "ndjson",
+}
+
+Record = Union[Dict[str, Any], str]  # field values, or why the record could not be read
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    return _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], max_bytes: int = BULK_MAX_UPLOAD_BYTES) -> IO[bytes]:
+    """Copy a request body to a temporary file, rewound for reading."""
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload larger than {max_bytes} bytes")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def read_records(upload: IO[bytes], fmt: str) -> Iterator[Tuple[int, Record]]:
+    """(index, record) for each record of the upload, read lazily.
+
+    A CSV header is checked here, before the first record is requested, so a
+    file with unknown columns is rejected with ValueError instead of yielding
+    one error per row. Empty CSV cells and blank NDJSON lines are skipped.
+    """
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", errors="replace", newline="")
+    if fmt == "ndjson":
+        return _ndjson_records(text)
+    if fmt != "csv":
+        raise ValueError(f"Invalid format; expected one of {FORMATS}")
+    reader = csv.reader(text)
+    header = [h.strip() for h in next(reader, [])]
+    unknown = [h for h in header if h not in CSV_FIELDS]
+    if not header or unknown:
+        raise ValueError(f"CSV header must name fields from {CSV_FIELDS}; unknown: {unknown}")
+    return _csv_records(reader, header)
+
+
+def _csv_records(reader, header) -> Iterator[Tuple[int, Record]]:
+    index = 0
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield index, f"Malformed CSV row: {e}"
+            index += 1
+            continue
+        if not any(v.strip() for v in row):
+            continue
+        if len(row) != len(header):
+            yield index, f"Expected {len(header)} fields, got {len(row)}"
+        else:
+            yield index, {k: v.strip() for k, v in zip(header, row) if v.strip()}
+        index += 1
+
+
+def _ndjson_records(text: IO[str]) -> Iterator[Tuple[int, Record]]:
+    index = 0
+    while True:
+        line = text.readline(BULK_MAX_RECORD_BYTES)
+        if not line:
+            return
+        if len(line) == BULK_MAX_RECORD_BYTES and not line.endswith("\n"):
+            while line and not line.endswith("\n"):  # skip the rest of it
+                line = text.readline(BULK_MAX_RECORD_BYTES)
+            yield index, f"Record longer than {BULK_MAX_RECORD_BYTES} characters"
+            index += 1
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield index, f"Invalid JSON: {e}"
+        else:
+            yield index, record if isinstance(record, dict) else "Record must be a JSON object"
+        index += 1
+
+
+def _error_line(index: int, message: str) -> str:
+    return json.dumps({"index": index, "error": message}, separators=(",", ":"))
+
+
+def describe_validation_error(e: ValidationError) -> str:
+    """A record's validation errors on one line: "field: message; ..."."""
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+_pipeline: Optional[ChartPipeline] = None
+
+
+def _init_worker() -> None:
+    global _pipeline
+    _pipeline = ChartPipeline()
+
+
+def compute_line(index: int, record: Dict[str, Any]) -> Tuple[bool, str]:
+    """(ok, output line) for one record; runs in a worker process."""
+    try:
+        chart = _pipeline.calculate(ChartInput(**record))
+    except ValidationError as e:
+        return False, _error_line(index, describe_validation_error(e))
+    except Exception as e:
+        return False, _error_line(index, str(e))
+    return True, f'{{"index":{index},"chart":{chart.model_dump_json()}}}'
+
+
+class BulkExporter:
+    """Streams exports through a lazily started pool of worker processes."""
+
+    def __init__(self, workers: int = BULK_WORKERS, window: int = BULK_WINDOW):
+        self.workers = max(1, workers)
+        self.window = max(1, window)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.active = 0
+        self.exports = 0
+        self.charts = 0
+        self.errors = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: the API process runs threads (rule reloader, profiler) that fork would copy mid-state
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker)
+            return self._pool
+
+    def _submit(self, index: int, record: Dict[str, Any]) -> "asyncio.Future[Tuple[bool, str]]":
+        loop = asyncio.get_running_loop()
+        try:
+            return loop.run_in_executor(self._executor(), compute_line, index, record)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool once
+            self.shutdown()
+            return loop.run_in_executor(self._executor(), compute_line, index, record)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stream(self, upload: IO[bytes], fmt: str, order: str = "input",
+                     offset: int = 0) -> AsyncIterator[bytes]:
+        """NDJSON chunks for the records of upload from index offset on.
+
+        Raises ValueError for an unknown order or format or a bad CSV header
+        before anything is yielded; the upload is closed when the stream ends
+        or is abandoned.
+        """
+        if order not in ORDERS:
+            upload.close()
+            raise ValueError(f"Invalid order; expected one of {ORDERS}")
+        try:
+            records = read_records(upload, fmt)
+        except BaseException:
+            upload.close()
+            raise
+        return self._stream(upload, records, order, offset)
+
+    async def _stream(self, upload: IO[bytes], records: Iterator[Tuple[int, Record]],
+                      order: str, offset: int) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        pending: Dict["asyncio.Future[Tuple[bool, str]]", int] = {}
+        held: Dict[int, str] = {}  # input order: finished lines waiting for an earlier one
+        next_index = offset
+        seen = charts = errors = 0
+        exhausted = False
+        self.active += 1
+        self.exports += 1
+        try:
+            while True:
+                while not exhausted and len(pending) + len(held) < self.window:
+                    item = next(records, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    index, record = item
+                    seen = index + 1
+                    if index < offset:
+                        continue
+                    if isinstance(record, str):
+                        future = loop.create_future()
+                        future.set_result((False, _error_line(index, record)))
+                    else:
+                        future = self._submit(index, record)
+                    pending[future] = index
+                if not pending:
+                    break
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                lines = []
+                for future in finished:
+                    index = pending.pop(future)
+                    try:
+                        ok, line = future.result()
+                    except Exception as e:
+                        ok, line = False, _error_line(index, f"Worker failed: {e}")
+                    charts += ok
+                    errors += not ok
+                    if order == "completion":
+                        lines.append(line)
+                    else:
+                        held[index] = line
+                while next_index in held:
+                    lines.append(held.pop(next_index))
+                    next_index += 1
+                if lines:
+                    yield ("\n".join(lines) + "\n").encode("utf-8")
+
+            summary = {
+                "records": seen,
+                "offset": offset,
+                "charts": charts,
+                "errors": errors,
+                "next_offset": max(seen, offset),
+            }
+            yield (json.dumps({"summary": summary}, separators=(",", ":")) + "\n").encode("utf-8")
+        finally:
+            # Client gone or export done: drop queued records, results of running ones are discarded
+            for future in pending:
+                future.cancel()
+            self.active -= 1
+            self.charts += charts
+            self.errors += errors
+            upload.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "window": self.window,
+            "pool_started": self._pool is not None,
+            "active": self.active,
+            "exports": self.exports,
+            "charts": self.charts,
+            "errors": self.errors,
+        }
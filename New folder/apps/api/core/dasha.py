@@ -4,8 +4,9 @@ Vimshottari Dasha Calculator
 """
 
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from .models import DashaPeriod
+from .metrics import timed
 
 
 class VimshottariDasha:
@@ -32,6 +33,7 @@ class VimshottariDasha:
         "Venus", "Sun", "Moon", "Mars", "Rahu", "Jupiter", "Saturn", "Mercury"
     ]
     
+    @timed("dasha.calculate")
     def calculate(self, moon_longitude: float, birth_date: datetime = None) -> List[DashaPeriod]:
         """
         Calculate Vimshottari Dasha periods
@@ -46,14 +48,7 @@ class VimshottariDasha:
         if birth_date is None:
             birth_date = datetime.now()
         
-        # Determine birth nakshatra
-        nakshatra_num = int(moon_longitude / 13.333333) % 27
-        birth_nakshatra_lord = self.NAKSHATRA_LORDS[nakshatra_num]
-        
-        # Calculate balance of birth nakshatra dasha
-        nakshatra_progress = (moon_longitude % 13.333333) / 13.333333
-        birth_lord_years = self.DASHA_YEARS[birth_nakshatra_lord]
-        balance_years = birth_lord_years * (1 - nakshatra_progress)
+        birth_nakshatra_lord, balance_years = self.birth_balance(moon_longitude)
         
         # Generate Mahadashas
         mahadashas = self._generate_mahadashas(birth_nakshatra_lord, balance_years, birth_date)
@@ -75,6 +70,18 @@ class VimshottariDasha:
         
         return all_periods
 
+    @classmethod
+    def birth_balance(cls, moon_longitude: float) -> Tuple[str, float]:
+        """Return (birth Mahadasha lord, years of it remaining at birth) from Moon's longitude."""
+        # Determine birth nakshatra
+        nakshatra_num = int(moon_longitude / 13.333333) % 27
+        birth_nakshatra_lord = cls.NAKSHATRA_LORDS[nakshatra_num]
+        
+        # Calculate balance of birth nakshatra dasha
+        nakshatra_progress = (moon_longitude % 13.333333) / 13.333333
+        birth_lord_years = cls.DASHA_YEARS[birth_nakshatra_lord]
+        return birth_nakshatra_lord, birth_lord_years * (1 - nakshatra_progress)
+
     @staticmethod
     def sequence_from(start_lord: str) -> List[str]:
         """Return the 9-lord Vimshottari sequence starting from the given lord.
@@ -132,7 +139,7 @@ class VimshottariDasha:
         
         antardashas = []
         current_date = mahadasha.start_date
-        maha_days = (mahadasha.end_date - mahadasha.start_date).days
+        maha_days = (mahadasha.end_date - mahadasha.start_date).total_seconds() / 86400.0
         
         # Each antardasha proportional to planet's total dasha years
         total_dasha_years = sum(self.DASHA_YEARS.values())
@@ -142,7 +149,7 @@ class VimshottariDasha:
             antar_lord = lords[antar_lord_index]
             antar_proportion = self.DASHA_YEARS[antar_lord] / total_dasha_years
             antar_days = maha_days * antar_proportion
-            end_date = current_date + timedelta(days=antar_days)
+            end_date = current_date + timedelta(days=antar_days) if i < 8 else mahadasha.end_date
             
             antardashas.append(DashaPeriod(
                 planet=f"{mahadasha.planet}/{antar_lord}",
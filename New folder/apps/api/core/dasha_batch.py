@@ -0,0 +1,116 @@
+"""
+Vectorized Vimshottari Dasha
+Active Maha/Antar lords for many (moon longitude, birth, query) rows at once
+"""
+
+from dataclasses import dataclass
+from typing import Any, List
+
+import numpy as np
+
+from .dasha import VimshottariDasha
+
+
+LORDS: List[str] = list(VimshottariDasha.DASHA_YEARS.keys())
+YEARS = np.array([VimshottariDasha.DASHA_YEARS[lord] for lord in LORDS], dtype=np.float64)
+TOTAL_YEARS = float(YEARS.sum())
+DAYS_PER_YEAR = 365.25
+US_PER_DAY = 86400e6
+NAKSHATRA_SPAN = 13.333333  # same constant as VimshottariDasha.birth_balance
+
+# Lord index (into LORDS) ruling each of the 27 nakshatras
+NAKSHATRA_LORD_INDEX = np.array([LORDS.index(lord) for lord in VimshottariDasha.NAKSHATRA_LORDS], dtype=np.int64)
+
+# CUM_YEARS[s, k]: years from the start of lord s's Mahadasha to the start of the k-th Mahadasha after it
+_seq = (np.arange(9)[:, None] + np.arange(9)[None, :]) % 9
+CUM_YEARS = np.concatenate([np.zeros((9, 1)), np.cumsum(YEARS[_seq], axis=1)], axis=1)
+
+# SUB_FRACTIONS[m, j]: fraction of lord m's period elapsed when its j-th Antardasha starts
+SUB_FRACTIONS = CUM_YEARS / TOTAL_YEARS
+SUB_FRACTIONS[:, -1] = 1.0
+
+
+@dataclass
+class DashaBatch:
+    """Columnar result; lord arrays index into LORDS and are -1 outside the 120-year span."""
+    maha_lord: np.ndarray
+    maha_start: np.ndarray
+    maha_end: np.ndarray
+    antar_lord: np.ndarray
+    antar_start: np.ndarray
+    antar_end: np.ndarray
+
+    def lord_names(self, which: str = "maha") -> np.ndarray:
+        idx = getattr(self, f"{which}_lord")
+        names = np.array(LORDS + [""], dtype=object)
+        return names[np.where(idx < 0, 9, idx)]
+
+
+def _as_datetime64(values: Any) -> np.ndarray:
+    return np.asarray(values, dtype="datetime64[us]")
+
+
+def active_dashas(moon_longitudes: Any, birth_instants: Any, query_instants: Any) -> DashaBatch:
+    """Active Mahadasha and Antardasha for each row.
+
+    Args:
+        moon_longitudes: Moon's sidereal longitude at birth, shape (N,)
+        birth_instants: Birth datetimes (naive UTC or datetime64), shape (N,)
+        query_instants: Instants to evaluate, shape (N,) or broadcastable
+
+    Returns:
+        DashaBatch with lord indices and period boundaries as datetime64[us]
+
+    Mirrors `VimshottariDasha.calculate`: the first Mahadasha starts at birth
+    with its remaining balance and the sequence stops after nine Mahadashas.
+    """
+    moon = np.asarray(moon_longitudes, dtype=np.float64)
+    birth = _as_datetime64(birth_instants)
+    query = _as_datetime64(query_instants)
+    moon, birth, query = np.broadcast_arrays(moon, birth, query)
+
+    # Birth lord and elapsed portion of its Mahadasha
+    start_lord = NAKSHATRA_LORD_INDEX[(moon / NAKSHATRA_SPAN).astype(np.int64) % 27]
+    progress = (moon % NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+    elapsed_years = YEARS[start_lord] * progress
+
+    # Years since birth, shifted onto the birth lord's full-cycle table
+    birth_us = birth.astype(np.int64).astype(np.float64)
+    t_years = (query.astype(np.int64) - birth.astype(np.int64)) / US_PER_DAY / DAYS_PER_YEAR
+    shifted = t_years + elapsed_years
+
+    # searchsorted per row: number of Mahadasha ends at or before the query
+    cum = CUM_YEARS[start_lord]
+    k = (shifted[..., None] >= cum[..., 1:]).sum(axis=-1)
+    valid = (t_years >= 0) & (k < 9)
+    k = np.minimum(k, 8)
+
+    maha_lord = (start_lord + k) % 9
+    maha_start_y = np.maximum(np.take_along_axis(cum, k[..., None], axis=-1)[..., 0] - elapsed_years, 0.0)
+    maha_end_y = np.take_along_axis(cum, (k + 1)[..., None], axis=-1)[..., 0] - elapsed_years
+
+    # Antardasha within the active Mahadasha
+    span_y = maha_end_y - maha_start_y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(span_y > 0, (t_years - maha_start_y) / span_y, 0.0)
+    sub = SUB_FRACTIONS[maha_lord]
+    j = np.minimum((frac[..., None] >= sub[..., 1:9]).sum(axis=-1), 8)
+    antar_lord = (maha_lord + j) % 9
+    antar_start_y = maha_start_y + span_y * np.take_along_axis(sub, j[..., None], axis=-1)[..., 0]
+    antar_end_y = np.where(
+        j == 8, maha_end_y, maha_start_y + span_y * np.take_along_axis(sub, (j + 1)[..., None], axis=-1)[..., 0]
+    )
+
+    def to_instant(years: np.ndarray) -> np.ndarray:
+        us = np.rint(birth_us + years * DAYS_PER_YEAR * US_PER_DAY).astype(np.int64)
+        out = us.astype("datetime64[us]")
+        return np.where(valid, out, np.datetime64("NaT", "us"))
+
+    return DashaBatch(
+        maha_lord=np.where(valid, maha_lord, -1),
+        maha_start=to_instant(maha_start_y),
+        maha_end=to_instant(maha_end_y),
+        antar_lord=np.where(valid, antar_lord, -1),
+        antar_start=to_instant(antar_start_y),
+        antar_end=to_instant(antar_end_y),
+    )
@@ -7,6 +7,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from .models import ChartResponse, DashaPeriod
+from .signals import SignalContext
 
 # Base Mahadasha themes
 MAHA_THEMES: Dict[str, List[str]] = {
@@ -97,10 +98,10 @@ def _find_house_of_planet(chart: ChartResponse, planet_name: str) -> Optional[in
     return None
 
 
-def _find_nakshatra(chart: ChartResponse, planet_name: str) -> Optional[str]:
-    """Get nakshatra of a given planet from vedic planets list."""
+def _find_nakshatra(planets: Dict[str, Any], planet_name: str) -> Optional[str]:
+    """Get nakshatra of a given planet from the planets-by-name signal."""
     try:
-        vp = next((p for p in chart.vedic.planets if p.name.lower() == planet_name.lower()), None)
+        vp = planets.get(planet_name)
         if vp:
             return f"{vp.nakshatra} (Pada {vp.pada})"
     except Exception:
@@ -108,10 +109,12 @@ def _find_nakshatra(chart: ChartResponse, planet_name: str) -> Optional[str]:
     return None
 
 
-def generate_insights(chart: ChartResponse, dashas: List[DashaPeriod]) -> Dict[str, Any]:
+def generate_insights(chart: ChartResponse, dashas: List[DashaPeriod],
+                      context: Optional[SignalContext] = None) -> Dict[str, Any]:
     """Generate personalized Mahadasha/Antardasha insights."""
-    current_maha = next((d for d in dashas if d.level == "Maha" and d.current), None)
-    current_antar = next((d for d in dashas if d.level == "Antar" and d.current), None)
+    ctx = context or SignalContext.for_chart(chart, dashas)
+    planets = ctx.get("planets")
+    current_maha, current_antar = ctx.get("dasha.current") if dashas else (None, None)
 
     # Fallback: use the first future/current Mahadasha if none flagged current
     if current_maha is None:
@@ -123,7 +126,7 @@ def generate_insights(chart: ChartResponse, dashas: List[DashaPeriod]) -> Dict[s
     if current_maha:
         maha_lord = current_maha.planet.split("/")[0]
         house = _find_house_of_planet(chart, maha_lord)
-        nak = _find_nakshatra(chart, maha_lord)
+        nak = _find_nakshatra(planets, maha_lord)
         themes = MAHA_THEMES.get(maha_lord, [])
         house_line = HOUSE_THEMES.get(house) if house else None
         if house_line:
@@ -146,7 +149,7 @@ def generate_insights(chart: ChartResponse, dashas: List[DashaPeriod]) -> Dict[s
     if current_antar and current_maha:
         antar_lord = current_antar.planet.split("/")[1] if "/" in current_antar.planet else current_antar.planet
         house = _find_house_of_planet(chart, antar_lord)
-        nak = _find_nakshatra(chart, antar_lord)
+        nak = _find_nakshatra(planets, antar_lord)
         modifier = ANTAR_MODIFIERS.get(antar_lord)
         themes: List[str] = []
         if modifier:
@@ -0,0 +1,205 @@
+"""
+Lazy Vimshottari Dasha Tree
+Maha → Antar → Pratyantar → Sookshma → Prana periods generated on demand
+"""
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .dasha import VimshottariDasha
+from .models import DashaPeriod
+
+
+LEVELS = ["Maha", "Antar", "Pratyantar", "Sookshma", "Prana"]
+
+LORDS = list(VimshottariDasha.DASHA_YEARS.keys())
+TOTAL_YEARS = float(sum(VimshottariDasha.DASHA_YEARS.values()))
+DAYS_PER_YEAR = 365.25
+
+
+def _build_fraction_tables() -> Dict[str, List[float]]:
+    """Cumulative fraction of a parent period at which each sub-period starts.
+
+    For a parent ruled by L the sub-lords run in Vimshottari order starting at L,
+    each taking years[sub] / 120 of the parent. Table has 10 entries (0.0 … 1.0).
+    """
+    tables: Dict[str, List[float]] = {}
+    for lord in LORDS:
+        cum = [0.0]
+        for sub in VimshottariDasha.sequence_from(lord):
+            cum.append(cum[-1] + VimshottariDasha.DASHA_YEARS[sub] / TOTAL_YEARS)
+        cum[-1] = 1.0
+        tables[lord] = cum
+    return tables
+
+
+SUB_FRACTIONS = _build_fraction_tables()
+
+
+class DashaNode:
+    """One period in the tree. Children are derived from (lord, start, end) only."""
+
+    __slots__ = ("lords", "start", "end")
+
+    def __init__(self, lords: Tuple[str, ...], start: datetime, end: datetime):
+        self.lords = lords
+        self.start = start
+        self.end = end
+
+    @property
+    def lord(self) -> str:
+        return self.lords[-1]
+
+    @property
+    def level(self) -> str:
+        return LEVELS[len(self.lords) - 1]
+
+    @property
+    def depth(self) -> int:
+        return len(self.lords) - 1
+
+    def contains(self, when: datetime) -> bool:
+        return self.start <= when < self.end
+
+    def child(self, index: int) -> "DashaNode":
+        """Return the index-th sub-period (0 = the node's own lord)."""
+        cum = SUB_FRACTIONS[self.lord]
+        span = self.end - self.start
+        sub_lord = LORDS[(LORDS.index(self.lord) + index) % 9]
+        start = self.start + span * cum[index]
+        end = self.end if index == 8 else self.start + span * cum[index + 1]
+        return DashaNode(self.lords + (sub_lord,), start, end)
+
+    def index_at(self, when: datetime) -> int:
+        """Index of the sub-period containing `when`, by arithmetic on the fraction table."""
+        span = (self.end - self.start).total_seconds()
+        frac = (when - self.start).total_seconds() / span if span > 0 else 0.0
+        return min(8, max(0, bisect_right(SUB_FRACTIONS[self.lord], frac) - 1))
+
+    def child_at(self, when: datetime) -> "DashaNode":
+        return self.child(self.index_at(when))
+
+    def children(self) -> Iterator["DashaNode"]:
+        for i in range(9):
+            yield self.child(i)
+
+    def to_period(self, current: Optional[datetime] = None) -> DashaPeriod:
+        return DashaPeriod(
+            planet="/".join(self.lords),
+            level=self.level,
+            start_date=self.start,
+            end_date=self.end,
+            duration_years=(self.end - self.start).total_seconds() / 86400.0 / DAYS_PER_YEAR,
+            current=self.contains(current) if current is not None else False,
+        )
+
+    def __repr__(self) -> str:
+        return f"DashaNode({'/'.join(self.lords)}, {self.start.isoformat()} → {self.end.isoformat()})"
+
+
+class DashaTree:
+    """Vimshottari periods down to Prana level, materialised only where queried.
+
+    Follows the same conventions as `VimshottariDasha.calculate`: the first
+    Mahadasha runs from birth for the remaining balance and sub-periods are
+    proportional to the parent period. After the first cycle the sequence
+    repeats with full-length Mahadashas, starting where the first cycle ends.
+    """
+
+    def __init__(self, moon_longitude: float, birth_date: datetime):
+        self.birth_date = birth_date
+        self.start_lord, self.balance_years = VimshottariDasha.birth_balance(moon_longitude)
+        self._start_index = LORDS.index(self.start_lord)
+        # Offsets (years from birth) at which each Mahadasha of the first cycle ends
+        ends = [self.balance_years]
+        for i in range(1, 9):
+            ends.append(ends[-1] + VimshottariDasha.DASHA_YEARS[LORDS[(self._start_index + i) % 9]])
+        self._maha_end_years = ends
+        # Later cycles run full-length from the end of the first one
+        self._first_cycle_end = ends[-1]
+        full = [0.0]
+        for i in range(9):
+            full.append(full[-1] + VimshottariDasha.DASHA_YEARS[LORDS[(self._start_index + i) % 9]])
+        self._full_start_years = full
+
+    def mahadasha(self, index: int) -> DashaNode:
+        """index-th Mahadasha counted from birth (0 = birth balance period)."""
+        cycle, pos = divmod(index, 9)
+        if cycle == 0:
+            start_years = self._maha_end_years[pos - 1] if pos else 0.0
+            end_years = self._maha_end_years[pos]
+        else:
+            offset = self._first_cycle_end + (cycle - 1) * TOTAL_YEARS
+            start_years = offset + self._full_start_years[pos]
+            end_years = offset + self._full_start_years[pos + 1]
+        lord = LORDS[(self._start_index + pos) % 9]
+        return DashaNode((lord,), self._at_years(start_years), self._at_years(end_years))
+
+    def mahadashas(self, count: int = 9) -> Iterator[DashaNode]:
+        for i in range(count):
+            yield self.mahadasha(i)
+
+    def active(self, when: datetime, level: str = "Prana") -> List[DashaNode]:
+        """Chain of periods running at `when`, Maha first, descending to `level`.
+
+        O(levels): each step picks the child by arithmetic without building siblings.
+        Returns an empty list for instants before birth.
+        """
+        depth = self._depth(level)
+        index = self._maha_index_at(when)
+        if index is None:
+            return []
+        node = self.mahadasha(index)
+        chain = [node]
+        for _ in range(depth):
+            node = node.child_at(when)
+            chain.append(node)
+        return chain
+
+    def periods(self, level: str, start: datetime, end: datetime) -> Iterator[DashaNode]:
+        """Yield every period at `level` overlapping [start, end), in time order."""
+        depth = self._depth(level)
+        if end <= start:
+            return
+        index = self._maha_index_at(max(start, self.birth_date))
+        while True:
+            maha = self.mahadasha(index)
+            if maha.start >= end:
+                return
+            yield from self._descend(maha, depth, start, end)
+            index += 1
+
+    def _descend(self, node: DashaNode, depth: int, start: datetime, end: datetime) -> Iterator[DashaNode]:
+        if node.end <= start or node.start >= end:
+            return
+        if node.depth == depth:
+            yield node
+            return
+        begin = node.index_at(start) if node.start < start else 0
+        for i in range(begin, 9):
+            child = node.child(i)
+            if child.start >= end:
+                return
+            yield from self._descend(child, depth, start, end)
+
+    def _maha_index_at(self, when: datetime) -> Optional[int]:
+        years = self._years_since_birth(when)
+        if years < 0:
+            return None
+        if years < self._first_cycle_end:
+            return min(8, bisect_right(self._maha_end_years, years))
+        cycle, rem = divmod(years - self._first_cycle_end, TOTAL_YEARS)
+        return (int(cycle) + 1) * 9 + min(8, bisect_right(self._full_start_years, rem) - 1)
+
+    def _at_years(self, years: float) -> datetime:
+        return self.birth_date + timedelta(days=years * DAYS_PER_YEAR)
+
+    def _years_since_birth(self, when: datetime) -> float:
+        return (when - self.birth_date).total_seconds() / 86400.0 / DAYS_PER_YEAR
+
+    @staticmethod
+    def _depth(level: str) -> int:
+        if level not in LEVELS:
+            raise ValueError(f"Invalid dasha level: {level}")
+        return LEVELS.index(level)
@@ -0,0 +1,194 @@
+"""
+Memory Accounting
+tracemalloc-based peak allocation per route and heap snapshot diffs
+
+Tracing is off until started (tracemalloc slows allocation-heavy code several
+times over), and can be started and stopped in a running worker. While it is
+on, MemoryMiddleware records for every request the peak traced memory above the
+level it started at, and what was still allocated when it finished.
+tracemalloc's peak is process wide, so with concurrent requests the figures
+include each other's allocations; run one request at a time for exact numbers.
+"""
+
+import os
+import threading
+import tracemalloc
+from time import strftime, gmtime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import RouteLabels
+
+
+# Frames kept per allocation traceback when tracing starts (more = slower, finer diffs)
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "1"))
+# Heap snapshots kept for diffing
+MEMORY_MAX_SNAPSHOTS = int(os.getenv("MEMORY_MAX_SNAPSHOTS", "4"))
+
+GROUP_BY = ("lineno", "filename", "traceback")
+_IGNORE = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+)
+
+
+def measure(fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, int, int]:
+    """Call fn and return (result, peak bytes, retained bytes) above the level
+    before the call. Starts and stops tracing itself unless it is already on."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn(*args, **kwargs)
+        current, peak = tracemalloc.get_traced_memory()
+        return result, peak - before, current - before
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryTracker:
+    """Per-route allocation figures and a short history of heap snapshots."""
+
+    def __init__(self, max_snapshots: int = MEMORY_MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._lock = threading.Lock()
+        self._routes: Dict[str, List[float]] = {}  # route -> [count, peak_total, peak_max, retained_total]
+        self._snapshots: List[Tuple[str, tracemalloc.Snapshot]] = []
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = MEMORY_TRACE_FRAMES) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Stop tracing; snapshots are dropped with the traces they refer to."""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def record(self, route: str, peak: int, retained: int) -> None:
+        with self._lock:
+            r = self._routes.setdefault(route, [0, 0, 0, 0])
+            r[0] += 1
+            r[1] += peak
+            if peak > r[2]:
+                r[2] = peak
+            r[3] += retained
+
+    def routes(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                route: {
+                    "requests": int(count),
+                    "peak_avg_bytes": int(peak_total / count),
+                    "peak_max_bytes": int(peak_max),
+                    "retained_avg_bytes": int(retained_total / count),
+                }
+                for route, (count, peak_total, peak_max, retained_total)
+                in sorted(self._routes.items(), key=lambda x: -x[1][2])
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            taken = [label for label, _ in self._snapshots]
+        return {
+            "tracing": self.tracing,
+            "traceback_frames": tracemalloc.get_traceback_limit() if self.tracing else None,
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "rss_bytes": rss_bytes(),
+            "routes": self.routes(),
+            "snapshots": taken,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Take a heap snapshot (tracing must be on); the oldest is dropped past max_snapshots."""
+        if not self.tracing:
+            raise ValueError("tracemalloc is not tracing; start it first")
+        snap = tracemalloc.take_snapshot().filter_traces(_IGNORE)
+        label = strftime("%Y-%m-%dT%H:%M:%S", gmtime())
+        with self._lock:
+            self._snapshots.append((label, snap))
+            del self._snapshots[:-self.max_snapshots]
+            index = len(self._snapshots) - 1
+        stats = snap.statistics("filename")
+        return {
+            "index": index,
+            "taken": label,
+            "traced_bytes": sum(s.size for s in stats),
+            "blocks": sum(s.count for s in stats),
+        }
+
+    def diff(self, base: int = -2, head: int = -1, group_by: str = "lineno", top: int = 25) -> Dict[str, Any]:
+        """Largest size changes from snapshot `base` to snapshot `head` (indexes into the history)."""
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        with self._lock:
+            snapshots = list(self._snapshots)
+        try:
+            (base_label, old), (head_label, new) = snapshots[base], snapshots[head]
+        except IndexError:
+            raise ValueError(f"need snapshots {base} and {head}; {len(snapshots)} taken")
+        stats = new.compare_to(old, group_by)
+        return {
+            "base": base_label,
+            "head": head_label,
+            "size_diff_bytes": sum(s.size_diff for s in stats),
+            "count_diff": sum(s.count_diff for s in stats),
+            "top": [
+                {
+                    "where": [f"{frame.filename}:{frame.lineno}" for frame in s.traceback],
+                    "size_diff_bytes": s.size_diff,
+                    "size_bytes": s.size,
+                    "count_diff": s.count_diff,
+                    "count": s.count,
+                }
+                for s in stats[:top]
+            ],
+        }
+
+
+memory_tracker = MemoryTracker()
+
+
+class MemoryMiddleware:
+    """ASGI middleware recording peak and retained traced memory per route
+    template while tracemalloc is on; a pass-through otherwise."""
+
+    def __init__(self, app, tracker: MemoryTracker = memory_tracker, router=None):
+        self.app = app
+        self.tracker = tracker
+        self._route = RouteLabels(router)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                self.tracker.record(self._route(scope), peak - before, current - before)
@@ -0,0 +1,310 @@
+"""
+Request Metrics
+Per-stage timers, Server-Timing headers and a Prometheus text exposition
+
+Stages are timed with @timed (functions) or span() (blocks). Durations go to a
+process-wide histogram and, inside a request, to that request's Server-Timing
+header. With METRICS_ENABLED=0 @timed returns the function unchanged, span()
+returns a shared no-op context and the middleware is not installed.
+"""
+
+import functools
+import os
+import threading
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.routing import Match
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Histogram upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_SECONDS = "astro_stage_duration_seconds"
+REQUEST_SECONDS = "astro_http_request_duration_seconds"
+ADMISSION_WAIT_SECONDS = "astro_admission_wait_seconds"
+HISTOGRAMS = (STAGE_SECONDS, REQUEST_SECONDS, ADMISSION_WAIT_SECONDS)
+
+HELP = {
+    STAGE_SECONDS: "Time spent in a calculation, cache or provider stage",
+    REQUEST_SECONDS: "HTTP request latency by route",
+    ADMISSION_WAIT_SECONDS: "Time admitted requests waited in the admission queue",
+    "astro_http_requests_in_flight": "Requests currently being handled by route",
+    "astro_cache_hits_total": "Cache lookups answered from the cache",
+    "astro_cache_misses_total": "Cache lookups that had to compute or fetch",
+    "astro_cache_hit_ratio": "Hits over lookups since start",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Labels, float]
+
+# Stages of the request being handled; None outside a request
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size  # per bucket, last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Latency histograms, cache hit counters and in-flight gauges."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._caches: Dict[str, List[int]] = {}  # name -> [hits, misses]
+        self._cache_sources: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._in_flight: Dict[Labels, int] = {}
+        self._collectors: List[Callable[[], List[Sample]]] = []
+        self._kinds: Dict[str, str] = {}
+
+    def observe(self, metric: str, labels: Labels, seconds: float) -> None:
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            h = self._histograms.get((metric, labels))
+            if h is None:
+                h = self._histograms[(metric, labels)] = Histogram(len(self.buckets) + 1)
+            h.counts[i] += 1
+            h.sum += seconds
+            h.count += 1
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        with self._lock:
+            c = self._caches.setdefault(cache, [0, 0])
+            c[0 if hit else 1] += 1
+
+    def register_cache(self, cache: str, source: Callable[[], Tuple[int, int]]) -> None:
+        """Export a cache that keeps its own (hits, misses) counters."""
+        with self._lock:
+            self._cache_sources[cache] = source
+
+    def register_collector(self, collector: Callable[[], List[Sample]], kinds: Dict[str, Tuple[str, str]]) -> None:
+        """Export samples read at scrape time; kinds maps metric -> (type, help)."""
+        with self._lock:
+            self._collectors.append(collector)
+            for metric, (kind, text) in kinds.items():
+                self._kinds[metric] = kind
+                HELP[metric] = text
+
+    def in_flight(self, labels: Labels, delta: int) -> None:
+        with self._lock:
+            self._in_flight[labels] = self._in_flight.get(labels, 0) + delta
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._caches.clear()
+            self._in_flight.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms = {k: (list(h.counts), h.sum, h.count) for k, h in self._histograms.items()}
+            caches = {name: tuple(c) for name, c in self._caches.items()}
+            sources = dict(self._cache_sources)
+            in_flight = dict(self._in_flight)
+            collectors = list(self._collectors)
+            kinds = dict(self._kinds)
+        for name, source in sources.items():
+            caches[name] = tuple(source())
+
+        lines: List[str] = []
+        for metric in HISTOGRAMS:
+            _header(lines, metric, "histogram")
+            for (name, labels), (counts, total, count) in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    lines.append(f"{metric}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {total!r}")
+                lines.append(f"{metric}_count{_labels(labels)} {count}")
+
+        _header(lines, "astro_http_requests_in_flight", "gauge")
+        for labels, n in sorted(in_flight.items()):
+            lines.append(f"astro_http_requests_in_flight{_labels(labels)} {n}")
+
+        for metric, kind, value in (
+            ("astro_cache_hits_total", "counter", lambda h, m: h),
+            ("astro_cache_misses_total", "counter", lambda h, m: m),
+            ("astro_cache_hit_ratio", "gauge", lambda h, m: round(h / (h + m), 6) if h + m else 0.0),
+        ):
+            _header(lines, metric, kind)
+            for name, (hits, misses) in sorted(caches.items()):
+                lines.append(f"{metric}{_labels((('cache', name),))} {value(hits, misses)}")
+
+        collected: Dict[str, List[Tuple[Labels, float]]] = {}
+        for collector in collectors:
+            for metric, labels, value in collector():
+                collected.setdefault(metric, []).append((labels, value))
+        for metric in sorted(collected):
+            _header(lines, metric, kinds[metric])
+            for labels, value in sorted(collected[metric]):
+                lines.append(f"{metric}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines: List[str], metric: str, kind: str) -> None:
+    lines.append(f"# HELP {metric} {HELP[metric]}")
+    lines.append(f"# TYPE {metric} {kind}")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels) + "}"
+
+
+metrics = MetricsRegistry()
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    metrics.observe(STAGE_SECONDS, (("stage", stage),), seconds)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    if METRICS_ENABLED:
+        metrics.cache_lookup(cache, hit)
+
+
+def timed(stage: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator timing every call as `stage`; the function itself when metrics are off."""
+    def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+        if not METRICS_ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def timed_call(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_stage(stage, perf_counter() - t0)
+        return timed_call
+    return wrap
+
+
+class _Span:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "_Span":
+        self.t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        record_stage(self.stage, perf_counter() - self.t0)
+
+
+_NO_SPAN = nullcontext()
+
+
+def span(stage: str):
+    """Context manager timing a block as `stage`."""
+    return _Span(stage) if METRICS_ENABLED else _NO_SPAN
+
+
+def server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    """Server-Timing header value: one entry per stage (durations summed) plus the total."""
+    merged: Dict[str, List[float]] = {}
+    for stage, seconds in spans:
+        entry = merged.setdefault(stage, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+    parts = []
+    for stage, (calls, seconds) in merged.items():
+        desc = f';desc="{calls} calls"' if calls > 1 else ""
+        parts.append(f"{stage};dur={seconds * 1000:.3f}{desc}")
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+# Route templates remembered per (method, path); paths with parameters vary, so bounded
+ROUTE_CACHE_SIZE = 2048
+
+
+class RouteLabels:
+    """Route template ("/api/horoscope/{d}") for an ASGI scope, so per-route
+    metrics do not get one series per concrete path."""
+
+    def __init__(self, router=None):
+        self.router = router
+        self._routes: Dict[Tuple[str, str], str] = {}
+
+    def __call__(self, scope) -> str:
+        if self.router is None:
+            return "all"
+        key = (scope["method"], scope["path"])
+        route = self._routes.get(key)
+        if route is None:
+            route = "unmatched"
+            for candidate in self.router.routes:
+                match, _ = candidate.matches(scope)
+                if match is Match.FULL:
+                    route = candidate.path
+                    break
+            if len(self._routes) < ROUTE_CACHE_SIZE:
+                self._routes[key] = route
+        return route
+
+
+class MetricsMiddleware:
+    """ASGI middleware: latency and in-flight count per route template, and a
+    Server-Timing header listing the stages the request went through.
+
+    Stages recorded after the response has started (streamed bodies) count in
+    the histograms but are not in the header.
+    """
+
+    def __init__(self, app, router=None, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+        self._route = RouteLabels(router)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = perf_counter()
+        labels: Labels = (("method", scope["method"]), ("route", self._route(scope)))
+        spans: List[Tuple[str, float]] = []
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(spans, perf_counter() - t0).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        token = _request_spans.set(spans)
+        self.registry.in_flight(labels, 1)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.registry.in_flight(labels, -1)
+            self.registry.observe(REQUEST_SECONDS, labels + (("status", str(status)),), perf_counter() - t0)
+            _request_spans.reset(token)
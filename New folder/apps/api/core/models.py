@@ -7,6 +7,14 @@ from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 from enum import Enum
+import os
+
+
+# Models built by the calculation core are validated once, at construction
+# (pydantic-core validation is cheaper than model_construct for these models).
+# Routes serialize them directly instead of validating them again against
+# response_model; set VALIDATE_INTERNAL_MODELS=1 to restore that second pass.
+VALIDATE_INTERNAL_MODELS = os.getenv("VALIDATE_INTERNAL_MODELS", "0") == "1"
 
 
 class ChartSystem(str, Enum):
@@ -133,6 +141,48 @@ class Transit(BaseModel):
     aspects_natal: List[str]  # Planets being aspected
 
 
+class TransitEvent(BaseModel):
+    """Instant at which a transit changes state"""
+    planet: str
+    event: str  # sign_ingress, nakshatra_ingress, station_retrograde, station_direct, aspect
+    at: datetime  # UTC
+    longitude: float  # Sidereal longitude at the event
+    sign: str
+    nakshatra: str
+    natal_planet: Optional[str] = None  # aspect events only
+    aspect: Optional[str] = None  # conjunction, sextile, square, trine, opposition
+    from_natal_moon: Optional[int] = None
+    from_natal_lagna: Optional[int] = None
+
+
+class TransitPhase(BaseModel):
+    """Contiguous stay of a slow planet in one house of a long cycle"""
+    phase: str
+    start: datetime
+    end: datetime
+
+
+class TransitWindow(BaseModel):
+    """Full long-cycle window (e.g. one Sade Sati) including retrograde re-entries"""
+    kind: str  # sade_sati, ashtama_shani, jupiter_return, node_axis
+    planet: str
+    start: datetime
+    end: datetime
+    phases: List[TransitPhase]
+
+
+class PredictionWindow(BaseModel):
+    """Interval during which a rule fires"""
+    rule_id: str
+    rule_set: str
+    domain: str
+    headline: str
+    start: datetime
+    end: datetime
+    confidence: float  # peak over the window
+    triggers: List[str]  # WHY lines when the window opened
+
+
 class PredictionEvidence(BaseModel):
     """Evidence for why a prediction was generated"""
     rule_id: str
@@ -9,7 +9,10 @@ Layer 5: Western transformations
 
 import swisseph as swe
 from datetime import datetime, timezone
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional
+from urllib.parse import urlsplit
+import os
+import threading
 import pytz
 from timezonefinder import TimezoneFinder
 from geopy.geocoders import Nominatim
@@ -20,6 +23,11 @@ from .models import (
     ChartInput, ChartResponse, Astronomy, VedicData, WesternData,
     PlanetPosition, VedicPlanetPosition, Aspect
 )
+from .metrics import span, timed
+
+
+# Geocoder base URL (point at a local Nominatim or the load-test fake)
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org").rstrip("/")
 
 
 class ChartPipeline:
@@ -73,9 +81,22 @@ class ChartPipeline:
         """Initialize Swiss Ephemeris"""
         swe.set_ephe_path('/app/ephe')  # Docker path
         self.tf = TimezoneFinder()
-        # Nominatim with short timeout and default domain
-        self.geolocator = Nominatim(user_agent="astro_kundli", timeout=5)
+        # TimezoneFinder seeks and reads shared file handles: one lookup at a time
+        self._tf_lock = threading.Lock()
+        # Nominatim with short timeout (domain from NOMINATIM_URL)
+        url = urlsplit(NOMINATIM_URL)
+        self.geolocator = Nominatim(user_agent="astro_kundli", timeout=5,
+                                    domain=url.netloc + url.path, scheme=url.scheme)
     
+    def timezone_at(self, lat: float, lon: float) -> Optional[str]:
+        """Timezone name at a point; safe to call from worker threads"""
+        with self._tf_lock:
+            return self.tf.timezone_at(lat=lat, lng=lon)
+
+    def normalize(self, input_data: ChartInput) -> ChartInput:
+        """Layer 1 on its own: the input exactly as calculate() uses it (and echoes it)"""
+        return self._normalize_input(input_data)
+
     def calculate(self, input_data: ChartInput) -> ChartResponse:
         """Execute full 5-layer pipeline"""
         
@@ -101,6 +122,7 @@ class ChartPipeline:
             western=western
         )
     
+    @timed("pipeline.normalize")
     def _normalize_input(self, input_data: ChartInput) -> ChartInput:
         """Layer 1: Normalize and validate input"""
         if input_data.unknown_time:
@@ -109,6 +131,7 @@ class ChartPipeline:
             input_data.local_datetime = dt
         return input_data
     
+    @timed("pipeline.resolve_location")
     def _resolve_location(self, input_data: ChartInput) -> Tuple[datetime, float, float, str]:
         """Layer 2: Resolve timezone and coordinates"""
         
@@ -119,7 +142,8 @@ class ChartPipeline:
             if re.search(r"https?://|<|>|\n|\r", place):
                 raise ValueError("Invalid place format")
             try:
-                location = self.geolocator.geocode(place)
+                with span("geo.nominatim_geocode"):
+                    location = self.geolocator.geocode(place)
             except GeocoderTimedOut:
                 raise ValueError("Geocoding timed out. Please try again.")
             except GeocoderServiceError as e:
@@ -134,7 +158,8 @@ class ChartPipeline:
         if input_data.timezone:
             tz_name = input_data.timezone
         else:
-            tz_name = self.tf.timezone_at(lat=lat, lng=lon)
+            with span("geo.timezone"):
+                tz_name = self.timezone_at(lat, lon)
             if not tz_name:
                 tz_name = "UTC"
         
@@ -152,6 +177,7 @@ class ChartPipeline:
         
         return utc_dt, lat, lon, tz_name
     
+    @timed("pipeline.astronomy")
     def _calculate_astronomy(self, utc_dt: datetime, lat: float, lon: float) -> Astronomy:
         """Layer 3: Raw Swiss Ephemeris calculations"""
         
@@ -201,6 +227,7 @@ class ChartPipeline:
             house_cusps=list(houses)
         )
     
+    @timed("pipeline.vedic")
     def _calculate_vedic(self, astronomy: Astronomy, lat: float, lon: float) -> VedicData:
         """Layer 4: Vedic (sidereal) transformations"""
         
@@ -285,6 +312,7 @@ class ChartPipeline:
             south_chart=south_chart
         )
     
+    @timed("pipeline.western")
     def _calculate_western(self, astronomy: Astronomy) -> WesternData:
         """Layer 5: Western (tropical) transformations"""
         
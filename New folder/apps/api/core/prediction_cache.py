@@ -0,0 +1,129 @@
+"""
+Prediction Cache
+Reuses generated predictions while the chart, the active dashas, the transit
+signals and the rule set versions are unchanged
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .models import ChartResponse, DashaPeriod, Transit
+from .rule_sets import RuleSet
+
+
+# Entries kept in memory; 0 disables caching
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+
+
+def chart_fingerprint(chart: ChartResponse) -> str:
+    """Hash of the natal data signals are computed from (chart.vedic)."""
+    return hashlib.sha256(chart.vedic.model_dump_json().encode("utf-8")).hexdigest()[:16]
+
+
+def dasha_fingerprint(dashas: List[DashaPeriod], with_dates: bool = True) -> Tuple:
+    """Current Maha and Antar periods, the only part of the dasha list signals read.
+
+    Lord placement and dignity follow from the lord and the chart, so period
+    dates are only part of the fingerprint when rules read them.
+    """
+    current: Dict[str, DashaPeriod] = {}
+    for d in dashas:
+        if d.current and d.level in ("Maha", "Antar"):
+            current.setdefault(d.level, d)
+    if not with_dates:
+        return tuple((level, p.planet) for level, p in sorted(current.items()))
+    return tuple(
+        (level, p.planet, p.start_date.isoformat(), p.end_date.isoformat())
+        for level, p in sorted(current.items())
+    )
+
+
+def transit_fingerprint(transits: List[Transit]) -> Tuple:
+    """Every transit field signals read; changes only at sign ingresses."""
+    return tuple(
+        (t.planet, t.current_sign, t.from_natal_moon, t.from_natal_lagna, tuple(t.aspects_natal))
+        for t in transits
+    )
+
+
+def prediction_key(chart: ChartResponse, dashas: List[DashaPeriod], transits: List[Transit],
+                   rule_sets: Iterable[RuleSet]) -> str:
+    """Stable digest of everything a prediction result depends on.
+
+    Rule sets are identified by content digest rather than the in-process version
+    counter, so the key (and the prediction IDs derived from it) is the same
+    across workers and restarts.
+    """
+    rule_sets = list(rule_sets)
+    parts = (
+        chart_fingerprint(chart),
+        transit_fingerprint(transits),
+        dasha_fingerprint(dashas, with_dates=any(rs.reads_dasha_dates for rs in rule_sets)),
+        tuple((rs.name, rs.digest) for rs in rule_sets),
+    )
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:24]
+
+
+class PredictionCache:
+    """Thread-safe LRU of generate() results by prediction_key.
+
+    Results are shared between callers and must be treated as read-only.
+    Subscribe invalidate_rule_set to RuleSetManager swaps to drop entries built
+    from a replaced file (they could never be hit again, the key changes).
+    """
+
+    def __init__(self, maxsize: int = PREDICTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[frozenset, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, rule_sets: Iterable[str], result: Dict[str, Any]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (frozenset(rule_sets), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_rule_set(self, name: str, old: Optional[RuleSet] = None,
+                            new: Optional[RuleSet] = None) -> int:
+        """Drop entries that used the named rule set (RuleSetManager listener signature)."""
+        with self._lock:
+            stale = [key for key, (names, _) in self._entries.items() if name in names]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
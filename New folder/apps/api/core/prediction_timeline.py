@@ -0,0 +1,124 @@
+"""
+Prediction Timeline
+Steps transits and active dashas across a future window and reports the
+date intervals during which each rule fires
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .dasha_tree import DashaNode, DashaTree
+from .models import ChartResponse, PredictionWindow, Transit
+from .predictions import PredictionEngine
+from .rule_compiler import CompiledRule
+from .signals import SignalContext
+from .transits import TransitCalculator
+
+
+# Upper bound on steps per scan (10 years at hourly resolution is ~87k)
+MAX_STEPS = 20000
+
+
+class PredictionTimeline:
+    """Scan future dates for rule firing windows.
+
+    Natal signals are computed once. At each step the transit snapshot
+    (computed outside the shared cache, which a scan would flush) is overlaid
+    on the chart, and signals are invalidated only when an input they read
+    changed: dasha signals at Antardasha boundaries, transit signals when a
+    planet changes sign (or, if rules read natal aspects, when those change). Steps where nothing the rules read changed reuse the previous
+    result, so a daily 365-day scan re-evaluates rules mostly on Moon ingresses.
+    """
+
+    def __init__(self, engine: PredictionEngine, transits: Optional[TransitCalculator] = None):
+        self.engine = engine
+        self.transits = transits or TransitCalculator()
+
+    def scan(self, chart: ChartResponse, start: datetime, end: datetime,
+             step: timedelta = timedelta(days=1), systems: Optional[List[str]] = None) -> Dict[str, Any]:
+        if step <= timedelta(0):
+            raise ValueError("step must be positive")
+        if end <= start:
+            raise ValueError("end must be after start")
+        if (end - start) / step > MAX_STEPS:
+            raise ValueError(f"Scan exceeds {MAX_STEPS} steps; use a coarser step")
+
+        sets = self.engine.rule_sets(systems)
+        required = frozenset().union(*(rs.required_signals for rs in sets))
+        reads_aspects = "transit.by_planet" in required
+        birth = chart.astronomy.utc_datetime.replace(tzinfo=None)
+        tree = DashaTree(chart.vedic.moon_longitude, birth)
+        ctx = SignalContext(chart.vedic)
+
+        antar: Optional[DashaNode] = None
+        transit_key: Optional[Tuple] = None
+        open_windows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        windows: List[PredictionWindow] = []
+        steps = evaluations = 0
+
+        t = start
+        while t < end:
+            steps += 1
+            changed = False
+            if antar is None or not antar.contains(t):
+                chain = tree.active(t, "Antar")
+                antar = chain[-1] if chain else None
+                ctx.update(dashas=[node.to_period(t) for node in chain])
+                changed = True
+            transits = self.transits.overlay(chart, self.transits.snapshot_uncached(t))
+            key = self._transit_key(transits, reads_aspects)
+            if key != transit_key:
+                transit_key = key
+                ctx.update(transits=transits)
+                changed = True
+
+            if changed:
+                evaluations += 1
+                signals = ctx.tree(required)
+                fired: Dict[Tuple[str, str], Tuple[CompiledRule, List[str], float]] = {}
+                for rs in sets:
+                    for compiled in rs.index.candidates(signals):
+                        hit = compiled.match(signals)
+                        if hit is not None:
+                            fired[(rs.name, compiled.id)] = (compiled, hit[0], hit[1])
+                for k in [k for k in open_windows if k not in fired]:
+                    windows.append(self._close(open_windows.pop(k), t))
+                for k, (compiled, why, conf) in fired.items():
+                    window = open_windows.get(k)
+                    if window is None:
+                        open_windows[k] = {"rule_set": k[0], "rule": compiled.rule, "start": t,
+                                           "confidence": conf, "triggers": why}
+                    elif conf > window["confidence"]:
+                        window["confidence"] = conf
+            t += step
+
+        for window in open_windows.values():
+            windows.append(self._close(window, end))
+        windows.sort(key=lambda w: (w.start, w.rule_set, w.rule_id))
+        return {
+            "windows": windows,
+            "steps": steps,
+            "evaluations": evaluations,
+            "rule_versions": {rs.name: rs.version for rs in sets},
+        }
+
+    @staticmethod
+    def _transit_key(transits: List[Transit], reads_aspects: bool) -> Tuple:
+        """The parts of the overlay that rules can observe (houses follow from sign)."""
+        if reads_aspects:
+            return tuple((t.planet, t.current_sign, tuple(t.aspects_natal)) for t in transits)
+        return tuple((t.planet, t.current_sign) for t in transits)
+
+    @staticmethod
+    def _close(window: Dict[str, Any], end: datetime) -> PredictionWindow:
+        rule = window["rule"]
+        return PredictionWindow(
+            rule_id=rule["id"],
+            rule_set=window["rule_set"],
+            domain=rule.get("domain", ""),
+            headline=rule.get("headline", ""),
+            start=window["start"],
+            end=end,
+            confidence=window["confidence"],
+            triggers=window["triggers"],
+        )
@@ -3,41 +3,87 @@ Prediction Engine with Rule DSL
 Generates predictions based on chart, dashas, and transits
 """
 
-from typing import List, Dict, Any, Tuple
-from datetime import datetime, timedelta
-import json
+from typing import List, Dict, Any, Tuple, Optional
+from datetime import timedelta
 from pathlib import Path
 
 from .models import (
     ChartResponse, DashaPeriod, Transit,
     Prediction, PredictionEvidence
 )
-from .signals import compute_signals
+from .signals import SignalContext, compute_signals
+from .rule_sets import RULES_DIR, RuleSet, RuleSetManager
+from .rule_batch import BatchResult, evaluate_batch
+from .prediction_cache import PredictionCache, prediction_key
+from .metrics import span, timed
 
 
 class PredictionEngine:
     """Generate predictions using a data-driven rules DSL over computed signals."""
 
-    def __init__(self):
-        self.rules = self._load_rules()
-
-    def _load_rules(self) -> List[Dict[str, Any]]:
-        rules_path = Path(__file__).parent / "rules" / "vedic.json"
-        if rules_path.exists():
-            return json.loads(rules_path.read_text(encoding="utf-8"))
-        # Fallback: minimal starter set
-        return []
-
-    def generate(self, chart: ChartResponse, dashas: List[DashaPeriod], transits: List[Transit]) -> Dict[str, List[Prediction]]:
-        signals = compute_signals(chart, dashas, transits)
+    def __init__(self, rules_path: Optional[Path] = None, rule_sets: Optional[RuleSetManager] = None,
+                 cache: Optional[PredictionCache] = None):
+        """Serve the hot-reloaded sets of a RuleSetManager, or one fixed rules file
+        (default: vedic.json) when no manager is given. With a cache, repeat
+        requests for the same chart, dashas, transit signals and rules reuse the
+        previous result."""
+        self.manager = rule_sets
+        self.cache = cache
+        self._static: Optional[RuleSet] = None
+        if rule_sets is None:
+            self._static = RuleSet.load(rules_path or RULES_DIR / "vedic.json")
+        elif cache is not None:
+            rule_sets.subscribe(cache.invalidate_rule_set)
+
+    def rule_sets(self, systems: Optional[List[str]] = None) -> List[RuleSet]:
+        """Current rule sets to evaluate, by name (all loaded sets by default)."""
+        current = self.manager.snapshot() if self.manager else {self._static.name: self._static}
+        if systems is None:
+            return [current[name] for name in sorted(current)]
+        missing = [name for name in systems if name not in current]
+        if missing:
+            raise ValueError(f"Unknown rule set: {', '.join(missing)}")
+        return [current[name] for name in systems]
+
+    @property
+    def rules(self) -> List[Dict[str, Any]]:
+        return [rule for rs in self.rule_sets() for rule in rs.rules]
+
+    def required_signals(self, systems: Optional[List[str]] = None) -> frozenset:
+        """Signals the selected rule sets read (for building batch signal trees)."""
+        return frozenset().union(*(rs.required_signals for rs in self.rule_sets(systems)))
+
+    def evaluate_batch(self, trees: List[Dict[str, Any]], systems: Optional[List[str]] = None,
+                       rule_ids: Optional[List[str]] = None) -> BatchResult:
+        """Firing matrix and confidences for many charts' signal trees at once."""
+        return evaluate_batch(self.rule_sets(systems), trees, rule_ids)
+
+    @timed("predictions.generate")
+    def generate(self, chart: ChartResponse, dashas: List[DashaPeriod], transits: List[Transit],
+                 context: Optional[SignalContext] = None,
+                 systems: Optional[List[str]] = None) -> Dict[str, Any]:
+        # Pin the rule sets once so a concurrent reload cannot mix versions mid-request
+        sets = self.rule_sets(systems)
+        versions = {rs.name: rs.version for rs in sets}
+        key = prediction_key(chart, dashas, transits, sets)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return {**cached, "rule_versions": versions}
+
+        required = frozenset().union(*(rs.required_signals for rs in sets))
+        signals = compute_signals(chart, dashas, transits, context, only=required)
         buckets = {"now": [], "next_90_days": [], "next_12_months": []}
 
-        for rule in self.rules:
-            ok, why, tf, conf = self._evaluate(rule, signals)
-            if not ok:
-                continue
-            pred = self._to_prediction(rule, why, tf, conf, signals)
-            buckets[tf].append(pred)
+        with span("rules.evaluate"):
+            for rs in sets:
+                for compiled in rs.index.candidates(signals):
+                    hit = compiled.match(signals)
+                    if hit is None:
+                        continue
+                    why, conf = hit
+                    pred = self._to_prediction(compiled.rule, why, compiled.timeframe, conf, signals, key)
+                    buckets[compiled.timeframe].append(pred)
 
         # Enforce 6–10 predictions per timeframe with domain spread and sort by confidence
         for tf in buckets:
@@ -49,10 +95,20 @@ class PredictionEngine:
         for tf, preds in buckets.items():
             summaries[tf] = self._summarize(preds)
 
-        return {"predictions": buckets, "summary": summaries}
+        result = {
+            "predictions": buckets,
+            "summary": summaries,
+            "rule_versions": versions,
+        }
+        if self.cache is not None:
+            self.cache.put(key, versions, result)
+        return result
 
     def _evaluate(self, rule: Dict[str, Any], signals: Dict[str, Any]) -> Tuple[bool, List[str], str, float]:
-        """Evaluate rule over signals. Returns (ok, why_lines, timeframe, confidence)."""
+        """Evaluate rule over signals. Returns (ok, why_lines, timeframe, confidence).
+
+        Reference interpreter for the DSL; generate() runs the compiled rules.
+        """
         cond = rule.get("conditions", {})
         why: List[str] = []
         ok_any = True
@@ -115,13 +171,15 @@ class PredictionEngine:
         tf = rule.get("timeframe", "next_12_months")
         return True, why, tf, conf
 
-    def _to_prediction(self, rule: Dict[str, Any], why: List[str], timeframe: str, confidence: float, signals: Dict[str, Any]) -> Prediction:
+    def _to_prediction(self, rule: Dict[str, Any], why: List[str], timeframe: str, confidence: float,
+                       signals: Dict[str, Any], key: str) -> Prediction:
         # Genericness check and enrich with triggers
         what = self._genericness_filter(rule.get("what", []), signals)
         do = self._genericness_filter(rule.get("do", []), signals)
         dont = self._genericness_filter(rule.get("dont", []), signals)
         return Prediction(
-            id=f"pred_{rule['id']}_{datetime.now().timestamp()}",
+            # Same inputs and rules give the same ID (see prediction_key)
+            id=f"pred_{rule['id']}_{key[:12]}",
             domain=rule['domain'],
             system=rule.get('system', 'vedic'),
             tone=rule.get('tone', 'neutral'),
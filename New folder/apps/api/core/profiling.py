@@ -0,0 +1,353 @@
+"""
+On-demand CPU Profiling
+Captures profiles of live requests without a restart
+
+A request is profiled when it carries X-Profile (with a valid admin token), or
+when it falls in a schedule armed through the admin endpoints: a percentage of
+requests to one route for N seconds. Two modes:
+
+    sample    stack samples of the handling thread, saved as collapsed stacks
+              (flamegraph.pl / speedscope input)
+    cprofile  deterministic cProfile, saved as a pstats file
+
+Async endpoints run on the event loop thread, so a capture also sees work from
+requests interleaved with the profiled one. Work the request hands to a worker
+thread through `profiled` is captured too: sampled alongside the loop thread,
+or under its own cProfile merged into the capture. Only one request per worker
+is profiled at a time. Schedules are per worker process.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from .metrics import RouteLabels
+
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "astro-profiles")))
+# Captures kept on disk per worker directory; older ones are deleted
+PROFILE_MAX_CAPTURES = int(os.getenv("PROFILE_MAX_CAPTURES", "200"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+# Longest schedule the admin endpoint accepts
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "600"))
+
+MODES = ("sample", "cprofile")
+EXTENSIONS = {"sample": ".collapsed", "cprofile": ".pstats"}
+
+
+class StackSampler:
+    """Samples one thread's Python stack, plus any followed threads, from a background thread.
+
+    Counts are keyed by collapsed stack: "file:function;file:function", root
+    first. The interval is a lower bound; samples also wait for the GIL.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL_MS / 1000):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._followed: Dict[int, int] = {}  # thread id -> nesting
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def follow(self, thread_id: int) -> None:
+        with self._lock:
+            self._followed[thread_id] = self._followed.get(thread_id, 0) + 1
+
+    def unfollow(self, thread_id: int) -> None:
+        with self._lock:
+            if self._followed.get(thread_id, 0) > 1:
+                self._followed[thread_id] -= 1
+            else:
+                self._followed.pop(thread_id, None)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = [self.thread_id, *self._followed]
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if names:
+                    self.stacks[";".join(reversed(names))] += 1
+
+
+T = TypeVar("T")
+
+
+class _Offloaded:
+    """Worker threads joining the capture of the request that handed them work."""
+
+    def __init__(self, sampler: Optional[StackSampler] = None):
+        self.sampler = sampler
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable[..., T], args, kwargs) -> T:
+        if self.sampler is not None:
+            thread_id = threading.get_ident()
+            self.sampler.follow(thread_id)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.sampler.unfollow(thread_id)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                self.profiles.append(profile)
+
+
+# Capture of the request being handled; None when it is not profiled
+_offloaded: ContextVar[Optional[_Offloaded]] = ContextVar("profile_offloaded", default=None)
+
+
+def profiled(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Call fn, as part of the current request's capture if it is profiled.
+
+    For work run in a worker thread (run_in_threadpool copies the request's
+    context into it), which the capture would otherwise not see.
+    """
+    offloaded = _offloaded.get()
+    if offloaded is None:
+        return fn(*args, **kwargs)
+    return offloaded.run(fn, args, kwargs)
+
+
+@dataclass
+class Schedule:
+    route: str
+    percent: float
+    mode: str
+    until: float  # time.time()
+    profiled: int = 0
+
+    def active(self, now: float) -> bool:
+        return now < self.until
+
+
+@dataclass
+class Capture:
+    id: str
+    mode: str
+    method: str
+    path: str
+    route: str
+    trigger: str  # "header" or "schedule"
+    created: str
+    duration_ms: float = 0.0
+    status: int = 0
+    samples: int = 0
+    file: str = ""
+
+
+class CaptureStore:
+    """Capture files plus a JSON sidecar per capture, newest PROFILE_MAX_CAPTURES kept."""
+
+    def __init__(self, directory: Path = PROFILE_DIR, max_captures: int = PROFILE_MAX_CAPTURES):
+        # One subdirectory per worker so pruning never races another process
+        self.directory = Path(directory) / f"worker-{os.getpid()}"
+        self.max_captures = max_captures
+        self._lock = threading.Lock()
+
+    def save(self, capture: Capture, profile: Any) -> Capture:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{capture.id}{EXTENSIONS[capture.mode]}"
+        if capture.mode == "cprofile":
+            profile.dump_stats(str(path))
+        else:
+            path.write_text("".join(f"{stack} {n}\n" for stack, n in sorted(profile.items())), encoding="utf-8")
+        capture.file = path.name
+        (self.directory / f"{capture.id}.json").write_text(json.dumps(asdict(capture)), encoding="utf-8")
+        self._prune()
+        return capture
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not self.directory.is_dir():
+            return []
+        found = []
+        for meta in self.directory.glob("*.json"):
+            try:
+                found.append((meta.stat().st_mtime_ns, json.loads(meta.read_text(encoding="utf-8"))))
+            except (OSError, ValueError):
+                continue
+        return [capture for _, capture in sorted(found, key=lambda x: x[0], reverse=True)]
+
+    def path(self, capture_id: str) -> Optional[Path]:
+        """Capture file for an id from list(); None for unknown or malformed ids."""
+        if not capture_id.isalnum():
+            return None
+        for ext in EXTENSIONS.values():
+            path = self.directory / f"{capture_id}{ext}"
+            if path.is_file():
+                return path
+        return None
+
+    def _prune(self) -> None:
+        with self._lock:
+            captures = self.list()
+            for old in captures[self.max_captures:]:
+                for name in (old["file"], f"{old['id']}.json"):
+                    try:
+                        (self.directory / name).unlink()
+                    except OSError:
+                        pass
+
+
+class Profiler:
+    """Decides which requests to profile and runs the capture."""
+
+    def __init__(self, store: Optional[CaptureStore] = None):
+        self.store = store or CaptureStore()
+        self.schedules: Dict[str, Schedule] = {}  # route -> schedule
+        self._busy = threading.Lock()
+        self.skipped_busy = 0
+
+    def arm(self, route: str, percent: float, seconds: float, mode: str = "sample") -> Schedule:
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if not 0 < percent <= 100:
+            raise ValueError("percent must be in (0, 100]")
+        if not 0 < seconds <= PROFILE_MAX_SECONDS:
+            raise ValueError(f"seconds must be in (0, {PROFILE_MAX_SECONDS}]")
+        schedule = Schedule(route=route, percent=percent, mode=mode, until=time.time() + seconds)
+        self.schedules = {**self.schedules, route: schedule}
+        return schedule
+
+    def disarm(self, route: Optional[str] = None) -> None:
+        self.schedules = {} if route is None else {r: s for r, s in self.schedules.items() if r != route}
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "schedules": [
+                {**asdict(s), "remaining_s": round(s.until - now, 1)}
+                for s in self.schedules.values() if s.active(now)
+            ],
+            "skipped_busy": self.skipped_busy,
+            "directory": str(self.store.directory),
+        }
+
+    def scheduled_mode(self, route: str) -> Optional[str]:
+        schedule = self.schedules.get(route)
+        if schedule is None:
+            return None
+        if not schedule.active(time.time()):
+            self.disarm(route)
+            return None
+        if random.random() * 100 >= schedule.percent:
+            return None
+        schedule.profiled += 1
+        return schedule.mode
+
+    async def capture(self, app, scope, receive, send, mode: str, route: str, trigger: str) -> None:
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            await app(scope, receive, send)
+            return
+        status = 0
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        capture = Capture(
+            id=uuid.uuid4().hex[:16], mode=mode, method=scope["method"], path=scope["path"], route=route,
+            trigger=trigger, created=time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+        )
+        t0 = time.perf_counter()
+        try:
+            if mode == "cprofile":
+                offloaded = _Offloaded()
+                token = _offloaded.set(offloaded)
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await app(scope, receive, send_status)
+                finally:
+                    profile.disable()
+                    _offloaded.reset(token)
+                if offloaded.profiles:
+                    profile = pstats.Stats(profile)
+                    profile.add(*offloaded.profiles)
+            else:
+                sampler = StackSampler(threading.get_ident())
+                token = _offloaded.set(_Offloaded(sampler))
+                sampler.start()
+                try:
+                    await app(scope, receive, send_status)
+                finally:
+                    _offloaded.reset(token)
+                    profile = sampler.stop()
+                    capture.samples = sum(profile.values())
+            capture.duration_ms = round((time.perf_counter() - t0) * 1000, 3)
+            capture.status = status
+            self.store.save(capture, profile)
+        finally:
+            self._busy.release()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware handing selected requests to a Profiler.
+
+    `authorized(token)` checks the X-Admin-Token header of X-Profile requests;
+    without a valid token the header is ignored. Requests pass straight through
+    when there is no X-Profile header and no schedule is armed.
+    """
+
+    def __init__(self, app, profiler: Profiler, authorized, router=None):
+        self.app = app
+        self.profiler = profiler
+        self.authorized = authorized
+        self._route = RouteLabels(router)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = trigger = None
+        requested = token = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                requested = value.decode("latin-1").strip().lower() or "sample"
+            elif name == b"x-admin-token":
+                token = value.decode("latin-1")
+        if requested in MODES and self.authorized(token):
+            mode, trigger = requested, "header"
+        elif self.profiler.schedules:
+            mode, trigger = self.profiler.scheduled_mode(self._route(scope)), "schedule"
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        await self.profiler.capture(self.app, scope, receive, send, mode, self._route(scope), trigger)
@@ -0,0 +1,172 @@
+"""
+Columnar Batch Rule Evaluation
+Evaluates compiled rules over many charts at once for cohort analysis
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .rule_compiler import MISSING, CompiledAtom, CompiledRule
+from .rule_sets import RuleSet
+
+
+def _vocab_key(value: Any) -> Any:
+    """Hashable stand-in for a signal value (lists such as graha drishti houses)."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return (type(value).__name__, repr(value))
+
+
+class SignalColumns:
+    """One factorized column per signal path across N signal trees.
+
+    Each column is an int32 code array (-1 = missing) plus the distinct values
+    behind the codes, so an atom is tested once per distinct value and the
+    result broadcast to every chart with a single gather.
+    """
+
+    def __init__(self, trees: Sequence[Dict[str, Any]], paths: Iterable[Tuple[str, Tuple[str, ...]]]):
+        self.n = len(trees)
+        self.codes: Dict[str, np.ndarray] = {}
+        self.values: Dict[str, List[Any]] = {}
+        # Resolved columns by key prefix, shared by sibling paths
+        self._prefixes: Dict[Tuple[str, ...], List[Any]] = {(): list(trees)}
+        for path, keys in paths:
+            if path not in self.codes:
+                self._factorize(path, keys, trees)
+
+    def _factorize(self, path: str, keys: Tuple[str, ...], trees: Sequence[Dict[str, Any]]) -> None:
+        try:
+            self._factorize_dense(path, keys, trees)
+        except (KeyError, TypeError, IndexError):
+            # Some tree lacks the path or holds an unhashable value
+            self._factorize_sparse(path, keys, trees)
+
+    def _factorize_dense(self, path: str, keys: Tuple[str, ...], trees: Sequence[Dict[str, Any]]) -> None:
+        """Fast path: every tree has the path and the values are hashable."""
+        col = self._resolve(keys)
+        types = set(map(type, col))
+        if col and (types <= {int, float, bool} or types == {str}):
+            # Homogeneous scalars: let numpy factorize. Mixed int/float/bool
+            # values compare and hash equal, so one representative per value is exact.
+            uniq, codes = np.unique(np.array(col), return_inverse=True)
+            self.codes[path] = codes.astype(np.int32)
+            self.values[path] = uniq.tolist()
+            return
+        vocab: Dict[Any, int] = {}
+        codes = np.fromiter((vocab.setdefault(v, len(vocab)) for v in col), dtype=np.int32, count=self.n)
+        self.codes[path] = codes
+        # Dict keys are the first occurrence of each value, in code order
+        self.values[path] = list(vocab)
+
+    def _resolve(self, keys: Tuple[str, ...]) -> List[Any]:
+        """Column of values at keys across trees (raises when any tree lacks them)."""
+        col = self._prefixes.get(keys)
+        if col is None:
+            parent = self._resolve(keys[:-1])
+            key = keys[-1]
+            col = self._prefixes[keys] = [node[key] for node in parent]
+        return col
+
+    def _factorize_sparse(self, path: str, keys: Tuple[str, ...], trees: Sequence[Dict[str, Any]]) -> None:
+        vocab: Dict[Any, int] = {}
+        values: List[Any] = []
+        codes = np.empty(self.n, dtype=np.int32)
+        for row, tree in enumerate(trees):
+            cur: Any = tree
+            for key in keys:
+                if isinstance(cur, dict) and key in cur:
+                    cur = cur[key]
+                else:
+                    cur = MISSING
+                    break
+            if cur is MISSING:
+                codes[row] = -1
+                continue
+            k = _vocab_key(cur)
+            code = vocab.get(k)
+            if code is None:
+                code = vocab[k] = len(values)
+                values.append(cur)
+            codes[row] = code
+        self.codes[path] = codes
+        self.values[path] = values
+
+    def mask(self, atom: CompiledAtom) -> np.ndarray:
+        """Boolean mask of charts where the atom holds (missing signals never match)."""
+        codes = self.codes[atom.path]
+        table = np.fromiter((atom.test(v) for v in self.values[atom.path]), dtype=bool,
+                            count=len(self.values[atom.path]))
+        # Append False for the -1 (missing) code
+        return np.append(table, False)[codes]
+
+
+@dataclass
+class BatchResult:
+    """N charts x R rules firing matrix with the confidence each firing rule gets"""
+    rule_ids: List[str]
+    fired: np.ndarray  # (N, R) bool
+    confidence: np.ndarray  # (N, R) float, 0.0 where not fired
+
+    def column(self, rule_id: str) -> int:
+        return self.rule_ids.index(rule_id)
+
+    def rates(self) -> Dict[str, float]:
+        """Share of charts on which each rule fires."""
+        if not len(self.fired):
+            return {rid: 0.0 for rid in self.rule_ids}
+        return dict(zip(self.rule_ids, self.fired.mean(axis=0).tolist()))
+
+
+def _atom_key(atom: CompiledAtom) -> Tuple[str, str, str]:
+    return atom.path, atom.op, repr(atom.value)
+
+
+def evaluate_batch(rule_sets: Sequence[RuleSet], trees: Sequence[Dict[str, Any]],
+                   rule_ids: Optional[Iterable[str]] = None) -> BatchResult:
+    """Evaluate compiled rules over many signal trees (see compute_signals).
+
+    Gives exactly the rules and confidences CompiledRule.match gives per chart,
+    before generate()'s per-timeframe top-10 cut.
+    """
+    wanted = set(rule_ids) if rule_ids is not None else None
+    rules: List[CompiledRule] = [
+        c for rs in rule_sets for c in rs.compiled if wanted is None or c.id in wanted
+    ]
+    atoms = [a for c in rules for a in (*c.all_atoms, *c.any_atoms)]
+    columns = SignalColumns(trees, ((a.path, a.keys) for a in atoms))
+    n = len(trees)
+
+    # Identical atoms across rules share one mask
+    masks: Dict[Tuple[str, str, str], np.ndarray] = {}
+
+    def mask(atom: CompiledAtom) -> np.ndarray:
+        key = _atom_key(atom)
+        if key not in masks:
+            masks[key] = columns.mask(atom)
+        return masks[key]
+
+    # Filled rule-major (contiguous rows), returned as (N, R) views
+    fired = np.zeros((len(rules), n), dtype=bool)
+    confidence = np.zeros((len(rules), n), dtype=np.float64)
+    for j, rule in enumerate(rules):
+        if not rule.viable:
+            continue
+        ok = np.ones(n, dtype=bool)
+        for atom in rule.all_atoms:
+            ok &= mask(atom)
+        triggers = np.full(n, len(rule.all_atoms), dtype=np.int64)
+        if rule.any_atoms:
+            any_count = np.zeros(n, dtype=np.int64)
+            for atom in rule.any_atoms:
+                any_count += mask(atom)
+            ok &= any_count > 0
+            triggers += np.minimum(any_count, 2)  # only the first two are reported
+        ok &= triggers >= 2
+        fired[j] = ok
+        confidence[j] = np.where(ok, np.clip(rule.weight + 0.05 * triggers, 0.0, 1.0), 0.0)
+    return BatchResult(rule_ids=[r.id for r in rules], fired=fired.T, confidence=confidence.T)
@@ -0,0 +1,219 @@
+"""
+Rule Compiler
+Turns rule DSL dicts into precompiled predicates once, at load time
+"""
+
+import operator
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import defaultdict
+
+
+MISSING = object()
+
+OPS = ("eq", "ne", "in", "ge", "le")
+
+# Relative evaluation cost per op (lower runs first among equally selective atoms)
+OP_COST = {"eq": 1, "ne": 1, "in": 2, "ge": 3, "le": 3}
+
+DEFAULT_TIMEFRAME = "next_12_months"
+DEFAULT_WEIGHT = 0.6
+
+
+def _membership(values: List[Any]) -> Callable[[Any], bool]:
+    try:
+        members = frozenset(values)
+    except TypeError:
+        members = None
+    seq = tuple(values)
+
+    def test(cur: Any) -> bool:
+        if members is not None:
+            try:
+                return cur in members
+            except TypeError:  # unhashable signal value (e.g. a list)
+                pass
+        return cur in seq
+    return test
+
+
+def _bind(op: str, value: Any) -> Callable[[Any], bool]:
+    if op == "eq":
+        return lambda cur: cur == value
+    if op == "ne":
+        return lambda cur: cur != value
+    if op == "in":
+        return _membership(value)
+    bound = float(value)
+    cmp = operator.ge if op == "ge" else operator.le
+    return lambda cur: cmp(float(cur), bound)
+
+
+def _pass_rate(op: str, value: Any) -> float:
+    """Rough share of charts an atom lets through (houses and signs have 12 values)."""
+    if op == "eq":
+        return 0.5 if isinstance(value, bool) else 1 / 12
+    if op == "in":
+        return min(1.0, len(value) / 12)
+    if op == "ne":
+        return 11 / 12
+    return 0.5
+
+
+class CompiledAtom:
+    """One condition with its path pre-split and operator pre-bound"""
+
+    __slots__ = ("index", "path", "keys", "op", "value", "test", "why_format", "rank", "accepts")
+
+    def __init__(self, atom: Dict[str, Any], index: int):
+        op = atom.get("op", "eq")
+        if op not in OPS:
+            raise ValueError(f"Unknown op {op!r} for {atom.get('path')}")
+        self.index = index
+        self.path: str = atom["path"]
+        self.keys: Tuple[str, ...] = tuple(self.path.split("."))
+        self.op = op
+        self.value = atom.get("value")
+        self.test = _bind(op, self.value)
+        self.accepts = self._index_values()
+        self.why_format: str = atom.get("why_format", "{path} -> {cur}")
+        self.rank = (_pass_rate(op, self.value), OP_COST[op])
+
+    def _index_values(self) -> Optional[Tuple[Any, ...]]:
+        """Signal values this atom accepts, when it is an eq/in test over hashable values."""
+        values = (self.value,) if self.op == "eq" else tuple(self.value) if self.op == "in" else None
+        if values is None:
+            return None
+        try:
+            frozenset(values)
+        except TypeError:
+            return None
+        return values
+
+    def resolve(self, signals: Dict[str, Any]) -> Any:
+        cur: Any = signals
+        for key in self.keys:
+            if isinstance(cur, dict) and key in cur:
+                cur = cur[key]
+            else:
+                return MISSING
+        return cur
+
+    def why(self, cur: Any) -> str:
+        return self.why_format.format(path=self.path, cur=cur)
+
+
+class CompiledRule:
+    """A rule whose `all` atoms are ordered to short-circuit on the most selective first"""
+
+    __slots__ = ("rule", "id", "timeframe", "weight", "all_atoms", "any_atoms", "viable")
+
+    def __init__(self, rule: Dict[str, Any]):
+        cond = rule.get("conditions", {})
+        self.rule = rule
+        self.id = rule.get("id")
+        self.timeframe: str = rule.get("timeframe", DEFAULT_TIMEFRAME)
+        self.weight = float(rule.get("weight", DEFAULT_WEIGHT))
+        all_atoms = [CompiledAtom(a, i) for i, a in enumerate(cond.get("all", []))]
+        self.all_atoms = sorted(all_atoms, key=lambda a: a.rank)
+        self.any_atoms = [CompiledAtom(a, i) for i, a in enumerate(cond.get("any", []))]
+        # At least 2 WHY lines are required; some rules can never produce them
+        self.viable = len(all_atoms) + min(2, len(self.any_atoms)) >= 2
+
+    def match(self, signals: Dict[str, Any]) -> Optional[Tuple[List[str], float]]:
+        """(why_lines, confidence) when the rule fires, else None."""
+        if not self.viable:
+            return None
+        hits: List[Tuple[CompiledAtom, Any]] = []
+        for atom in self.all_atoms:
+            cur = atom.resolve(signals)
+            if cur is MISSING or not atom.test(cur):
+                return None
+            hits.append((atom, cur))
+        # WHY lines keep the authored order of the `all` atoms
+        hits.sort(key=lambda h: h[0].index)
+
+        if self.any_atoms:
+            any_hits: List[Tuple[CompiledAtom, Any]] = []
+            for atom in self.any_atoms:
+                cur = atom.resolve(signals)
+                if cur is not MISSING and atom.test(cur):
+                    any_hits.append((atom, cur))
+                    if len(any_hits) == 2:  # only the first two are reported
+                        break
+            if not any_hits:
+                return None
+            hits.extend(any_hits)
+
+        if len(hits) < 2:
+            return None
+        why = [atom.why(cur) for atom, cur in hits]
+        conf = min(1.0, max(0.0, self.weight + 0.05 * len(why)))
+        return why, conf
+
+
+def compile_rules(rules: List[Dict[str, Any]]) -> List[CompiledRule]:
+    """Compile a rule set; raises ValueError naming the first invalid rule."""
+    compiled: List[CompiledRule] = []
+    for rule in rules:
+        try:
+            compiled.append(CompiledRule(rule))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Rule {rule.get('id', '?')}: {e}") from None
+    return compiled
+
+
+class RuleIndex:
+    """Discrimination index from (signal path, value) to the rules that accept it.
+
+    Every eq/in atom in a rule's `all` group is indexed. For a chart, each indexed
+    path is resolved once and its value looked up; a rule becomes a candidate
+    only when all of its indexed atoms were hit (an alpha-network filter), so the
+    work per chart grows with the number of matching atoms, not the rule count.
+    Rules without indexable atoms are always candidates.
+    """
+
+    def __init__(self, compiled: List[CompiledRule]):
+        self.rules = compiled
+        self.paths: Dict[str, Tuple[str, ...]] = {}
+        self.postings: Dict[str, Dict[Any, List[int]]] = defaultdict(lambda: defaultdict(list))
+        self.required: List[int] = []
+        self.unindexed: List[int] = []
+        for pos, rule in enumerate(compiled):
+            indexed = [a for a in rule.all_atoms if a.accepts is not None] if rule.viable else []
+            self.required.append(len(indexed))
+            if not rule.viable:
+                continue
+            if not indexed:
+                self.unindexed.append(pos)
+            for atom in indexed:
+                self.paths.setdefault(atom.path, atom.keys)
+                for value in set(atom.accepts):
+                    self.postings[atom.path][value].append(pos)
+        # Freeze into plain dicts so lookups never insert
+        self.postings = {path: dict(values) for path, values in self.postings.items()}
+
+    def candidates(self, signals: Dict[str, Any]) -> List[CompiledRule]:
+        """Rules, in load order, whose indexed atoms all match the chart's signal values."""
+        hits: Dict[int, int] = defaultdict(int)
+        for path, keys in self.paths.items():
+            cur: Any = signals
+            for key in keys:
+                if isinstance(cur, dict) and key in cur:
+                    cur = cur[key]
+                else:
+                    cur = MISSING
+                    break
+            if cur is MISSING:
+                continue
+            try:
+                matched = self.postings[path].get(cur)
+            except TypeError:  # unhashable signal value
+                continue
+            if matched:
+                for pos in matched:
+                    hits[pos] += 1
+        required = self.required
+        positions = [pos for pos, n in hits.items() if n == required[pos]]
+        positions.extend(self.unindexed)
+        positions.sort()
+        return [self.rules[pos] for pos in positions]
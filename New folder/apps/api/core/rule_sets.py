@@ -0,0 +1,234 @@
+"""
+Rule Set Manager
+Loads every rule file in the rules directory (vedic.json, western.json, ...),
+reloads edited files in the background and swaps them in atomically
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .rule_compiler import CompiledRule, RuleIndex, compile_rules
+from .signals import required_signals
+
+
+logger = logging.getLogger(__name__)
+
+RULES_DIR = Path(os.getenv("RULES_DIR", str(Path(__file__).parent / "rules")))
+# Seconds between rules directory scans; 0 disables background reloading
+RULES_RELOAD_SECONDS = float(os.getenv("RULES_RELOAD_SECONDS", "5"))
+
+
+def rule_paths(rule: Dict[str, Any]) -> List[str]:
+    cond = rule.get("conditions", {})
+    return [atom["path"] for group in ("all", "any") for atom in cond.get(group, [])]
+
+
+def analyze_rules(rules: List[Dict[str, Any]], source: str) -> Set[str]:
+    """Collect the signals referenced by rule conditions; reject unknown paths at load time."""
+    needed: Set[str] = set()
+    for rule in rules:
+        try:
+            needed |= required_signals(rule_paths(rule))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Rule {rule.get('id', '?')} in {source}: {e}") from None
+    return needed
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """One validated, compiled rule file at a given version"""
+    name: str
+    path: Path
+    version: int
+    digest: str
+    stamp: Tuple[int, int]  # (mtime_ns, size) of the file when read
+    rules: List[Dict[str, Any]]
+    compiled: List[CompiledRule]
+    index: RuleIndex
+    required_signals: FrozenSet[str]
+    loaded_at: datetime
+    reads_dasha_dates: bool = False  # some rule reads a dasha period's start/end
+
+    @classmethod
+    def load(cls, path: Path, version: int = 1) -> "RuleSet":
+        """Read, validate and compile a rule file. A missing file is an empty set."""
+        if not path.exists():
+            return cls.from_bytes(path, b"[]", (0, 0), version)
+        return cls.from_bytes(path, path.read_bytes(), _stamp(path), version)
+
+    @classmethod
+    def from_bytes(cls, path: Path, raw: bytes, stamp: Tuple[int, int], version: int) -> "RuleSet":
+        try:
+            rules = json.loads(raw.decode("utf-8"))
+        except ValueError as e:
+            raise ValueError(f"{path.name}: invalid JSON: {e}") from None
+        if not isinstance(rules, list):
+            raise ValueError(f"{path.name}: expected a list of rules")
+        needed = analyze_rules(rules, path.name)
+        try:
+            compiled = compile_rules(rules)
+        except ValueError as e:
+            raise ValueError(f"{path.name}: {e}") from None
+        return cls(
+            name=path.stem,
+            path=path,
+            version=version,
+            digest=_digest(raw),
+            stamp=stamp,
+            rules=rules,
+            compiled=compiled,
+            index=RuleIndex(compiled),
+            required_signals=frozenset(needed),
+            loaded_at=datetime.utcnow(),
+            reads_dasha_dates=any(
+                atom.keys[0] == "dasha" and atom.keys[2:3] in (("start",), ("end",))
+                for rule in compiled for atom in (*rule.all_atoms, *rule.any_atoms)
+            ),
+        )
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "digest": self.digest,
+            "rules": len(self.rules),
+            "loaded_at": self.loaded_at.isoformat(),
+        }
+
+
+SwapListener = Callable[[str, Optional[RuleSet], Optional[RuleSet]], None]
+
+
+class RuleSetManager:
+    """Current rule sets by name, hot-reloaded from a directory of JSON files.
+
+    Readers take snapshot() once per request and never see a half-loaded set:
+    new files are parsed, validated and compiled off to the side, then the whole
+    mapping is replaced in a single reference assignment. At construction a file
+    that fails to load raises, so the API never starts without its rules; on a
+    later reload it is reported in `errors` and the previous version keeps serving.
+    Versions come from one counter, so they increase across all sets.
+    """
+
+    def __init__(self, rules_dir: Path = RULES_DIR, poll_seconds: float = RULES_RELOAD_SECONDS):
+        self.rules_dir = Path(rules_dir)
+        self.poll_seconds = poll_seconds
+        self.generation = 0
+        self.errors: Dict[str, str] = {}
+        self._failed: Dict[str, Tuple[int, int]] = {}  # name -> stamp of the rejected file
+        self._sets: Dict[str, RuleSet] = {}
+        self._listeners: List[SwapListener] = []
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reload(strict=True)
+
+    def snapshot(self) -> Dict[str, RuleSet]:
+        """The current name -> RuleSet mapping (treat as read-only)."""
+        return self._sets
+
+    def get(self, name: str) -> RuleSet:
+        try:
+            return self._sets[name]
+        except KeyError:
+            raise ValueError(f"Unknown rule set: {name}") from None
+
+    def versions(self) -> Dict[str, int]:
+        return {name: rs.version for name, rs in self._sets.items()}
+
+    def subscribe(self, listener: SwapListener) -> None:
+        """Call listener(name, old, new) after each swap (new is None when a file is removed)."""
+        self._listeners.append(listener)
+
+    def reload(self, strict: bool = False) -> List[str]:
+        """Rescan the directory and swap in changed files. Returns the names swapped.
+
+        With strict, a file that fails to load raises ValueError instead of
+        being reported in `errors`.
+        """
+        with self._reload_lock:
+            current = self._sets
+            updated = dict(current)
+            changed: List[str] = []
+            seen = set()
+            for path in sorted(self.rules_dir.glob("*.json")):
+                name = path.stem
+                seen.add(name)
+                try:
+                    stamp = _stamp(path)
+                except OSError:  # removed between glob and stat
+                    continue
+                try:
+                    old = current.get(name)
+                    if (old is not None and old.stamp == stamp) or self._failed.get(name) == stamp:
+                        continue
+                    raw = path.read_bytes()
+                    if old is not None and old.digest == _digest(raw):
+                        updated[name] = replace(old, stamp=stamp)  # touched, not edited
+                        continue
+                    new = RuleSet.from_bytes(path, raw, stamp, self.generation + 1)
+                except (OSError, ValueError) as e:
+                    if strict:
+                        raise ValueError(f"Rule set {name} not loaded: {e}") from e
+                    self.errors[name] = str(e)
+                    self._failed[name] = stamp
+                    logger.warning("Rule set %s not loaded: %s", name, e)
+                    continue
+                self.generation += 1
+                self.errors.pop(name, None)
+                self._failed.pop(name, None)
+                updated[name] = new
+                changed.append(name)
+            for name in set(current) - seen:
+                del updated[name]
+                changed.append(name)
+            self._sets = updated
+        for name in changed:
+            for listener in self._listeners:
+                listener(name, current.get(name), updated.get(name))
+        return changed
+
+    def start(self) -> None:
+        """Poll the rules directory in a daemon thread."""
+        if self.poll_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="rule-set-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                swapped = self.reload()
+                if swapped:
+                    logger.info("Reloaded rule sets: %s", ", ".join(swapped))
+            except Exception:
+                logger.exception("Rule set reload failed")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "generation": self.generation,
+            "rule_sets": {name: rs.info() for name, rs in self._sets.items()},
+            "errors": dict(self.errors),
+        }
+
+
+def _stamp(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()[:16]
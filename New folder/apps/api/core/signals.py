@@ -1,13 +1,19 @@
 """
 Signal computation layer for deterministic, explainable features.
 Produces structured signals consumed by the rules engine.
+
+Signals are declared in a registry with their dependencies and evaluated lazily
+through a SignalContext, so each one is computed at most once per chart.
 """
 
-from typing import Dict, Any, List, Tuple
+import threading
+import time
+from typing import Dict, Any, List, Tuple, Callable, Optional, Iterable, Set
 from dataclasses import dataclass
 from math import fabs
 
 from .models import ChartResponse, VedicPlanetPosition, Transit, DashaPeriod
+from .metrics import timed
 
 
 BENEFICS = {"Jupiter", "Venus", "Mercury", "Waxing Moon"}
@@ -26,23 +32,206 @@ MOOLTRIKONA = {
     "Venus": "Libra", "Saturn": "Aquarius"
 }
 
+SIGNS = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+]
+SIGN_INDEX = {name: i for i, name in enumerate(SIGNS)}
+
+PLANET_NAMES = ("Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Rahu", "Ketu")
+COMBUST_PLANETS = ("Mercury", "Venus", "Mars", "Jupiter", "Saturn")
+YOGAS = ("Gajakesari", "BudhaAditya", "ChandraMangal", "RajaYoga", "DhanaYoga", "VipareetaRaja")
+DASHA_KEYS = ("lord", "placement", "dignity", "start", "end")
+PLACEMENT_KEYS = ("sign", "degree", "nakshatra", "pada", "house_from_lagna", "house_from_moon")
+
 
 def _sign_index(sign: str) -> int:
-    SIGNS = [
-        "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
-        "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
-    ]
-    return SIGNS.index(sign)
+    return SIGN_INDEX[sign]
 
 
 def _house_from(base_sign: str, target_sign: str) -> int:
     return ((_sign_index(target_sign) - _sign_index(base_sign)) % 12) + 1
 
 
-def compute_house_overlays(vedic: Any) -> Dict[str, Dict[str, int]]:
-    """Return planet houses from Lagna and from Moon."""
+# -------- Registry ---------
+
+@dataclass(frozen=True)
+class SignalSpec:
+    """A named signal, the signals it reads, and the chart input it needs."""
+    name: str
+    deps: Tuple[str, ...]
+    fn: Callable[["SignalContext"], Any]
+    requires: Optional[str] = None  # "dashas" / "transits": skipped when absent
+    public: bool = True  # part of the signals tree consumed by rules
+    # Allowed keys per level below the signal (None = any key); None = not checked
+    schema: Optional[Tuple[Optional[Tuple[str, ...]], ...]] = None
+
+
+SIGNALS: Dict[str, SignalSpec] = {}
+
+
+def signal(name: str, deps: Tuple[str, ...] = (), requires: Optional[str] = None, public: bool = True,
+           schema: Optional[Tuple[Optional[Tuple[str, ...]], ...]] = None):
+    """Register a signal function under a dotted path (e.g. "natal.houses")."""
+    def register(fn: Callable[["SignalContext"], Any]):
+        for dep in deps:
+            if dep not in SIGNALS:
+                raise ValueError(f"Signal {name} depends on unregistered signal {dep}")
+        SIGNALS[name] = SignalSpec(name, tuple(deps), fn, requires, public, schema)
+        return fn
+    return register
+
+
+def resolve_signal_path(path: str) -> str:
+    """Registered signal that produces a rule path such as "natal.houses.Jupiter.from_lagna".
+
+    Raises ValueError when no public signal covers the path or the keys below
+    it fall outside the signal's schema.
+    """
+    parts = path.split(".")
+    for cut in range(len(parts), 0, -1):
+        name = ".".join(parts[:cut])
+        spec = SIGNALS.get(name)
+        if spec is None or not spec.public:
+            continue
+        rest = parts[cut:]
+        if spec.schema is not None:
+            if len(rest) > len(spec.schema):
+                raise ValueError(f"Unknown signal path {path}: {name} has no key {'.'.join(rest)}")
+            for key, allowed in zip(rest, spec.schema):
+                if allowed is not None and key not in allowed:
+                    raise ValueError(f"Unknown signal path {path}: {key} is not one of {', '.join(allowed)}")
+        return name
+    raise ValueError(f"Unknown signal path {path}")
+
+
+def required_signals(paths: Iterable[str]) -> Set[str]:
+    """Signals needed to answer the given rule paths (dependencies resolve on demand)."""
+    return {resolve_signal_path(p) for p in paths}
+
+
+class SignalStats:
+    """Running per-signal evaluation counts and time (seconds)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, List[float]] = {}  # name -> [count, total, max]
+
+    def record(self, name: str, elapsed: float) -> None:
+        with self._lock:
+            t = self._totals.setdefault(name, [0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += elapsed
+            if elapsed > t[2]:
+                t[2] = elapsed
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "count": int(count),
+                    "total_s": round(total, 6),
+                    "avg_s": round(total / count, 6) if count else 0.0,
+                    "max_s": round(peak, 6),
+                }
+                for name, (count, total, peak) in sorted(self._totals.items(), key=lambda x: -x[1][1])
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+signal_stats = SignalStats()
+
+
+class SignalContext:
+    """Per-chart memo of evaluated signals.
+
+    get(name) evaluates a signal and its dependencies once; later lookups from
+    other signals, the rules engine or dasha insights reuse the cached value.
+    """
+
+    def __init__(self, vedic: Any, dashas: Optional[List[DashaPeriod]] = None,
+                 transits: Optional[List[Transit]] = None, stats: Optional[SignalStats] = signal_stats):
+        self.vedic = vedic
+        self.dashas = dashas or []
+        self.transits = transits or []
+        self.stats = stats
+        self._values: Dict[str, Any] = {}
+
+    @classmethod
+    def for_chart(cls, chart: ChartResponse, dashas: Optional[List[DashaPeriod]] = None,
+                  transits: Optional[List[Transit]] = None) -> "SignalContext":
+        return cls(chart.vedic, dashas, transits)
+
+    def available(self, name: str) -> bool:
+        """Whether the chart input the signal needs was supplied."""
+        requires = SIGNALS[name].requires
+        return requires is None or bool(getattr(self, requires))
+
+    def update(self, dashas: Optional[List[DashaPeriod]] = None,
+               transits: Optional[List[Transit]] = None) -> Set[str]:
+        """Swap in new dashas and/or transits, dropping only the signals that depend
+        on them (natal signals stay cached). Returns the names invalidated."""
+        changed = set()
+        if dashas is not None:
+            self.dashas = dashas
+            changed.add("dashas")
+        if transits is not None:
+            self.transits = transits
+            changed.add("transits")
+        stale: Set[str] = set()
+        # Registration order is topological: dependencies are registered first
+        for name, spec in SIGNALS.items():
+            if spec.requires in changed or any(dep in stale for dep in spec.deps):
+                stale.add(name)
+                self._values.pop(name, None)
+        return stale
+
+    def get(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        spec = SIGNALS[name]
+        for dep in spec.deps:
+            self.get(dep)
+        t0 = time.perf_counter()
+        value = spec.fn(self)
+        if self.stats is not None:
+            self.stats.record(name, time.perf_counter() - t0)
+        self._values[name] = value
+        return value
+
+    def tree(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Nested signals dict ({"natal": {...}, "dasha": {...}, "transit": {...}}).
+
+        With names, only those signals (and their dependencies) are evaluated.
+        """
+        wanted = set(names) if names is not None else None
+        out: Dict[str, Any] = {"natal": {}, "dasha": {}, "transit": {}}
+        for name, spec in SIGNALS.items():
+            if not spec.public or not self.available(name):
+                continue
+            if wanted is not None and name not in wanted:
+                continue
+            group, key = name.split(".", 1)
+            out.setdefault(group, {})[key] = self.get(name)
+        return out
+
+
+# -------- Signals ---------
+
+@signal("planets", public=False)
+def _planets(ctx: SignalContext) -> Dict[str, VedicPlanetPosition]:
+    """Planets by name (replaces repeated next(...) scans of vedic.planets)."""
+    return {p.name: p for p in ctx.vedic.planets}
+
+
+@signal("natal.houses", deps=("planets",), schema=(PLANET_NAMES, ("from_lagna", "from_moon")))
+def _natal_houses(ctx: SignalContext) -> Dict[str, Dict[str, int]]:
+    vedic = ctx.vedic
     lagna_sign = vedic.ascendant.rashi
-    moon_sign = next(p for p in vedic.planets if p.name == "Moon").rashi
+    moon_sign = ctx.get("planets")["Moon"].rashi
     out: Dict[str, Dict[str, int]] = {}
     for p in vedic.planets:
         out[p.name] = {
@@ -52,9 +241,10 @@ def compute_house_overlays(vedic: Any) -> Dict[str, Dict[str, int]]:
     return out
 
 
-def compute_dignities(vedic: Any) -> Dict[str, str]:
+@signal("natal.dignity", schema=(PLANET_NAMES,))
+def _natal_dignity(ctx: SignalContext) -> Dict[str, str]:
     dignities: Dict[str, str] = {}
-    for p in vedic.planets:
+    for p in ctx.vedic.planets:
         if p.rashi == EXALTATION.get(p.name):
             dignities[p.name] = "Exalted"
         elif p.rashi == DEBILITATION.get(p.name):
@@ -68,11 +258,12 @@ def compute_dignities(vedic: Any) -> Dict[str, str]:
     return dignities
 
 
-def compute_combustion(vedic: Any) -> Dict[str, bool]:
+@signal("natal.combust", deps=("planets",), schema=(COMBUST_PLANETS,))
+def _natal_combust(ctx: SignalContext) -> Dict[str, bool]:
     thresholds = {"Mercury": 12.0, "Venus": 10.0, "Mars": 17.0, "Jupiter": 11.0, "Saturn": 15.0}
-    sun = next(p for p in vedic.planets if p.name == "Sun")
+    sun = ctx.get("planets")["Sun"]
     out: Dict[str, bool] = {}
-    for p in vedic.planets:
+    for p in ctx.vedic.planets:
         if p.name in thresholds:
             diff = fabs(p.longitude - sun.longitude)
             if diff > 180:
@@ -81,12 +272,12 @@ def compute_combustion(vedic: Any) -> Dict[str, bool]:
     return out
 
 
-def compute_graha_drishti(vedic: Any) -> Dict[str, List[int]]:
-    """Return special aspects by Mars/Jupiter/Saturn (houses from each)."""
-    lagna_sign = vedic.ascendant.rashi
-    houses = compute_house_overlays(vedic)
+@signal("natal.graha_drishti", deps=("natal.houses",), schema=(PLANET_NAMES, None))
+def _natal_graha_drishti(ctx: SignalContext) -> Dict[str, List[int]]:
+    """Special aspects by Mars/Jupiter/Saturn (houses from each)."""
+    houses = ctx.get("natal.houses")
     out: Dict[str, List[int]] = {}
-    for p in vedic.planets:
+    for p in ctx.vedic.planets:
         base_house = houses[p.name]["from_lagna"]
         aspects = [7]  # 7th aspect default
         if p.name == "Mars":
@@ -99,24 +290,10 @@ def compute_graha_drishti(vedic: Any) -> Dict[str, List[int]]:
     return out
 
 
-def compute_functional_benefics(lagna_sign: str) -> Dict[str, str]:
-    """Very simplified functional benefic/malefic mapping by Lagna."""
-    # For demonstration: benefic lords of trikonas (5,9) and kendra (1,4,7,10), malefics of 6/8/12.
-    # A production-grade implementation should use detailed house lordship tables per Lagna.
-    return {
-        "Jupiter": "benefic",
-        "Venus": "benefic",
-        "Mercury": "benefic",
-        "Saturn": "malefic",
-        "Mars": "malefic",
-        "Rahu": "malefic",
-        "Ketu": "malefic"
-    }
-
-
-def compute_yogas(vedic: Any) -> Dict[str, bool]:
-    houses = compute_house_overlays(vedic)
-    planets = {p.name: p for p in vedic.planets}
+@signal("natal.yogas", deps=("natal.houses", "planets"), schema=(YOGAS,))
+def _natal_yogas(ctx: SignalContext) -> Dict[str, bool]:
+    houses = ctx.get("natal.houses")
+    planets = ctx.get("planets")
     out: Dict[str, bool] = {}
     # Gajakesari: Moon and Jupiter in Kendra (1,4,7,10)
     moon_h = houses["Moon"]["from_lagna"]
@@ -135,12 +312,13 @@ def compute_yogas(vedic: Any) -> Dict[str, bool]:
     return out
 
 
-def compute_strengths(vedic: Any) -> Dict[str, float]:
-    dignities = compute_dignities(vedic)
-    combustion = compute_combustion(vedic)
-    houses = compute_house_overlays(vedic)
+@signal("natal.strength", deps=("natal.dignity", "natal.combust", "natal.houses"), schema=(PLANET_NAMES,))
+def _natal_strength(ctx: SignalContext) -> Dict[str, float]:
+    dignities = ctx.get("natal.dignity")
+    combustion = ctx.get("natal.combust")
+    houses = ctx.get("natal.houses")
     scores: Dict[str, float] = {}
-    for p in vedic.planets:
+    for p in ctx.vedic.planets:
         s = 0.5
         s += {"Exalted": 0.3, "Mooltrikona": 0.2, "Own": 0.15, "Debilitated": -0.3}.get(dignities[p.name], 0)
         h = houses[p.name]["from_lagna"]
@@ -154,79 +332,147 @@ def compute_strengths(vedic: Any) -> Dict[str, float]:
     return scores
 
 
-def dasha_context(dashas: List[DashaPeriod], vedic: Any) -> Dict[str, Any]:
-    maha = next((d for d in dashas if d.level == "Maha" and d.current), None)
-    antar = next((d for d in dashas if d.level == "Antar" and d.current), None)
-    ctx: Dict[str, Any] = {"maha": None, "antar": None}
-    houses = compute_house_overlays(vedic)
-    dignities = compute_dignities(vedic)
-    if maha:
-        lord = maha.planet.split('/')[0]
-        p = next((pl for pl in vedic.planets if pl.name == lord), None)
-        if p:
-            ctx["maha"] = {
-                "lord": lord,
-                "placement": {
-                    "sign": p.rashi,
-                    "degree": p.degree,
-                    "nakshatra": p.nakshatra,
-                    "pada": p.pada,
-                    "house_from_lagna": houses[lord]["from_lagna"],
-                    "house_from_moon": houses[lord]["from_moon"],
-                },
-                "dignity": dignities[lord],
-                "start": maha.start_date.isoformat(),
-                "end": maha.end_date.isoformat()
-            }
-    if antar:
-        lord = antar.planet.split('/')[1]
-        p = next((pl for pl in vedic.planets if pl.name == lord), None)
-        if p:
-            ctx["antar"] = {
-                "lord": lord,
-                "placement": {
-                    "sign": p.rashi,
-                    "degree": p.degree,
-                    "nakshatra": p.nakshatra,
-                    "pada": p.pada,
-                    "house_from_lagna": houses[lord]["from_lagna"],
-                    "house_from_moon": houses[lord]["from_moon"],
-                },
-                "dignity": dignities[lord],
-                "start": antar.start_date.isoformat(),
-                "end": antar.end_date.isoformat()
-            }
-    return ctx
+@signal("natal.d9")
+def _natal_d9(ctx: SignalContext) -> Dict[str, Any]:
+    return ctx.vedic.d9_chart or {}
 
 
-def compute_transit_signals(chart: ChartResponse, transits: List[Transit]) -> Dict[str, Any]:
-    out: Dict[str, Any] = {"houses": {}, "aspects": {}, "by_planet": {}}
-    for t in transits:
-        out["houses"][t.planet] = {
+@signal("natal.d10")
+def _natal_d10(ctx: SignalContext) -> Dict[str, Any]:
+    return ctx.vedic.d10_chart or {}
+
+
+@signal("dasha.current", requires="dashas", public=False)
+def _dasha_current(ctx: SignalContext) -> Tuple[Optional[DashaPeriod], Optional[DashaPeriod]]:
+    """Current (maha, antar) periods, found in one pass over the dasha list."""
+    maha = antar = None
+    for d in ctx.dashas:
+        if not d.current:
+            continue
+        if d.level == "Maha" and maha is None:
+            maha = d
+        elif d.level == "Antar" and antar is None:
+            antar = d
+    return maha, antar
+
+
+def _dasha_entry(ctx: SignalContext, period: Optional[DashaPeriod], lord: Optional[str]) -> Optional[Dict[str, Any]]:
+    p = ctx.get("planets").get(lord) if period else None
+    if not p:
+        return None
+    houses = ctx.get("natal.houses")
+    return {
+        "lord": lord,
+        "placement": {
+            "sign": p.rashi,
+            "degree": p.degree,
+            "nakshatra": p.nakshatra,
+            "pada": p.pada,
+            "house_from_lagna": houses[lord]["from_lagna"],
+            "house_from_moon": houses[lord]["from_moon"],
+        },
+        "dignity": ctx.get("natal.dignity")[lord],
+        "start": period.start_date.isoformat(),
+        "end": period.end_date.isoformat()
+    }
+
+
+@signal("dasha.maha", deps=("dasha.current", "planets", "natal.houses", "natal.dignity"), requires="dashas",
+        schema=(DASHA_KEYS, PLACEMENT_KEYS))
+def _dasha_maha(ctx: SignalContext) -> Optional[Dict[str, Any]]:
+    maha, _ = ctx.get("dasha.current")
+    return _dasha_entry(ctx, maha, maha.planet.split('/')[0] if maha else None)
+
+
+@signal("dasha.antar", deps=("dasha.current", "planets", "natal.houses", "natal.dignity"), requires="dashas",
+        schema=(DASHA_KEYS, PLACEMENT_KEYS))
+def _dasha_antar(ctx: SignalContext) -> Optional[Dict[str, Any]]:
+    _, antar = ctx.get("dasha.current")
+    return _dasha_entry(ctx, antar, antar.planet.split('/')[1] if antar else None)
+
+
+@signal("transit.houses", requires="transits", schema=(PLANET_NAMES, ("from_moon", "from_lagna", "sign")))
+def _transit_houses(ctx: SignalContext) -> Dict[str, Dict[str, Any]]:
+    return {
+        t.planet: {
             "from_moon": t.from_natal_moon,
             "from_lagna": t.from_natal_lagna,
             "sign": t.current_sign
         }
-        out["by_planet"][t.planet] = {
-            "aspects_natal": t.aspects_natal
-        }
-    return out
+        for t in ctx.transits
+    }
 
 
-def compute_signals(chart: ChartResponse, dashas: List[DashaPeriod], transits: List[Transit]) -> Dict[str, Any]:
-    vedic = chart.vedic
-    sig: Dict[str, Any] = {
-        "natal": {
-            "houses": compute_house_overlays(vedic),
-            "dignity": compute_dignities(vedic),
-            "combust": compute_combustion(vedic),
-            "graha_drishti": compute_graha_drishti(vedic),
-            "yogas": compute_yogas(vedic),
-            "strength": compute_strengths(vedic),
-            "d9": vedic.d9_chart or {},
-            "d10": vedic.d10_chart or {}
-        },
-        "dasha": dasha_context(dashas, vedic) if dashas else {},
-        "transit": compute_transit_signals(chart, transits) if transits else {}
+@signal("transit.aspects", requires="transits", schema=())
+def _transit_aspects(ctx: SignalContext) -> Dict[str, Any]:
+    return {}
+
+
+@signal("transit.by_planet", requires="transits", schema=(PLANET_NAMES, ("aspects_natal",)))
+def _transit_by_planet(ctx: SignalContext) -> Dict[str, Dict[str, Any]]:
+    return {t.planet: {"aspects_natal": t.aspects_natal} for t in ctx.transits}
+
+
+# -------- Functional API ---------
+
+def compute_house_overlays(vedic: Any) -> Dict[str, Dict[str, int]]:
+    """Return planet houses from Lagna and from Moon."""
+    return SignalContext(vedic).get("natal.houses")
+
+
+def compute_dignities(vedic: Any) -> Dict[str, str]:
+    return SignalContext(vedic).get("natal.dignity")
+
+
+def compute_combustion(vedic: Any) -> Dict[str, bool]:
+    return SignalContext(vedic).get("natal.combust")
+
+
+def compute_graha_drishti(vedic: Any) -> Dict[str, List[int]]:
+    """Return special aspects by Mars/Jupiter/Saturn (houses from each)."""
+    return SignalContext(vedic).get("natal.graha_drishti")
+
+
+def compute_functional_benefics(lagna_sign: str) -> Dict[str, str]:
+    """Very simplified functional benefic/malefic mapping by Lagna."""
+    # For demonstration: benefic lords of trikonas (5,9) and kendra (1,4,7,10), malefics of 6/8/12.
+    # A production-grade implementation should use detailed house lordship tables per Lagna.
+    return {
+        "Jupiter": "benefic",
+        "Venus": "benefic",
+        "Mercury": "benefic",
+        "Saturn": "malefic",
+        "Mars": "malefic",
+        "Rahu": "malefic",
+        "Ketu": "malefic"
     }
-    return sig
+
+
+def compute_yogas(vedic: Any) -> Dict[str, bool]:
+    return SignalContext(vedic).get("natal.yogas")
+
+
+def compute_strengths(vedic: Any) -> Dict[str, float]:
+    return SignalContext(vedic).get("natal.strength")
+
+
+def dasha_context(dashas: List[DashaPeriod], vedic: Any) -> Dict[str, Any]:
+    ctx = SignalContext(vedic, dashas)
+    if not dashas:
+        return {"maha": None, "antar": None}
+    return {"maha": ctx.get("dasha.maha"), "antar": ctx.get("dasha.antar")}
+
+
+def compute_transit_signals(chart: ChartResponse, transits: List[Transit]) -> Dict[str, Any]:
+    ctx = SignalContext(chart.vedic, transits=transits)
+    return {name: ctx.get(f"transit.{name}") for name in ("houses", "aspects", "by_planet")}
+
+
+@timed("signals.compute")
+def compute_signals(chart: ChartResponse, dashas: List[DashaPeriod], transits: List[Transit],
+                    context: Optional[SignalContext] = None,
+                    only: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Signals tree; pass a shared context to reuse signals computed elsewhere and
+    `only` (see required_signals) to evaluate just the signals a rule set reads."""
+    ctx = context or SignalContext.for_chart(chart, dashas, transits)
+    return ctx.tree(only)
@@ -0,0 +1,144 @@
+"""
+Single-flight Coalescing
+Concurrent callers with the same key share one computation
+
+The first caller for a key (the leader) runs the computation; callers arriving
+while it runs wait for it and get the same result or exception. With `linger`,
+a finished result is also handed to callers arriving within that many seconds,
+which coalesces bursts that just miss each other (e.g. the web client's
+parallel /v1 calls for one chart, computed in threadpool workers).
+Results are shared between callers and must be treated as read-only.
+"""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+# How long a finished chart calculation is shared with later identical requests
+CHART_FLIGHT_LINGER_SECONDS = float(os.getenv("CHART_FLIGHT_LINGER_SECONDS", "5"))
+# Finished results kept for lingering
+SINGLE_FLIGHT_MAX_LINGERING = int(os.getenv("SINGLE_FLIGHT_MAX_LINGERING", "256"))
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Per-key coalescing of async (run) and thread (call) computations."""
+
+    def __init__(self, name: str, linger: float = 0.0, max_lingering: int = SINGLE_FLIGHT_MAX_LINGERING):
+        self.name = name
+        self.linger = linger
+        self.max_lingering = max_lingering
+        self._lock = threading.Lock()
+        self._tasks: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._calls: Dict[Hashable, _Call] = {}
+        self._done: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()  # key -> (expires, result)
+        self.leaders = 0
+        self.shared = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn() once per key at a time.
+
+        The computation runs as its own task, so a waiter being cancelled (a
+        client disconnecting) neither cancels it nor fails the other waiters.
+        """
+        found, result = self._lingering(key)
+        if found:
+            return result
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._task_done(key, t))
+            with self._lock:
+                self.leaders += 1
+        else:
+            with self._lock:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def call(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run fn() once per key at a time across threads."""
+        found, result = self._lingering(key)
+        if found:
+            return result
+        with self._lock:
+            pending = self._calls.get(key)
+            if pending is None:
+                pending = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+        if not leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+        try:
+            pending.result = fn()
+        except BaseException as e:
+            pending.error = e
+            raise
+        else:
+            self._remember(key, pending.result)
+            return pending.result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            pending.event.set()
+
+    def _task_done(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if task.cancelled():
+            return
+        if task.exception() is None:  # also marks a failure as retrieved when nobody waits
+            self._remember(key, task.result())
+
+    def _lingering(self, key: Hashable) -> Tuple[bool, Any]:
+        if self.linger <= 0:
+            return False, None
+        with self._lock:
+            entry = self._done.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= monotonic():
+                del self._done[key]
+                return False, None
+            self.shared += 1
+            return True, entry[1]
+
+    def _remember(self, key: Hashable, result: Any) -> None:
+        if self.linger <= 0:
+            return
+        with self._lock:
+            self._done[key] = (monotonic() + self.linger, result)
+            self._done.move_to_end(key)
+            while len(self._done) > self.max_lingering:
+                self._done.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = monotonic()
+            return {
+                "leaders": self.leaders,
+                "shared": self.shared,
+                "in_flight": len(self._tasks) + len(self._calls),
+                "lingering": sum(1 for expires, _ in self._done.values() if expires > now),
+                "linger_s": self.linger,
+            }
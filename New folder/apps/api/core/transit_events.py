@@ -0,0 +1,269 @@
+"""
+Transit Event Search
+Sign/nakshatra ingresses, retrograde/direct stations and exact transit-to-natal
+aspects over a date range, located by bracketing + Brent refinement
+"""
+
+import heapq
+import swisseph as swe
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import ChartResponse, TransitEvent
+
+
+SIGNS = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+]
+NAKSHATRAS = [
+    "Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra",
+    "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purva Phalguni", "Uttara Phalguni",
+    "Hasta", "Chitra", "Swati", "Vishakha", "Anuradha", "Jyeshtha",
+    "Mula", "Purva Ashadha", "Uttara Ashadha", "Shravana", "Dhanishta", "Shatabhisha",
+    "Purva Bhadrapada", "Uttara Bhadrapada", "Revati"
+]
+NAKSHATRA_SPAN = 360.0 / 27
+
+PLANET_IDS = {
+    'Sun': swe.SUN, 'Moon': swe.MOON, 'Mercury': swe.MERCURY,
+    'Venus': swe.VENUS, 'Mars': swe.MARS, 'Jupiter': swe.JUPITER,
+    'Saturn': swe.SATURN, 'Rahu': swe.MEAN_NODE, 'Ketu': swe.MEAN_NODE
+}
+
+# Bracketing step (days) per planet. Shorter than the planet's shortest retrograde
+# or direct run, so a step holds at most one station and well under 180° of motion.
+STEP_DAYS = {
+    'Sun': 60.0, 'Moon': 8.0, 'Mercury': 6.0, 'Venus': 12.0, 'Mars': 16.0,
+    'Jupiter': 30.0, 'Saturn': 30.0, 'Rahu': 180.0, 'Ketu': 180.0
+}
+# Luminaries and mean nodes never station
+NO_STATIONS = {'Sun', 'Moon', 'Rahu', 'Ketu'}
+
+ASPECTS = {'conjunction': 0.0, 'sextile': 60.0, 'square': 90.0, 'trine': 120.0, 'opposition': 180.0}
+
+EVENT_KINDS = ("sign_ingress", "nakshatra_ingress", "station", "aspect")
+
+# Default scan skips the Moon: it changes sign every ~2.5 days and dominates cost
+DEFAULT_PLANETS = ['Sun', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Rahu', 'Ketu']
+
+TOLERANCE_DAYS = 1.0 / 1440.0  # one minute
+
+
+def to_jd(dt: datetime) -> float:
+    return swe.julday(dt.year, dt.month, dt.day,
+                      dt.hour + dt.minute / 60.0 + dt.second / 3600.0 + dt.microsecond / 3.6e9)
+
+
+def from_jd(jd: float) -> datetime:
+    y, m, d, hour = swe.revjul(jd)
+    return datetime(y, m, d) + timedelta(hours=hour)
+
+
+def brent(f: Callable[[float], float], a: float, b: float, fa: float, fb: float,
+          tol: float = TOLERANCE_DAYS, max_iter: int = 60) -> float:
+    """Root of f in [a, b] where fa, fb bracket zero (Brent's method)."""
+    if fa == 0:
+        return a
+    if fb == 0:
+        return b
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iter):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol1 = 2e-15 * abs(b) + 0.5 * tol
+        xm = 0.5 * (c - b)
+        if abs(xm) <= tol1 or fb == 0:
+            return b
+        if abs(e) >= tol1 and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p, q = 2.0 * xm * s, 1.0 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2.0 * xm * q * (q - r) - (b - a) * (r - 1.0))
+                q = (q - 1.0) * (r - 1.0) * (s - 1.0)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2.0 * p < min(3.0 * xm * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = xm
+        else:
+            d = e = xm
+        a, fa = b, fb
+        b += d if abs(d) > tol1 else (tol1 if xm > 0 else -tol1)
+        fb = f(b)
+    return b
+
+
+class TransitEventSearch:
+    """Find transit events between two instants without day-by-day sampling.
+
+    Each planet is sampled at a coarse step; stations are located first so every
+    remaining sub-interval is monotonic in longitude, then each boundary the
+    longitude passes (sign, nakshatra, natal aspect point) is refined with Brent.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self._cache: Dict[Tuple[int, float], Tuple[float, float]] = {}
+
+    def position(self, planet: str, jd: float) -> Tuple[float, float]:
+        """Sidereal longitude and daily speed (one ephemeris call per (body, jd))."""
+        code = PLANET_IDS[planet]
+        key = (code, jd)
+        hit = self._cache.get(key)
+        if hit is None:
+            self.calls += 1
+            data = swe.calc_ut(jd, code)[0]
+            hit = ((data[0] - swe.get_ayanamsa_ut(jd)) % 360, data[3])
+            if len(self._cache) > 4096:
+                self._cache.clear()
+            self._cache[key] = hit
+        lon, speed = hit
+        if planet == 'Ketu':
+            lon = (lon + 180) % 360
+        return lon, speed
+
+    def events(self, start: datetime, end: datetime, planets: Optional[Iterable[str]] = None,
+               kinds: Optional[Iterable[str]] = None,
+               natal_chart: Optional[ChartResponse] = None) -> Iterator[TransitEvent]:
+        """Yield events in [start, end) in chronological order."""
+        planets = list(planets or DEFAULT_PLANETS)
+        kinds = set(kinds or EVENT_KINDS)
+        for p in planets:
+            if p not in PLANET_IDS:
+                raise ValueError(f"Unknown planet: {p}")
+        for k in kinds:
+            if k not in EVENT_KINDS:
+                raise ValueError(f"Unknown event kind: {k}")
+        targets = self._aspect_targets(natal_chart) if natal_chart and "aspect" in kinds else []
+        natal_signs = self._natal_signs(natal_chart) if natal_chart else None
+        streams = [
+            self._planet_events(p, to_jd(start), to_jd(end), kinds, targets, natal_signs)
+            for p in planets
+        ]
+        for _, ev in heapq.merge(*streams, key=lambda item: item[0]):
+            yield ev
+
+    # ---- per-planet scan -------------------------------------------------
+
+    def _planet_events(self, planet: str, jd0: float, jd1: float, kinds: set,
+                       targets: List[Tuple[float, str, str]],
+                       natal_signs: Optional[Tuple[int, int]]) -> Iterator[Tuple[float, TransitEvent]]:
+        step = STEP_DAYS[planet]
+        a = jd0
+        lon_a, spd_a = self.position(planet, a)
+        while a < jd1:
+            b = min(a + step, jd1)
+            lon_b, spd_b = self.position(planet, b)
+            found: List[Tuple[float, TransitEvent]] = []
+            pieces = [(a, lon_a, b, lon_b)]
+            if planet not in NO_STATIONS and (spd_a > 0) != (spd_b > 0):
+                s = brent(lambda t: self.position(planet, t)[1], a, b, spd_a, spd_b)
+                lon_s, _ = self.position(planet, s)
+                pieces = [(a, lon_a, s, lon_s), (s, lon_s, b, lon_b)]
+                if "station" in kinds and s < jd1:
+                    kind = "station_retrograde" if spd_a > 0 else "station_direct"
+                    found.append((s, self._event(planet, kind, s, lon_s, natal_signs)))
+            for pa, la, pb, lb in pieces:
+                found.extend(self._crossings(planet, pa, la, pb, lb, kinds, targets, natal_signs))
+            found.sort(key=lambda x: x[0])
+            for jd, ev in found:
+                if jd0 <= jd < jd1:
+                    yield jd, ev
+            a, lon_a, spd_a = b, lon_b, spd_b
+
+    def _crossings(self, planet: str, a: float, lon_a: float, b: float, lon_b: float, kinds: set,
+                   targets: List[Tuple[float, str, str]],
+                   natal_signs: Optional[Tuple[int, int]]) -> Iterator[Tuple[float, TransitEvent]]:
+        """Every boundary passed while moving monotonically from lon_a to lon_b."""
+        delta = ((lon_b - lon_a + 180) % 360) - 180
+        if delta == 0:
+            return
+        lo, hi = (lon_a, lon_a + delta) if delta > 0 else (lon_a + delta, lon_a)
+
+        def unwrapped(t: float) -> float:
+            lon, _ = self.position(planet, t)
+            return lon_a + ((lon - lon_a + 180) % 360) - 180
+
+        def solve(x: float) -> float:
+            return brent(lambda t: unwrapped(t) - x, a, b, lon_a - x, lon_a + delta - x)
+
+        if "sign_ingress" in kinds:
+            for x in _grid_values(lo, hi, 30.0):
+                t = solve(x)
+                entered = _entered_index(x, 30.0, delta)
+                yield t, self._event(planet, "sign_ingress", t, entered * 30.0 + (0.0 if delta > 0 else 29.999999), natal_signs)
+        if "nakshatra_ingress" in kinds:
+            for x in _grid_values(lo, hi, NAKSHATRA_SPAN):
+                t = solve(x)
+                entered = _entered_index(x, NAKSHATRA_SPAN, delta)
+                lon = entered * NAKSHATRA_SPAN + (0.0 if delta > 0 else NAKSHATRA_SPAN - 1e-6)
+                yield t, self._event(planet, "nakshatra_ingress", t, lon, natal_signs)
+        for point, natal_planet, aspect in targets:
+            base = lo + ((point - lo) % 360)
+            if base <= hi and base != lo:
+                t = solve(base)
+                yield t, self._event(planet, "aspect", t, point, natal_signs,
+                                     natal_planet=natal_planet, aspect=aspect)
+
+    # ---- helpers ---------------------------------------------------------
+
+    def _event(self, planet: str, kind: str, jd: float, lon: float,
+               natal_signs: Optional[Tuple[int, int]], **extra) -> TransitEvent:
+        lon = lon % 360
+        sign_num = int(lon / 30) % 12
+        ev = TransitEvent(
+            planet=planet,
+            event=kind,
+            at=from_jd(jd),
+            longitude=round(lon, 6),
+            sign=SIGNS[sign_num],
+            nakshatra=NAKSHATRAS[int(lon / NAKSHATRA_SPAN) % 27],
+            **extra,
+        )
+        if natal_signs is not None:
+            moon_sign, lagna_sign = natal_signs
+            ev.from_natal_moon = ((sign_num - moon_sign) % 12) + 1
+            ev.from_natal_lagna = ((sign_num - lagna_sign) % 12) + 1
+        return ev
+
+    @staticmethod
+    def _natal_signs(chart: ChartResponse) -> Tuple[int, int]:
+        return int(chart.vedic.moon_longitude / 30) % 12, int(chart.vedic.ascendant.longitude / 30) % 12
+
+    @staticmethod
+    def _aspect_targets(chart: ChartResponse) -> List[Tuple[float, str, str]]:
+        """(sidereal longitude, natal point, aspect) for every exact aspect point."""
+        points = [(p.name, p.longitude) for p in chart.vedic.planets]
+        points.append(("Ascendant", chart.vedic.ascendant.longitude))
+        out: List[Tuple[float, str, str]] = []
+        for name, lon in points:
+            for aspect, angle in ASPECTS.items():
+                offsets = {angle, -angle} if angle not in (0.0, 180.0) else {angle}
+                for off in offsets:
+                    out.append(((lon + off) % 360, name, aspect))
+        return out
+
+
+def _grid_values(lo: float, hi: float, spacing: float) -> List[float]:
+    """Multiples of spacing strictly above lo and at or below hi (unwrapped degrees)."""
+    k = int(lo // spacing) + 1
+    out = []
+    while k * spacing <= hi:
+        out.append(k * spacing)
+        k += 1
+    return out
+
+
+def _entered_index(boundary: float, spacing: float, delta: float) -> int:
+    k = int(round(boundary / spacing))
+    return k if delta > 0 else k - 1
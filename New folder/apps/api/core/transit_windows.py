@@ -0,0 +1,135 @@
+"""
+Long-Cycle Transit Windows
+Sade Sati, Ashtama Shani, Jupiter returns and Rahu/Ketu axis transits with
+complete start/end dates, including retrograde exits and re-entries
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .models import ChartResponse, TransitPhase, TransitWindow
+from .transit_events import SIGNS, TransitEventSearch, to_jd
+
+
+# Sign-occupancy timelines are computed and cached in fixed blocks of years
+ERA_YEARS = 50
+ERA_ORIGIN = 1800
+
+# Segments of the same cycle separated by less than this (retrograde exit and
+# re-entry) belong to one window
+REENTRY_GAP = timedelta(days=400)
+
+# Longest range for_chart scans (a lifetime with margin; the default is 100 years)
+MAX_RANGE = timedelta(days=int(150 * 365.25))
+
+# kind -> (planet, natal reference, {house from reference: phase label})
+CYCLES: Dict[str, Tuple[str, str, Dict[int, str]]] = {
+    "sade_sati": ("Saturn", "Moon", {
+        12: "Rising (12th house)", 1: "Peak (1st house)", 2: "Setting (2nd house)",
+    }),
+    "ashtama_shani": ("Saturn", "Moon", {8: "Ashtama (8th house)"}),
+    "jupiter_return": ("Jupiter", "Jupiter", {1: "Return (1st from natal Jupiter)"}),
+    "node_axis": ("Rahu", "Moon", {1: "Rahu over Moon, Ketu 7th", 7: "Ketu over Moon, Rahu 7th"}),
+}
+
+Segment = Tuple[datetime, datetime, int]
+
+
+def _era_of(dt: datetime) -> int:
+    return (dt.year - ERA_ORIGIN) // ERA_YEARS
+
+
+def _era_bounds(era: int) -> Tuple[datetime, datetime]:
+    y0 = ERA_ORIGIN + era * ERA_YEARS
+    return datetime(y0, 1, 1), datetime(y0 + ERA_YEARS, 1, 1)
+
+
+@lru_cache(maxsize=64)
+def sign_segments(planet: str, era: int) -> Tuple[Segment, ...]:
+    """(start, end, sidereal sign index) occupancy runs for one planet in one era.
+
+    Shared by every natal chart: only sign-boundary crossings are searched.
+    """
+    start, end = _era_bounds(era)
+    search = TransitEventSearch()
+    lon, _ = search.position(planet, to_jd(start))
+    sign = int(lon // 30) % 12
+    out: List[Segment] = []
+    t = start
+    for ev in search.events(start, end, planets=[planet], kinds=["sign_ingress"]):
+        out.append((t, ev.at, sign))
+        t, sign = ev.at, SIGNS.index(ev.sign)
+    out.append((t, end, sign))
+    return tuple(out)
+
+
+@lru_cache(maxsize=4096)
+def house_segments(planet: str, natal_sign: int, houses: FrozenSet[int], era: int) -> Tuple[Segment, ...]:
+    """Runs of `planet` in the given houses from `natal_sign` for one era (cached per natal sign)."""
+    out: List[Segment] = []
+    for start, end, sign in sign_segments(planet, era):
+        house = ((sign - natal_sign) % 12) + 1
+        if house in houses:
+            out.append((start, end, house))
+    return tuple(out)
+
+
+class LongCycleWindows:
+    """Complete phase intervals for slow-planet cycles relative to a natal chart"""
+
+    KINDS = tuple(CYCLES.keys())
+
+    def windows(self, kind: str, natal_sign: int, start: datetime, end: datetime) -> List[TransitWindow]:
+        """Windows of `kind` overlapping [start, end) for a natal reference sign (0-11)."""
+        if kind not in CYCLES:
+            raise ValueError(f"Unknown cycle: {kind}")
+        planet, _, labels = CYCLES[kind]
+        houses = frozenset(labels)
+
+        # Pad by one era on each side so windows straddling the range are complete
+        segments: List[Segment] = []
+        for era in range(_era_of(start) - 1, _era_of(end) + 2):
+            for seg in house_segments(planet, natal_sign, houses, era):
+                if segments and segments[-1][1] == seg[0] and segments[-1][2] == seg[2]:
+                    segments[-1] = (segments[-1][0], seg[1], seg[2])  # joined across era edge
+                else:
+                    segments.append(seg)
+
+        out: List[TransitWindow] = []
+        cluster: List[Segment] = []
+        for seg in segments + [None]:
+            if cluster and (seg is None or seg[0] - cluster[-1][1] >= REENTRY_GAP):
+                if cluster[0][0] < end and cluster[-1][1] > start:
+                    out.append(TransitWindow(
+                        kind=kind,
+                        planet=planet,
+                        start=cluster[0][0],
+                        end=cluster[-1][1],
+                        phases=[TransitPhase(phase=labels[h], start=s, end=e) for s, e, h in cluster],
+                    ))
+                cluster = []
+            if seg is not None:
+                cluster.append(seg)
+        return out
+
+    def for_chart(self, natal_chart: ChartResponse, start: datetime, end: datetime,
+                  kinds: Optional[List[str]] = None) -> Dict[str, List[TransitWindow]]:
+        """All requested cycles for a natal chart, keyed by kind."""
+        if end - start > MAX_RANGE:
+            raise ValueError(f"Range must be at most {MAX_RANGE.days // 365} years")
+        refs = {p.name: int(p.longitude // 30) % 12 for p in natal_chart.vedic.planets}
+        refs["Moon"] = int(natal_chart.vedic.moon_longitude // 30) % 12
+        result: Dict[str, List[TransitWindow]] = {}
+        for kind in kinds or self.KINDS:
+            if kind not in CYCLES:
+                raise ValueError(f"Unknown cycle: {kind}")
+            result[kind] = self.windows(kind, refs[CYCLES[kind][1]], start, end)
+        return result
+
+    def active(self, kind: str, natal_sign: int, when: datetime) -> Optional[TransitWindow]:
+        """The window of `kind` containing `when`, if any."""
+        for w in self.windows(kind, natal_sign, when, when + timedelta(seconds=1)):
+            if w.start <= when < w.end:
+                return w
+        return None
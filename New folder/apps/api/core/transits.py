@@ -1,23 +1,120 @@
 """
 Transit (Gochar) Calculator
 Current planetary positions relative to natal chart
+
+Transit positions at a moment are the same for every user, so they are computed
+once per time bucket as a shared SkyState; only the overlay is per chart.
 """
 
+import os
 import swisseph as swe
+import numpy as np
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Tuple
 from .models import Transit, ChartResponse
+from .metrics import timed
+from .transit_windows import LongCycleWindows
+
+
+PLANETS = ('Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Rahu', 'Ketu')
+PLANET_IDS = {
+    'Sun': swe.SUN, 'Moon': swe.MOON, 'Mercury': swe.MERCURY,
+    'Venus': swe.VENUS, 'Mars': swe.MARS, 'Jupiter': swe.JUPITER,
+    'Saturn': swe.SATURN, 'Rahu': swe.MEAN_NODE
+}
+
+# Snapshot bucket size in seconds (60 = per minute, 3600 = per hour)
+SNAPSHOT_PRECISION_SECONDS = int(os.getenv("TRANSIT_SNAPSHOT_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class SkyState:
+    """Sidereal transit positions shared by every natal chart for one time bucket"""
+    bucket_start: datetime
+    julian_day: float
+    ayanamsa: float
+    planets: Tuple[str, ...]
+    longitudes: np.ndarray  # sidereal, aligned with planets
+    speeds: np.ndarray
+    signs: np.ndarray  # 0-11
+
+
+def _bucket_start(transit_date: datetime, precision: int) -> datetime:
+    naive = transit_date.replace(tzinfo=None, microsecond=0)
+    seconds = naive.hour * 3600 + naive.minute * 60 + naive.second
+    floored = seconds - seconds % precision if precision < 86400 else 0
+    return naive.replace(hour=floored // 3600, minute=(floored % 3600) // 60, second=floored % 60)
+
+
+@timed("transits.sky_state")  # inside the cache: times misses only
+def _compute_sky_state(bucket_start: datetime) -> SkyState:
+    jd = swe.julday(bucket_start.year, bucket_start.month, bucket_start.day,
+                    bucket_start.hour + bucket_start.minute/60.0 + bucket_start.second/3600.0)
+    ayanamsa = swe.get_ayanamsa_ut(jd)
+    lons, speeds = [], []
+    rahu = None
+    for name in PLANETS:
+        if name == 'Ketu':
+            # Ketu is 180° from Rahu; reuse the node instead of a second ephemeris call
+            lon, speed = (rahu[0] + 180) % 360, rahu[3]
+        else:
+            data = swe.calc_ut(jd, PLANET_IDS[name])[0]
+            if name == 'Rahu':
+                rahu = data
+            lon, speed = data[0], data[3]
+        lons.append((lon - ayanamsa) % 360)
+        speeds.append(speed)
+    lon_arr, speed_arr = np.array(lons), np.array(speeds)
+    sign_arr = (lon_arr // 30).astype(np.int64) % 12
+    # Shared across requests: freeze the arrays
+    for arr in (lon_arr, speed_arr, sign_arr):
+        arr.setflags(write=False)
+    return SkyState(
+        bucket_start=bucket_start,
+        julian_day=jd,
+        ayanamsa=ayanamsa,
+        planets=PLANETS,
+        longitudes=lon_arr,
+        speeds=speed_arr,
+        signs=sign_arr,
+    )
+
+
+# Hot buckets of live traffic; scans over many instants bypass it (snapshot_uncached)
+_sky_state = lru_cache(maxsize=1024)(_compute_sky_state)
+
+
+def sky_state(transit_date: datetime, precision: int = SNAPSHOT_PRECISION_SECONDS) -> SkyState:
+    """Shared snapshot for the bucket containing transit_date (cached)."""
+    return _sky_state(_bucket_start(transit_date, precision))
+
+
+def sky_state_cache_stats() -> Tuple[int, int]:
+    """(hits, misses) of the shared sky-state cache since start."""
+    info = _sky_state.cache_info()
+    return info.hits, info.misses
+
+
+def clear_sky_state_cache() -> None:
+    """Drop every cached snapshot (and reset the hit/miss counters)."""
+    _sky_state.cache_clear()
 
 
 class TransitCalculator:
     """Calculate transits for predictions"""
     
-    PLANETS = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Rahu', 'Ketu']
+    PLANETS = list(PLANETS)
     SIGNS = [
         "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
         "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
     ]
+
+    def __init__(self, precision: int = SNAPSHOT_PRECISION_SECONDS):
+        self.precision = precision
     
+    @timed("transits.calculate")
     def calculate(self, natal_chart: ChartResponse, transit_date: datetime) -> List[Transit]:
         """
         Calculate current transits relative to natal chart
@@ -29,37 +126,30 @@ class TransitCalculator:
         Returns:
             List of Transit objects
         """
-        # Calculate current planetary positions
-        jd = swe.julday(transit_date.year, transit_date.month, transit_date.day,
-                       transit_date.hour + transit_date.minute/60.0)
-        
-        # Get ayanamsa for sidereal calculations
-        ayanamsa = swe.get_ayanamsa_ut(jd)
-        
+        return self.overlay(natal_chart, self.snapshot(transit_date))
+
+    def snapshot(self, transit_date: datetime) -> SkyState:
+        """Shared sky state at this calculator's precision."""
+        return sky_state(transit_date, self.precision)
+
+    def snapshot_uncached(self, transit_date: datetime) -> SkyState:
+        """Sky state computed without the shared cache.
+
+        For scans stepping through many distinct instants, which would
+        otherwise evict the buckets live requests keep hitting.
+        """
+        return _compute_sky_state(_bucket_start(transit_date, self.precision))
+
+    def overlay(self, natal_chart: ChartResponse, sky: SkyState) -> List[Transit]:
+        """Per-chart part of a transit: houses from natal Moon/Lagna and natal aspects."""
         # Get natal Moon and Lagna positions
         natal_moon_sign = self._get_sign_number(natal_chart.vedic.moon_longitude)
         natal_lagna_sign = self._get_sign_number(natal_chart.vedic.ascendant.longitude)
         
         transits = []
-        
-        planet_ids = {
-            'Sun': swe.SUN, 'Moon': swe.MOON, 'Mercury': swe.MERCURY,
-            'Venus': swe.VENUS, 'Mars': swe.MARS, 'Jupiter': swe.JUPITER,
-            'Saturn': swe.SATURN, 'Rahu': swe.MEAN_NODE
-        }
-        
-        for planet_name in self.PLANETS:
-            if planet_name == 'Ketu':
-                # Ketu is 180° from Rahu
-                rahu_pos = swe.calc_ut(jd, swe.MEAN_NODE)[0][0]
-                transit_lon = (rahu_pos + 180) % 360
-            else:
-                planet_data = swe.calc_ut(jd, planet_ids[planet_name])
-                transit_lon = planet_data[0][0]
-            
-            # Convert to sidereal
-            sidereal_lon = (transit_lon - ayanamsa) % 360
-            current_sign_num = self._get_sign_number(sidereal_lon)
+        for i, planet_name in enumerate(sky.planets):
+            sidereal_lon = float(sky.longitudes[i])
+            current_sign_num = int(sky.signs[i])
             
             # Calculate house position from Moon and Lagna
             from_moon = ((current_sign_num - natal_moon_sign) % 12) + 1
@@ -77,6 +167,63 @@ class TransitCalculator:
             ))
         
         return transits
+
+    def overlay_arrays(self, moon_longitudes: np.ndarray, lagna_longitudes: np.ndarray,
+                       natal_longitudes: np.ndarray, sky: SkyState) -> Dict[str, np.ndarray]:
+        """Vectorized overlay for N charts against one snapshot.
+
+        Args:
+            moon_longitudes: (N,) natal sidereal Moon longitudes
+            lagna_longitudes: (N,) natal sidereal Ascendant longitudes
+            natal_longitudes: (N, P) natal sidereal planet longitudes
+            sky: Shared snapshot
+
+        Returns:
+            from_moon, from_lagna: (N, T) houses (1-12) per transit planet
+            aspects: (N, T, P) bool, transit planet aspects natal planet
+        """
+        moon_sign = (np.asarray(moon_longitudes) // 30).astype(np.int64) % 12
+        lagna_sign = (np.asarray(lagna_longitudes) // 30).astype(np.int64) % 12
+        signs = sky.signs[None, :]
+        diff = np.abs(np.asarray(natal_longitudes)[:, None, :] - sky.longitudes[None, :, None])
+        diff = np.where(diff > 180, 360 - diff, diff)
+        return {
+            "from_moon": ((signs - moon_sign[:, None]) % 12) + 1,
+            "from_lagna": ((signs - lagna_sign[:, None]) % 12) + 1,
+            # Conjunction within 10°, opposition 170-190°
+            "aspects": (diff <= 10) | ((diff >= 170) & (diff <= 190)),
+        }
+
+    def overlay_many(self, natal_charts: List[ChartResponse], sky: SkyState) -> List[List[Transit]]:
+        """Overlays for many charts against one snapshot in a single vectorized pass."""
+        if not natal_charts:
+            return []
+        names = [[p.name for p in c.vedic.planets] for c in natal_charts]
+        width = max(len(n) for n in names)
+        natal = np.full((len(natal_charts), width), np.nan)
+        for row, chart in enumerate(natal_charts):
+            natal[row, :len(chart.vedic.planets)] = [p.longitude for p in chart.vedic.planets]
+        arrays = self.overlay_arrays(
+            np.array([c.vedic.moon_longitude for c in natal_charts]),
+            np.array([c.vedic.ascendant.longitude for c in natal_charts]),
+            natal,
+            sky,
+        )
+        from_moon, from_lagna, aspects = arrays["from_moon"].tolist(), arrays["from_lagna"].tolist(), arrays["aspects"]
+        out: List[List[Transit]] = []
+        for row in range(len(natal_charts)):
+            row_names = names[row]
+            out.append([
+                Transit(
+                    planet=planet_name,
+                    from_natal_moon=from_moon[row][i],
+                    from_natal_lagna=from_lagna[row][i],
+                    current_sign=self.SIGNS[int(sky.signs[i])],
+                    aspects_natal=[row_names[j] for j in np.flatnonzero(aspects[row, i, :len(row_names)])],
+                )
+                for i, planet_name in enumerate(sky.planets)
+            ])
+        return out
     
     def _get_sign_number(self, longitude: float) -> int:
         """Get sign number (0-11) from longitude"""
@@ -132,9 +279,13 @@ class TransitCalculator:
             phase = "Not in Sade Sati"
             in_sade_sati = False
         
+        # Full window (start/end incl. retrograde re-entries) when currently active
+        window = LongCycleWindows().active("sade_sati", moon_sign, transit_date) if in_sade_sati else None
+        
         return {
             "in_sade_sati": in_sade_sati,
             "phase": phase,
             "saturn_sign": self.SIGNS[saturn_sign],
-            "house_from_moon": house_from_moon
+            "house_from_moon": house_from_moon,
+            "window": window.dict() if window else None
         }
@@ -1,10 +1,25 @@
+import hashlib
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import asynccontextmanager
+from sqlalchemy import create_engine, func, select
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 # Prefer env DATABASE_URL; fall back to local SQLite for dev to avoid 500s when Postgres isn't running
 DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./dev.db"
 
+# Pool tuning for the async engine (the sync engine keeps SQLAlchemy defaults for worker/tests)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+# Serialize identical cache fills across processes with Postgres advisory locks
+DB_ADVISORY_LOCKS = os.getenv("DB_ADVISORY_LOCKS", "0") == "1"
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
@@ -19,3 +34,129 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver (asyncpg / aiosqlite)."""
+    if url.startswith("postgresql+asyncpg://") or url.startswith("sqlite+aiosqlite://"):
+        return url
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    if url.startswith("postgresql"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
+class PoolStats:
+    """Running totals for connection checkout wait time (seconds)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def record(self, elapsed: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += elapsed
+            if elapsed > self.max_wait:
+                self.max_wait = elapsed
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg = self.total_wait / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total_s": round(self.total_wait, 6),
+                "wait_avg_s": round(avg, 6),
+                "wait_max_s": round(self.max_wait, 6),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super().connect()
+        except Exception:
+            pool_stats.record(time.perf_counter() - t0, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - t0)
+        return conn
+
+
+def _async_connect_args(url: str) -> dict:
+    if url.startswith("postgresql+asyncpg"):
+        return {
+            "timeout": DB_POOL_TIMEOUT,
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)},
+        }
+    if url.startswith("sqlite+aiosqlite"):
+        return {"timeout": DB_POOL_TIMEOUT}
+    return {}
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args=_async_connect_args(ASYNC_DATABASE_URL),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def advisory_lock_id(key: str) -> int:
+    """Signed 64-bit lock id for a string key."""
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+@asynccontextmanager
+async def advisory_lock(key: str):
+    """Hold a Postgres session advisory lock for key; yields whether it is held.
+
+    No-op (yields False) unless DB_ADVISORY_LOCKS is set and the database is
+    Postgres. The lock lives on its own pooled connection because AsyncSession
+    may switch connections between commits. A wait cut short by
+    statement_timeout yields False, so callers go ahead unserialized.
+    """
+    if not (DB_ADVISORY_LOCKS and ASYNC_DATABASE_URL.startswith("postgresql")):
+        yield False
+        return
+    lock_id = advisory_lock_id(key)
+    async with async_engine.connect() as conn:
+        try:
+            await conn.execute(select(func.pg_advisory_lock(lock_id)))
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            await conn.execute(select(func.pg_advisory_unlock(lock_id)))
+            await conn.commit()
+
@@ -3,29 +3,51 @@ FastAPI Backend for Astro Kundli
 Vedic + Western Astrology Calculations
 """
 
-from fastapi import FastAPI, HTTPException, Request, Depends, Query
+from fastapi import FastAPI, HTTPException, Request, Depends, Query, Header, Path
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Annotated, Optional, List, Dict, Any
+from datetime import datetime, timezone
 import uvicorn
 
-from core.pipeline import ChartPipeline
+from core.pipeline import ChartPipeline, NOMINATIM_URL
+from core import models as core_models
 from core.models import ChartInput, ChartResponse
 from core.dasha import VimshottariDasha
+from core.dasha_tree import DashaTree, LEVELS as DASHA_LEVELS
 from core.transits import TransitCalculator
+from core.transit_events import TransitEventSearch, EVENT_KINDS
+from core.transit_windows import LongCycleWindows
 from core.predictions import PredictionEngine
+from core.prediction_cache import PredictionCache
+from core.rule_sets import RuleSetManager
+from core.prediction_timeline import PredictionTimeline
 from core.dasha_insights import generate_insights
+from core.signals import signal_stats
+from core.transits import sky_state_cache_stats
+from core.metrics import METRICS_ENABLED, MetricsMiddleware, metrics, record_cache, span
+from core.profiling import Profiler, ProfilingMiddleware, profiled
+from core.memory import MEMORY_TRACE_FRAMES, MemoryMiddleware, memory_tracker
+from core.single_flight import CHART_FLIGHT_LINGER_SECONDS, SingleFlight
+from core.bulk_export import BulkExporter, UploadTooLarge, detect_format, spool_upload
+from core.admission import (
+    ADMISSION_ENABLED, METRIC_KINDS as ADMISSION_METRIC_KINDS, PRIORITY_CACHED_READ, PRIORITY_HEAVY,
+    PRIORITY_INTERACTIVE, AdmissionController, AdmissionMiddleware, RoutePolicy,
+)
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.trustedhost import TrustedHostMiddleware
-from sqlalchemy.orm import Session
-from db import Base, engine, get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import AsyncSessionLocal, Base, advisory_lock, engine, get_async_db, pool_stats
+from chart_store import CHART_ID_PATTERN, CHART_STORE_ENABLED, ChartStore, chart_id_for, charts_json
 from models import LocationCache, HoroscopeCache, LocationUsage
 import requests
 import json
-from timezonefinder import TimezoneFinder
 import pytz
 import swisseph as swe
 import math
+import secrets
 import yaml
 from datetime import date as date_cls, timedelta
 import os
@@ -81,11 +103,136 @@ async def add_security_headers(request: Request, call_next):
     response.headers["Referrer-Policy"] = "no-referrer"
     return response
 
+# Admin-only endpoints and request headers (unset: all of them refused)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def admin_authorized(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and secrets.compare_digest(token, ADMIN_TOKEN)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not admin_authorized(x_admin_token):
+        raise HTTPException(403, detail="Admin token required")
+
+
+# On-demand CPU profiles of live requests (X-Profile header or /debug/profile schedules)
+profiler = Profiler()
+app.add_middleware(ProfilingMiddleware, profiler=profiler, authorized=admin_authorized, router=app.router)
+
+# Peak allocation per route while tracemalloc is started from /debug/memory
+app.add_middleware(MemoryMiddleware, tracker=memory_tracker, router=app.router)
+
+# Admission control: (priority, max concurrent, max queued, max wait seconds) per route.
+# Horoscope and geo reads start before queued chart work; heavy scans get few slots.
+_cached_read = RoutePolicy(PRIORITY_CACHED_READ, 16, 128, 5.0)
+_interactive = RoutePolicy(PRIORITY_INTERACTIVE, 8, 64, 8.0)
+_heavy = RoutePolicy(PRIORITY_HEAVY, 2, 16, 15.0)
+admission = AdmissionController({
+    "/api/horoscope/today": _cached_read,
+    "/api/horoscope/{d}": _cached_read,
+    "/api/geo/search": _cached_read,
+    "/api/geo/reverse": _cached_read,
+    "/v1/chart": _interactive,
+    "/v1/charts/{chart_id}": _cached_read,
+    "/v1/charts/fetch": _cached_read,
+    "/v1/dasha/vimshottari": _interactive,
+    "/v1/dasha/insights": _interactive,
+    "/v1/transits": _interactive,
+    "/v1/predictions": _heavy,
+    "/v1/predictions/timeline": _heavy,
+    "/v1/dasha/vimshottari/tree": _heavy,
+    "/v1/transits/events": _heavy,
+    "/v1/transits/windows": _heavy,
+    # Exports hold their slot while streaming; a second one is refused rather than queued
+    "/v1/charts/bulk": RoutePolicy(PRIORITY_HEAVY, 1, 0, 1.0),
+})
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission, router=app.router)
+
+# Per-route latency, in-flight requests and Server-Timing stage breakdown
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, router=app.router)
+
 # Initialize engines
 chart_pipeline = ChartPipeline()
 dasha_engine = VimshottariDasha()
 transit_calculator = TransitCalculator()
-prediction_engine = PredictionEngine()
+rule_sets = RuleSetManager()
+prediction_cache = PredictionCache()
+prediction_engine = PredictionEngine(rule_sets=rule_sets, cache=prediction_cache)
+prediction_timeline = PredictionTimeline(prediction_engine, transit_calculator)
+# Identical concurrent work shares one computation: daily horoscopes per
+# (date, cell, basis), and charts per input for the web client's parallel /v1 calls
+horoscope_flights = SingleFlight("horoscope")
+chart_flights = SingleFlight("chart", linger=CHART_FLIGHT_LINGER_SECONDS)
+# Bulk exports compute in worker processes, off the event loop
+bulk_exporter = BulkExporter()
+# Charts persisted by /v1/chart; follow-up calls pass ?chart_id= instead of the input
+chart_store = ChartStore()
+stored_chart_flights = SingleFlight("chart_store", linger=CHART_FLIGHT_LINGER_SECONDS)
+
+
+def _chart_for(input_data: ChartInput) -> ChartResponse:
+    # Normalize first so the key (and input_echo of every caller) is the normalized input
+    normalized = chart_pipeline.normalize(input_data)
+    return chart_flights.call(normalized.model_dump_json(), lambda: _identified(chart_pipeline.calculate(normalized)))
+
+
+async def _offload(fn, *args, **kwargs):
+    """Run CPU-bound or blocking work in the threadpool so the event loop keeps
+    serving health checks, metrics and admission meanwhile."""
+    return await run_in_threadpool(profiled, fn, *args, **kwargs)
+
+
+def _identified(chart: ChartResponse) -> ChartResponse:
+    chart.chart_id = chart_id_for(chart.input_echo)
+    return chart
+
+
+async def _stored_chart(input_data: Optional[ChartInput], chart_id: Optional[str]) -> Optional[ChartResponse]:
+    """The stored chart when the request names a chart_id; None when it sends the input instead."""
+    if chart_id is None:
+        if input_data is None:
+            raise HTTPException(422, detail="Send a ChartInput body or a chart_id")
+        return None
+    try:
+        return await stored_chart_flights.run(chart_id, lambda: _load_chart(chart_id))
+    except KeyError:
+        raise HTTPException(404, detail="Unknown or expired chart_id; post the input to /v1/chart again")
+
+
+async def _load_chart(chart_id: str) -> ChartResponse:
+    # Raise rather than return None: a miss must not linger while the chart gets stored
+    chart = await chart_store.get(chart_id)
+    if chart is None:
+        raise KeyError(chart_id)
+    return chart
+
+
+def _parse_utc(value: str) -> datetime:
+    """ISO datetime query value as naive UTC, like the calculations use (ValueError if malformed)"""
+    parsed = datetime.fromisoformat(value)
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def _chart_id_query():
+    return Query(None, pattern=CHART_ID_PATTERN, description="Stored chart (from /v1/chart) in place of the body")
+
+
+@app.on_event("startup")
+async def start_rule_reloader():
+    # Edited rule files are validated and swapped in without a restart
+    rule_sets.start()
+    if CHART_STORE_ENABLED:
+        chart_store.start()
+
+
+@app.on_event("shutdown")
+async def stop_rule_reloader():
+    rule_sets.stop()
+    bulk_exporter.shutdown()
+    chart_store.stop()
 
 # Create tables if not exist
 try:
@@ -129,6 +276,161 @@ async def debug_info():
         return {"error": str(e)}
 
 
+# Connection pool checkout wait statistics for the async engine
+@app.get("/debug/db")
+async def debug_db():
+    return {"pool": pool_stats.snapshot()}
+
+
+@app.get("/debug/rules")
+async def debug_rules():
+    """Loaded rule sets, their versions and any files rejected on reload"""
+    return {**rule_sets.status(), "prediction_cache": prediction_cache.snapshot()}
+
+
+@app.get("/debug/signals")
+async def debug_signals():
+    """Per-signal evaluation counts and time, slowest first"""
+    return {"signals": signal_stats.snapshot()}
+
+
+@app.get("/debug/admission")
+async def debug_admission():
+    """Admission slots, queue depth and shed counts per governed route"""
+    return {"enabled": ADMISSION_ENABLED, **admission.snapshot()}
+
+
+@app.get("/debug/flights")
+async def debug_flights():
+    """Computations led and callers served by another caller's computation"""
+    return {f.name: f.snapshot() for f in (horoscope_flights, chart_flights, stored_chart_flights)}
+
+
+@app.get("/debug/bulk")
+async def debug_bulk():
+    """Bulk export worker pool and running exports"""
+    return bulk_exporter.snapshot()
+
+
+@app.get("/debug/charts", dependencies=[Depends(require_admin)])
+async def debug_charts():
+    """Stored charts, their size and the retention policy (counts the whole table)"""
+    return {"enabled": CHART_STORE_ENABLED, **(await chart_store.snapshot())}
+
+
+@app.post("/debug/charts/evict", dependencies=[Depends(require_admin)])
+async def evict_charts():
+    """Apply retention and capacity eviction now instead of waiting for the next round"""
+    return await chart_store.evict()
+
+
+if METRICS_ENABLED:
+    metrics.register_cache("prediction", lambda: (prediction_cache.hits, prediction_cache.misses))
+    metrics.register_cache("sky_state", sky_state_cache_stats)
+    if ADMISSION_ENABLED:
+        metrics.register_collector(admission.samples, ADMISSION_METRIC_KINDS)
+    metrics.register_cache("chart_store", lambda: (chart_store.hits, chart_store.misses))
+    for flights in (horoscope_flights, chart_flights, stored_chart_flights):
+        # A "hit" is a caller served by another caller's computation
+        metrics.register_cache(f"{flights.name}_flight", lambda f=flights: (f.shared, f.leaders))
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Prometheus scrape endpoint (text exposition format)"""
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# -------- PROFILING (admin) ---------
+
+class ProfileScheduleRequest(BaseModel):
+    route: str = Field(..., description="Route template, e.g. /v1/chart or /api/horoscope/{d}")
+    percent: float = Field(10.0, description="Share of the route's requests to profile")
+    seconds: float = Field(60.0, description="How long the schedule stays armed")
+    mode: str = Field("sample", description="sample (collapsed stacks) or cprofile (pstats)")
+
+
+@app.get("/debug/profile", dependencies=[Depends(require_admin)])
+async def profile_status():
+    """Armed schedules in this worker and where its captures are stored"""
+    return profiler.status()
+
+
+@app.post("/debug/profile/schedule", dependencies=[Depends(require_admin)])
+async def profile_schedule(payload: ProfileScheduleRequest):
+    if payload.route not in {getattr(r, "path", None) for r in app.routes}:
+        raise HTTPException(400, detail=f"Unknown route: {payload.route}")
+    try:
+        profiler.arm(payload.route, payload.percent, payload.seconds, payload.mode)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    return profiler.status()
+
+
+@app.delete("/debug/profile/schedule", dependencies=[Depends(require_admin)])
+async def profile_unschedule(route: Optional[str] = None):
+    profiler.disarm(route)
+    return profiler.status()
+
+
+@app.get("/debug/profile/captures", dependencies=[Depends(require_admin)])
+async def profile_captures():
+    """Captures of this worker, newest first"""
+    return {"captures": profiler.store.list()}
+
+
+@app.get("/debug/profile/captures/{capture_id}", dependencies=[Depends(require_admin)])
+async def profile_capture(capture_id: str):
+    path = profiler.store.path(capture_id)
+    if path is None:
+        raise HTTPException(404, detail="Capture not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+
+# -------- MEMORY (admin) ---------
+
+@app.get("/debug/memory", dependencies=[Depends(require_admin)])
+async def memory_status():
+    """Traced memory, RSS, per-route peak allocation and the snapshots taken"""
+    return memory_tracker.status()
+
+
+@app.post("/debug/memory/start", dependencies=[Depends(require_admin)])
+async def memory_start(frames: int = Query(MEMORY_TRACE_FRAMES, ge=1, le=50), reset: bool = True):
+    if reset:
+        memory_tracker.reset()
+    memory_tracker.start(frames)
+    return memory_tracker.status()
+
+
+@app.post("/debug/memory/stop", dependencies=[Depends(require_admin)])
+async def memory_stop():
+    memory_tracker.stop()
+    return memory_tracker.status()
+
+
+@app.post("/debug/memory/snapshot", dependencies=[Depends(require_admin)])
+async def memory_snapshot():
+    """Take a heap snapshot (seconds on a large heap: off the event loop)"""
+    try:
+        return await _offload(memory_tracker.snapshot)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+
+
+@app.get("/debug/memory/diff", dependencies=[Depends(require_admin)])
+async def memory_diff(
+    base: int = -2,
+    head: int = -1,
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    top: int = Query(25, ge=1, le=500),
+):
+    """Allocation growth between two snapshots (default: the last two)"""
+    try:
+        return await _offload(memory_tracker.diff, base, head, group_by, top)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+
+
 # -------- GEO ENDPOINTS ---------
 
 class GeoQuery(BaseModel):
@@ -141,35 +443,40 @@ class ReverseQuery(BaseModel):
 
 
 @app.post("/api/geo/search")
-async def geo_search(payload: GeoQuery, db: Session = Depends(get_db)):
+async def geo_search(payload: GeoQuery, db: AsyncSession = Depends(get_async_db)):
     q = payload.query.strip()
     if not q:
         return []
     # check cache
     try:
-        cached = (
-            db.query(LocationCache)
-            .filter(LocationCache.query == q, LocationCache.provider == "nominatim")
-            .order_by(LocationCache.created_at.desc())
-            .first()
-        )
+        with span("geo.location_cache_lookup"):
+            cached = (
+                await db.execute(
+                    select(LocationCache)
+                    .filter(LocationCache.query == q, LocationCache.provider == "nominatim")
+                    .order_by(LocationCache.created_at.desc())
+                    .limit(1)
+                )
+            ).scalars().first()
+        record_cache("location", cached is not None)
         if cached:
             return cached.result_json
     except Exception:
         cached = None
     # Nominatim
-    url = "https://nominatim.openstreetmap.org/search"
+    url = f"{NOMINATIM_URL}/search"
     params = {"q": q, "format": "json", "addressdetails": 1, "limit": 5}
     headers = {"User-Agent": "AstroKundli/1.0 (AGPL)"}
-    r = requests.get(url, params=params, headers=headers, timeout=10)
+    with span("geo.nominatim_search"):
+        r = await _offload(requests.get, url, params=params, headers=headers, timeout=10)
     r.raise_for_status()
     items = r.json()
-    tf = TimezoneFinder()
     results = []
     for it in items:
         lat = float(it.get("lat"))
         lon = float(it.get("lon"))
-        tz = tf.timezone_at(lng=lon, lat=lat) or "UTC"
+        with span("geo.timezone"):
+            tz = await _offload(chart_pipeline.timezone_at, lat, lon) or "UTC"
         results.append({
             "name": it.get("display_name"),
             "lat": lat,
@@ -178,42 +485,47 @@ async def geo_search(payload: GeoQuery, db: Session = Depends(get_db)):
         })
     try:
         db.add(LocationCache(query=q, provider="nominatim", result_json=results))
-        db.commit()
+        await db.commit()
     except Exception:
         pass
     return results
 
 
 @app.post("/api/geo/reverse")
-async def geo_reverse(payload: ReverseQuery, db: Session = Depends(get_db)):
+async def geo_reverse(payload: ReverseQuery, db: AsyncSession = Depends(get_async_db)):
     lat = float(payload.lat)
     lon = float(payload.lon)
-    tf = TimezoneFinder()
-    tz = tf.timezone_at(lng=lon, lat=lat) or "UTC"
+    with span("geo.timezone"):
+        tz = await _offload(chart_pipeline.timezone_at, lat, lon) or "UTC"
     # cache key
     q = f"reverse:{round(lat,3)},{round(lon,3)}"
     try:
-        cached = (
-            db.query(LocationCache)
-            .filter(LocationCache.query == q, LocationCache.provider == "nominatim")
-            .order_by(LocationCache.created_at.desc())
-            .first()
-        )
+        with span("geo.location_cache_lookup"):
+            cached = (
+                await db.execute(
+                    select(LocationCache)
+                    .filter(LocationCache.query == q, LocationCache.provider == "nominatim")
+                    .order_by(LocationCache.created_at.desc())
+                    .limit(1)
+                )
+            ).scalars().first()
+        record_cache("location", cached is not None)
         if cached:
             return {**cached.result_json, "tz": tz}
     except Exception:
         cached = None
-    url = "https://nominatim.openstreetmap.org/reverse"
+    url = f"{NOMINATIM_URL}/reverse"
     params = {"lat": lat, "lon": lon, "format": "json", "zoom": 10}
     headers = {"User-Agent": "AstroKundli/1.0 (AGPL)"}
-    r = requests.get(url, params=params, headers=headers, timeout=10)
+    with span("geo.nominatim_reverse"):
+        r = await _offload(requests.get, url, params=params, headers=headers, timeout=10)
     r.raise_for_status()
     j = r.json()
     name = j.get("display_name") or j.get("name") or f"{lat:.3f}, {lon:.3f}"
     result = {"name": name, "lat": lat, "lon": lon, "tz": tz}
     try:
         db.add(LocationCache(query=q, provider="nominatim", result_json=result))
-        db.commit()
+        await db.commit()
     except Exception:
         pass
     return result
@@ -354,16 +666,16 @@ async def horoscope_today(
     lat: float = Query(..., ge=-90, le=90),
     lon: float = Query(..., ge=-180, le=180),
     tz: str | None = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     basis = basis.lower()
     if basis not in ("moon_sign","sun_sign","lagna"):
         raise HTTPException(400, detail="Invalid basis")
-    tf = TimezoneFinder()
-    tzname = tz or (tf.timezone_at(lng=float(lon), lat=float(lat)) or "UTC")
+    with span("geo.timezone"):
+        tzname = tz or (await _offload(chart_pipeline.timezone_at, float(lat), float(lon)) or "UTC")
     tzobj = pytz.timezone(tzname)
     today_local = datetime.now(tzobj).date()
-    return await _horoscope_for_date(today_local, basis, lat, lon, tzname, db)
+    return await _horoscope_coalesced(today_local, basis, lat, lon, tzname, db)
 
 
 @app.get("/api/horoscope/{d}")
@@ -373,49 +685,80 @@ async def horoscope_date(
     lat: float = Query(..., ge=-90, le=90),
     lon: float = Query(..., ge=-180, le=180),
     tz: str | None = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     basis = basis.lower()
     if basis not in ("moon_sign","sun_sign","lagna"):
         raise HTTPException(400, detail="Invalid basis")
-    tf = TimezoneFinder()
-    tzname = tz or (tf.timezone_at(lng=float(lon), lat=float(lat)) or "UTC")
+    with span("geo.timezone"):
+        tzname = tz or (await _offload(chart_pipeline.timezone_at, float(lat), float(lon)) or "UTC")
     if tz and tz not in pytz.all_timezones:
         raise HTTPException(400, detail="Invalid timezone")
     try:
         dt = datetime.strptime(d, "%Y-%m-%d").date()
     except Exception:
         raise HTTPException(400, detail="Invalid date")
-    return await _horoscope_for_date(dt, basis, lat, lon, tzname, db)
+    return await _horoscope_coalesced(dt, basis, lat, lon, tzname, db)
 
 
-async def _horoscope_for_date(day: date_cls, basis: str, lat: float, lon: float, tzname: str, db: Session):
-    lat_r = round_coord(lat)
-    lon_r = round_coord(lon)
-    # record usage
+async def _record_usage(db: AsyncSession, tzname: str, lat_r: float, lon_r: float) -> None:
     try:
         db.add(LocationUsage(tz=tzname, lat_round=lat_r, lon_round=lon_r))
-        db.commit()
+        await db.commit()
     except Exception:
-        pass
+        await db.rollback()
+
+
+async def _horoscope_coalesced(day: date_cls, basis: str, lat: float, lon: float, tzname: str, db: AsyncSession):
+    """_horoscope_for_date with one computation per (date, cell, basis) at a time.
+
+    Every caller records its own usage; the rest waits on the leader, which
+    works in its own session so a disconnecting leader cannot break it. With
+    DB_ADVISORY_LOCKS the leaders of other processes queue on a Postgres lock
+    and then find the rows the first one wrote. Callers in the same cell share
+    the leader's result, as they would a cache hit.
+    """
+    lat_r = round_coord(lat)
+    lon_r = round_coord(lon)
+    await _record_usage(db, tzname, lat_r, lon_r)
+    key = (day.isoformat(), tzname, lat_r, lon_r, basis)
+
+    async def compute():
+        async with advisory_lock("horoscope:" + repr(key)):
+            async with AsyncSessionLocal() as own:
+                return await _horoscope_for_date(day, basis, lat, lon, tzname, own, record_usage=False)
+
+    return await horoscope_flights.run(key, compute)
+
+
+async def _horoscope_for_date(day: date_cls, basis: str, lat: float, lon: float, tzname: str, db: AsyncSession,
+                              record_usage: bool = True):
+    lat_r = round_coord(lat)
+    lon_r = round_coord(lon)
+    if record_usage:
+        await _record_usage(db, tzname, lat_r, lon_r)
     # compute sunrise local
     sunrise_utc = compute_sunrise_utc(lat, lon, day)
     tzobj = pytz.timezone(tzname)
     sunrise_local = sunrise_utc.replace(tzinfo=pytz.UTC).astimezone(tzobj)
     # Attempt cache retrieval for lagna-based requests
     if basis == "lagna":
-        cached = (
-            db.query(HoroscopeCache)
-            .filter(
-                HoroscopeCache.date == day,
-                HoroscopeCache.tz == tzname,
-                HoroscopeCache.lat_round == lat_r,
-                HoroscopeCache.lon_round == lon_r,
-                HoroscopeCache.basis == basis,
-            )
-            .order_by(HoroscopeCache.updated_at.desc())
-            .first()
-        )
+        with span("horoscope.cache_lookup"):
+            cached = (
+                await db.execute(
+                    select(HoroscopeCache)
+                    .filter(
+                        HoroscopeCache.date == day,
+                        HoroscopeCache.tz == tzname,
+                        HoroscopeCache.lat_round == lat_r,
+                        HoroscopeCache.lon_round == lon_r,
+                        HoroscopeCache.basis == basis,
+                    )
+                    .order_by(HoroscopeCache.updated_at.desc())
+                    .limit(1)
+                )
+            ).scalars().first()
+        record_cache("horoscope", cached is not None)
         if cached:
             return {
                 "date": str(day),
@@ -448,19 +791,22 @@ async def _horoscope_for_date(day: date_cls, basis: str, lat: float, lon: float,
     if basis in ("moon_sign","sun_sign"):
         # try cache: fetch any existing rows for this key
         try:
-            cached_rows = (
-                db.query(HoroscopeCache)
-                .filter(
-                    HoroscopeCache.date == day,
-                    HoroscopeCache.tz == tzname,
-                    HoroscopeCache.lat_round == lat_r,
-                    HoroscopeCache.lon_round == lon_r,
-                    HoroscopeCache.basis == basis,
-                )
-                .all()
-            )
+            with span("horoscope.cache_lookup"):
+                cached_rows = (
+                    await db.execute(
+                        select(HoroscopeCache)
+                        .filter(
+                            HoroscopeCache.date == day,
+                            HoroscopeCache.tz == tzname,
+                            HoroscopeCache.lat_round == lat_r,
+                            HoroscopeCache.lon_round == lon_r,
+                            HoroscopeCache.basis == basis,
+                        )
+                    )
+                ).scalars().all()
         except Exception:
             cached_rows = []
+        record_cache("horoscope", len(cached_rows) >= 12)
         if cached_rows and len(cached_rows) >= 12:
             for rec in cached_rows:
                 rows.append({
@@ -494,49 +840,53 @@ async def _horoscope_for_date(day: date_cls, basis: str, lat: float, lon: float,
                 "scores": scores,
                 "astro_facts": facts_out,
             })
+            with span("horoscope.cache_write"):
+                try:
+                    existing = (
+                        await db.execute(
+                            select(HoroscopeCache)
+                            .filter(
+                                HoroscopeCache.date == day,
+                                HoroscopeCache.tz == tzname,
+                                HoroscopeCache.lat_round == lat_r,
+                                HoroscopeCache.lon_round == lon_r,
+                                HoroscopeCache.basis == basis,
+                                HoroscopeCache.rashi == s,
+                            )
+                            .limit(1)
+                        )
+                    ).scalars().first()
+                    if existing:
+                        existing.title = title
+                        existing.body_md = body
+                        existing.highlights = highlights
+                        existing.cautions = cautions
+                        existing.remedy = remedy
+                        existing.scores = scores
+                        existing.astro_facts = facts_out
+                    else:
+                        db.add(HoroscopeCache(
+                            date=day,
+                            tz=tzname,
+                            lat_round=lat_r,
+                            lon_round=lon_r,
+                            basis=basis,
+                            rashi=s,
+                            title=title,
+                            body_md=body,
+                            highlights=highlights,
+                            cautions=cautions,
+                            remedy=remedy,
+                            scores=scores,
+                            astro_facts=facts_out,
+                        ))
+                except Exception:
+                    pass
+        with span("horoscope.cache_write"):
             try:
-                existing = (
-                    db.query(HoroscopeCache)
-                    .filter(
-                        HoroscopeCache.date == day,
-                        HoroscopeCache.tz == tzname,
-                        HoroscopeCache.lat_round == lat_r,
-                        HoroscopeCache.lon_round == lon_r,
-                        HoroscopeCache.basis == basis,
-                        HoroscopeCache.rashi == s,
-                    )
-                    .first()
-                )
-                if existing:
-                    existing.title = title
-                    existing.body_md = body
-                    existing.highlights = highlights
-                    existing.cautions = cautions
-                    existing.remedy = remedy
-                    existing.scores = scores
-                    existing.astro_facts = facts_out
-                else:
-                    db.add(HoroscopeCache(
-                        date=day,
-                        tz=tzname,
-                        lat_round=lat_r,
-                        lon_round=lon_r,
-                        basis=basis,
-                        rashi=s,
-                        title=title,
-                        body_md=body,
-                        highlights=highlights,
-                        cautions=cautions,
-                        remedy=remedy,
-                        scores=scores,
-                        astro_facts=facts_out,
-                    ))
+                await db.commit()
             except Exception:
-                pass
-        try:
-            db.commit()
-        except Exception:
-            pass
+                await db.rollback()
         return {"date": str(day), "tz": tzname, "cards": rows}
     else:
         # lagna-based single result
@@ -550,7 +900,7 @@ async def _horoscope_for_date(day: date_cls, basis: str, lat: float, lon: float,
                 lon=lon,
                 timezone=tzname,
             )
-            chart = chart_pipeline.calculate(inp)
+            chart = await _offload(chart_pipeline.calculate, inp)
             lagna_sign = chart.vedic.lagna_rashi
         except Exception:
             lagna_sign = sign_from_long_sid(sidereal(longs["Sun"]))
@@ -558,48 +908,51 @@ async def _horoscope_for_date(day: date_cls, basis: str, lat: float, lon: float,
         # crude next change estimate: +2h
         next_change_ts = (sunrise_local + timedelta(hours=2)).isoformat()
         # upsert cache row
-        try:
-            existing = (
-                db.query(HoroscopeCache)
-                .filter(
-                    HoroscopeCache.date == day,
-                    HoroscopeCache.tz == tzname,
-                    HoroscopeCache.lat_round == lat_r,
-                    HoroscopeCache.lon_round == lon_r,
-                    HoroscopeCache.basis == basis,
-                )
-                .first()
-            )
-            if existing:
-                existing.lagna_sign = lagna_sign
-                existing.title = title
-                existing.body_md = body
-                existing.highlights = highlights
-                existing.cautions = cautions
-                existing.remedy = remedy
-                existing.scores = scores
-                existing.astro_facts = facts_out
-            else:
-                db.add(
-                    HoroscopeCache(
-                        date=day,
-                        tz=tzname,
-                        lat_round=lat_r,
-                        lon_round=lon_r,
-                        basis=basis,
-                        lagna_sign=lagna_sign,
-                        title=title,
-                        body_md=body,
-                        highlights=highlights,
-                        cautions=cautions,
-                        remedy=remedy,
-                        scores=scores,
-                        astro_facts=facts_out,
+        with span("horoscope.cache_write"):
+            try:
+                existing = (
+                    await db.execute(
+                        select(HoroscopeCache)
+                        .filter(
+                            HoroscopeCache.date == day,
+                            HoroscopeCache.tz == tzname,
+                            HoroscopeCache.lat_round == lat_r,
+                            HoroscopeCache.lon_round == lon_r,
+                            HoroscopeCache.basis == basis,
+                        )
+                        .limit(1)
                     )
-                )
-            db.commit()
-        except Exception:
-            pass
+                ).scalars().first()
+                if existing:
+                    existing.lagna_sign = lagna_sign
+                    existing.title = title
+                    existing.body_md = body
+                    existing.highlights = highlights
+                    existing.cautions = cautions
+                    existing.remedy = remedy
+                    existing.scores = scores
+                    existing.astro_facts = facts_out
+                else:
+                    db.add(
+                        HoroscopeCache(
+                            date=day,
+                            tz=tzname,
+                            lat_round=lat_r,
+                            lon_round=lon_r,
+                            basis=basis,
+                            lagna_sign=lagna_sign,
+                            title=title,
+                            body_md=body,
+                            highlights=highlights,
+                            cautions=cautions,
+                            remedy=remedy,
+                            scores=scores,
+                            astro_facts=facts_out,
+                        )
+                    )
+                await db.commit()
+            except Exception:
+                await db.rollback()
         return {
             "date": str(day),
             "tz": tzname,
@@ -626,92 +979,322 @@ async def create_chart(input_data: ChartInput):
     3. Swiss Ephemeris calculations
     4. Vedic transforms (sidereal, ayanamsa, nakshatras, vargas)
     5. Western transforms (tropical, aspects)
+
+    The chart is stored under its chart_id, which other /v1 routes accept in
+    place of the input; a chart stored before is returned without recomputing.
     """
+    chart = None
+    if CHART_STORE_ENABLED:
+        chart_id = chart_id_for(chart_pipeline.normalize(input_data))
+        try:
+            chart = await stored_chart_flights.run(chart_id, lambda: _load_chart(chart_id))
+        except Exception:
+            pass  # not stored yet, or store unavailable: compute as usual
     try:
-        chart = chart_pipeline.calculate(input_data)
-        return chart
+        if chart is None:
+            chart = await _offload(_chart_for, input_data)
+            if CHART_STORE_ENABLED:
+                try:
+                    await chart_store.put(chart)
+                except Exception:
+                    pass
+        if core_models.VALIDATE_INTERNAL_MODELS:
+            return chart
+        # Built from computed values: serialize directly instead of letting
+        # response_model validate the whole chart again (the schema is unchanged)
+        return Response(chart.model_dump_json(), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/v1/charts/bulk")
+async def bulk_charts(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="csv or ndjson (default: from Content-Type)"),
+    order: str = Query("input", description="input or completion"),
+    offset: int = Query(0, ge=0, description="Skip records before this index (resume)"),
+):
+    """
+    Birth charts for an uploaded file of ChartInput records, streamed as NDJSON
+
+    The body is CSV (header row of ChartInput field names) or NDJSON. Each
+    output line is {"index", "chart"} or {"index", "error"}, in input order or
+    as charts complete, followed by a {"summary"} line. After a dropped
+    connection, upload the file again with offset = the next index needed.
+    """
+    fmt = fmt or detect_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(400, detail="Send Content-Type text/csv or application/x-ndjson, or pass format")
+    try:
+        upload = await spool_upload(request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(413, detail=str(e))
+    try:
+        body = bulk_exporter.stream(upload, fmt, order, offset)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    return StreamingResponse(body, media_type="application/x-ndjson")
+
+
+@app.get("/v1/charts/{chart_id}", response_model=ChartResponse)
+async def get_chart(chart_id: str = Path(..., pattern=CHART_ID_PATTERN)):
+    """A chart stored by /v1/chart, as stored"""
+    found = await chart_store.get_json([chart_id])
+    if chart_id not in found:
+        raise HTTPException(404, detail="Unknown or expired chart_id")
+    return Response(found[chart_id], media_type="application/json")
+
+
+class ChartFetchRequest(BaseModel):
+    chart_ids: List[Annotated[str, Field(pattern=CHART_ID_PATTERN)]] = Field(..., min_length=1, max_length=100)
+
+
+@app.post("/v1/charts/fetch")
+async def fetch_charts(payload: ChartFetchRequest):
+    """
+    Stored charts for up to 100 chart_ids in one call
+
+    Returns {"charts": [...], "missing": [...]}, charts in request order.
+    """
+    found = await chart_store.get_json(payload.chart_ids)
+    return Response(charts_json(found, payload.chart_ids), media_type="application/json")
+
+
 @app.post("/v1/dasha/vimshottari")
-async def calculate_vimshottari_dasha(input_data: ChartInput):
+async def calculate_vimshottari_dasha(input_data: Optional[ChartInput] = None, chart_id: Optional[str] = _chart_id_query()):
     """
     Calculate Vimshottari Dasha periods (Maha + Antar + Pratyantar)
     """
+    stored = await _stored_chart(input_data, chart_id)
     try:
-        chart = chart_pipeline.calculate(input_data)
-        dashas = dasha_engine.calculate(chart.vedic.moon_longitude)
+        chart = stored or await _offload(_chart_for, input_data)
+        dashas = await _offload(dasha_engine.calculate, chart.vedic.moon_longitude)
         return {
             "calculation_version": "1.0.0",
-            "input_echo": input_data.dict(),
+            "input_echo": chart.input_echo.dict(),
             "dashas": dashas,
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/v1/dasha/vimshottari/tree")
+async def vimshottari_dasha_tree(
+    input_data: Optional[ChartInput] = None,
+    chart_id: Optional[str] = _chart_id_query(),
+    level: str = Query("Pratyantar"),
+    at: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+):
+    """
+    Deep Vimshottari timeline (Maha → Antar → Pratyantar → Sookshma → Prana)
+
+    Returns the active chain at `at` (default: now) and every period at `level`
+    overlapping [start, end) (default: one year from `at`), generated lazily.
+    """
+    if level not in DASHA_LEVELS:
+        raise HTTPException(400, detail=f"Invalid level; expected one of {DASHA_LEVELS}")
+    try:
+        at_dt = _parse_utc(at) if at else datetime.utcnow()
+        start_dt = _parse_utc(start) if start else at_dt
+        end_dt = _parse_utc(end) if end else start_dt + timedelta(days=365)
+    except ValueError as e:
+        raise HTTPException(400, detail=f"Invalid at/start/end: {e}")
+    stored = await _stored_chart(input_data, chart_id)
+    try:
+        chart = stored or await _offload(_chart_for, input_data)
+        birth_utc = chart.astronomy.utc_datetime.replace(tzinfo=None)
+        tree = DashaTree(chart.vedic.moon_longitude, birth_utc)
+        active = [n.to_period(at_dt) for n in tree.active(at_dt, level="Prana")]
+        periods = await _offload(lambda: [n.to_period(at_dt) for n in tree.periods(level, start_dt, end_dt)])
+        return {
+            "calculation_version": "1.0.0",
+            "input_echo": chart.input_echo.dict(),
+            "active": active,
+            "periods": periods,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/v1/transits")
-async def calculate_transits(input_data: ChartInput, date: Optional[str] = None):
+async def calculate_transits(input_data: Optional[ChartInput] = None, date: Optional[str] = None,
+                             chart_id: Optional[str] = _chart_id_query()):
     """
     Calculate current transits (Gochar) for birth chart
     """
+    stored = await _stored_chart(input_data, chart_id)
     try:
-        chart = chart_pipeline.calculate(input_data)
+        chart = stored or await _offload(_chart_for, input_data)
         transit_date = datetime.fromisoformat(date) if date else datetime.utcnow()
-        transits = transit_calculator.calculate(chart, transit_date)
+        transits = await _offload(transit_calculator.calculate, chart, transit_date)
         return {
             "calculation_version": "1.0.0",
-            "input_echo": input_data.dict(),
+            "input_echo": chart.input_echo.dict(),
             "transits": transits,
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/v1/transits/events")
+async def transit_events(
+    input_data: Optional[ChartInput] = None,
+    chart_id: Optional[str] = _chart_id_query(),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    planets: Optional[str] = Query(None, description="Comma-separated, e.g. Saturn,Jupiter"),
+    kinds: Optional[str] = Query(None, description=f"Comma-separated subset of {','.join(EVENT_KINDS)}"),
+):
+    """
+    Transit events (ingresses, stations, exact aspects to natal points) in [start, end)
+
+    Defaults to the next 12 months. Houses are counted from natal Moon and Lagna.
+    """
+    try:
+        start_dt = _parse_utc(start) if start else datetime.utcnow()
+        end_dt = _parse_utc(end) if end else start_dt + timedelta(days=365)
+    except ValueError as e:
+        raise HTTPException(400, detail=f"Invalid start/end: {e}")
+    if end_dt <= start_dt or (end_dt - start_dt).days > 3660:
+        raise HTTPException(400, detail="Range must be positive and at most 10 years")
+    planet_list = [p.strip() for p in planets.split(",") if p.strip()] if planets else None
+    kind_list = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    stored = await _stored_chart(input_data, chart_id)
+    try:
+        chart = stored or await _offload(_chart_for, input_data)
+        search = TransitEventSearch()
+        events = await _offload(lambda: list(search.events(start_dt, end_dt, planets=planet_list, kinds=kind_list,
+                                                           natal_chart=chart)))
+        return {
+            "calculation_version": "1.0.0",
+            "input_echo": chart.input_echo.dict(),
+            "range": {"start": start_dt.isoformat(), "end": end_dt.isoformat()},
+            "events": events,
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/v1/transits/windows")
+async def transit_windows(
+    input_data: Optional[ChartInput] = None,
+    chart_id: Optional[str] = _chart_id_query(),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    kinds: Optional[str] = Query(None, description=f"Comma-separated subset of {','.join(LongCycleWindows.KINDS)}"),
+):
+    """
+    Long-cycle windows: Sade Sati, Ashtama Shani, Jupiter returns, Rahu/Ketu axis
+
+    Defaults to 100 years from birth. Each window lists its phases, including
+    retrograde exits and re-entries.
+    """
+    kind_list = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    stored = await _stored_chart(input_data, chart_id)
+    try:
+        chart = stored or await _offload(_chart_for, input_data)
+        birth_utc = chart.astronomy.utc_datetime.replace(tzinfo=None)
+        start_dt = _parse_utc(start) if start else birth_utc
+        end_dt = _parse_utc(end) if end else start_dt + timedelta(days=int(100 * 365.25))
+        windows = await _offload(LongCycleWindows().for_chart, chart, start_dt, end_dt, kinds=kind_list)
+        return {
+            "calculation_version": "1.0.0",
+            "input_echo": chart.input_echo.dict(),
+            "range": {"start": start_dt.isoformat(), "end": end_dt.isoformat()},
+            "windows": windows,
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _predict(chart: ChartResponse):
+    dashas = dasha_engine.calculate(chart.vedic.moon_longitude)
+    transits = transit_calculator.calculate(chart, datetime.utcnow())
+    return prediction_engine.generate(chart, dashas, transits)
+
+
 @app.post("/v1/predictions")
-async def generate_predictions(input_data: ChartInput):
+async def generate_predictions(input_data: Optional[ChartInput] = None, chart_id: Optional[str] = _chart_id_query()):
     """
     Generate predictions using Rule DSL engine
     Returns: Now, Next 90 days, Next 12 months predictions with evidence
     """
+    stored = await _stored_chart(input_data, chart_id)
     try:
-        chart = chart_pipeline.calculate(input_data)
-        dashas = dasha_engine.calculate(chart.vedic.moon_longitude)
-        transits = transit_calculator.calculate(chart, datetime.utcnow())
-        
-        result = prediction_engine.generate(chart, dashas, transits)
+        chart = stored or await _offload(_chart_for, input_data)
+        result = await _offload(_predict, chart)
         # Backward-compatible shape: if engine returned only predictions dict, keep as-is.
         # If engine returned {predictions, summary}, expose both at top-level.
         if isinstance(result, dict) and "predictions" in result:
             return {
                 "calculation_version": "1.0.0",
-                "input_echo": input_data.dict(),
+                "input_echo": chart.input_echo.dict(),
                 "predictions": result["predictions"],
-                "summary": result.get("summary")
+                "summary": result.get("summary"),
+                "rule_versions": result.get("rule_versions"),
             }
         else:
             return {
                 "calculation_version": "1.0.0",
-                "input_echo": input_data.dict(),
+                "input_echo": chart.input_echo.dict(),
                 "predictions": result,
             }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/v1/predictions/timeline")
+async def prediction_timeline_scan(
+    input_data: Optional[ChartInput] = None,
+    chart_id: Optional[str] = _chart_id_query(),
+    start: Optional[str] = None,
+    days: int = Query(365, ge=1, le=3660),
+    step_hours: float = Query(24, gt=0, description="Scan resolution"),
+    systems: Optional[str] = Query(None, description="Comma-separated rule sets, e.g. vedic"),
+):
+    """
+    Date intervals in [start, start + days) during which each rule fires,
+    stepping transits and active dashas at the given resolution
+    """
+    system_list = [s.strip() for s in systems.split(",") if s.strip()] if systems else None
+    stored = await _stored_chart(input_data, chart_id)
+    try:
+        start_dt = datetime.fromisoformat(start) if start else datetime.utcnow()
+        end_dt = start_dt + timedelta(days=days)
+        chart = stored or await _offload(_chart_for, input_data)
+        result = await _offload(prediction_timeline.scan, chart, start_dt, end_dt, timedelta(hours=step_hours),
+                                system_list)
+        return {
+            "calculation_version": "1.0.0",
+            "input_echo": chart.input_echo.dict(),
+            "range": {"start": start_dt.isoformat(), "end": end_dt.isoformat(), "step_hours": step_hours},
+            **result,
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/v1/dasha/insights")
-async def dasha_insights(input_data: ChartInput):
+async def dasha_insights(input_data: Optional[ChartInput] = None, chart_id: Optional[str] = _chart_id_query()):
     """
     Generate personalized Mahadasha/Antardasha insights using chart context
     """
+    stored = await _stored_chart(input_data, chart_id)
     try:
-        chart = chart_pipeline.calculate(input_data)
-        dashas = dasha_engine.calculate(chart.vedic.moon_longitude)
-        insights = generate_insights(chart, dashas)
+        chart = stored or await _offload(_chart_for, input_data)
+        dashas = await _offload(dasha_engine.calculate, chart.vedic.moon_longitude)
+        insights = await _offload(generate_insights, chart, dashas)
         return {
             "calculation_version": "1.0.0",
-            "input_echo": input_data.dict(),
+            "input_echo": chart.input_echo.dict(),
             **insights,
         }
     except Exception as e:
@@ -723,14 +1306,13 @@ if __name__ == "__main__":
 else:
     # Ensure a minimal alias route is available even if older routers are missing
     @app.get("/api/horoscope/today2")
-    async def horoscope_today2(basis: str, lat: float, lon: float, tz: str | None = None, db: Session = Depends(get_db)):
+    async def horoscope_today2(basis: str, lat: float, lon: float, tz: str | None = None, db: AsyncSession = Depends(get_async_db)):
         basis = basis.lower()
         if basis not in ("moon_sign","sun_sign","lagna"):
             raise HTTPException(400, detail="Invalid basis")
-        tf = TimezoneFinder()
-        tzname = tz or (tf.timezone_at(lng=float(lon), lat=float(lat)) or "UTC")
+        tzname = tz or (await _offload(chart_pipeline.timezone_at, float(lat), float(lon)) or "UTC")
         if tz and tz not in pytz.all_timezones:
             raise HTTPException(400, detail="Invalid timezone")
         tzobj = pytz.timezone(tzname)
         today_local = datetime.now(tzobj).date()
-        return await _horoscope_for_date(today_local, basis, lat, lon, tzname, db)
+        return await _horoscope_coalesced(today_local, basis, lat, lon, tzname, db)
@@ -1,5 +1,4 @@
-from sqlalchemy import Column, String, Text, Date, DateTime, Numeric, JSON, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Date, DateTime, Numeric, JSON, UniqueConstraint, Uuid, Integer, LargeBinary
 from sqlalchemy.sql import func
 import uuid
 from db import Base
@@ -7,7 +6,7 @@ from db import Base
 
 class LocationCache(Base):
     __tablename__ = "locations_cache"
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     query = Column(Text, nullable=False)
     provider = Column(String(50), nullable=False)
     result_json = Column(JSON, nullable=False)
@@ -16,7 +15,7 @@ class LocationCache(Base):
 
 class HoroscopeCache(Base):
     __tablename__ = "horoscope_cache"
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     date = Column(Date, nullable=False)
     tz = Column(String(64), nullable=False)
     lat_round = Column(Numeric(6, 2), nullable=False)
@@ -44,8 +43,18 @@ class HoroscopeCache(Base):
 
 class LocationUsage(Base):
     __tablename__ = "location_usage"
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tz = Column(String(64), nullable=False)
     lat_round = Column(Numeric(6, 2), nullable=False)
     lon_round = Column(Numeric(6, 2), nullable=False)
     hit_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ChartRecord(Base):
+    __tablename__ = "chart_store"
+    chart_id = Column(String(32), primary_key=True)  # see chart_store.chart_id_for
+    payload = Column(LargeBinary, nullable=False)  # compressed ChartResponse JSON
+    size = Column(Integer, nullable=False)
+    calculation_version = Column(String(16), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,431 @@
+"""
+Offline bulk chart computation
+Charts, active dashas and signals for a file of ChartInput records, computed
+across all cores and written as a columnar table (SQLite or Parquet)
+
+    python precompute.py users.csv --at 2025-01-01 --output charts.sqlite
+    python precompute.py users.parquet --at 2025-01-01 --format parquet --output charts/
+
+Input is CSV (header of ChartInput field names), NDJSON or Parquet. Records
+are cut into chunks of --chunk-size and each worker process computes whole
+chunks with its own ChartPipeline; chunks are written in input order, each
+one a checkpoint. --resume continues an interrupted run from the last written
+chunk, and --max-chunks stops after that many so long jobs can be split.
+
+Output depends only on the input file, --at and --chunk-size: dashas and
+transits are taken at --at rather than the current time, so a rerun, with any
+number of workers and however often resumed, produces the same bytes. SQLite
+runs write to <output>.partial and VACUUM INTO the output when complete;
+Parquet runs write one part file per chunk plus _SUCCESS. Records without
+coordinates are geocoded through Nominatim, which is neither offline nor
+deterministic: give lat/lon for bulk runs.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from core.bulk_export import CSV_FIELDS, Record, describe_validation_error, read_records
+from core.dasha_tree import DashaTree
+from core.models import ChartInput
+from core.pipeline import ChartPipeline
+from core.signals import compute_signals
+from core.transits import TransitCalculator
+
+
+CALCULATION_VERSION = "1.0.0"
+DEFAULT_CHUNK_SIZE = 256
+
+# (column, type): int, float, bool or str; nested values are JSON text
+COLUMNS: List[Tuple[str, str]] = [
+    ("idx", "int"),
+    ("name", "str"),
+    ("local_datetime", "str"),
+    ("place", "str"),
+    ("lat", "float"),
+    ("lon", "float"),
+    ("timezone", "str"),
+    ("unknown_time", "bool"),
+    ("utc_datetime", "str"),
+    ("julian_day", "float"),
+    ("ayanamsa", "float"),
+    ("ascendant", "float"),
+    ("lagna_rashi", "str"),
+    ("moon_longitude", "float"),
+    ("moon_nakshatra", "str"),
+    ("planets", "str"),
+    ("maha_lord", "str"),
+    ("maha_start", "str"),
+    ("maha_end", "str"),
+    ("antar_lord", "str"),
+    ("antar_start", "str"),
+    ("antar_end", "str"),
+    ("signals", "str"),
+    ("error", "str"),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+_SQLITE_TYPES = {"int": "INTEGER", "float": "REAL", "bool": "INTEGER", "str": "TEXT"}
+
+Row = Tuple[Any, ...]
+Chunk = Tuple[int, List[Tuple[int, Record]]]
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+# ---- per-process computation ----
+
+_state: Optional[Tuple[ChartPipeline, TransitCalculator]] = None
+
+
+def _init_worker() -> None:
+    global _state
+    _state = (ChartPipeline(), TransitCalculator())
+
+
+def compute_chunk(task: Tuple[Chunk, datetime]) -> Tuple[int, List[Row]]:
+    (chunk_no, records), at = task
+    if _state is None:
+        _init_worker()
+    return chunk_no, [compute_row(index, record, at) for index, record in records]
+
+
+def compute_row(index: int, record: Record, at: datetime) -> Row:
+    """One output row; error rows carry only idx and error."""
+    pipeline, transit_calc = _state
+    row: Dict[str, Any] = dict.fromkeys(COLUMN_NAMES)
+    row["idx"] = index
+    try:
+        if isinstance(record, str):
+            raise ValueError(record)
+        chart = pipeline.calculate(ChartInput(**record))
+    except ValidationError as e:
+        row["error"] = describe_validation_error(e)
+        return tuple(row.values())
+    except Exception as e:
+        row["error"] = str(e)
+        return tuple(row.values())
+
+    given = chart.input_echo
+    row.update(
+        name=given.name,
+        local_datetime=given.local_datetime.isoformat(),
+        place=given.place,
+        lat=given.lat,
+        lon=given.lon,
+        timezone=given.timezone,
+        unknown_time=given.unknown_time,
+        utc_datetime=chart.astronomy.utc_datetime.isoformat(),
+        julian_day=chart.astronomy.julian_day,
+        ayanamsa=chart.vedic.ayanamsa,
+        ascendant=chart.vedic.ascendant.longitude,
+        lagna_rashi=chart.vedic.lagna_rashi,
+        moon_longitude=chart.vedic.moon_longitude,
+        moon_nakshatra=next((p.nakshatra for p in chart.vedic.planets if p.name == "Moon"), None),
+        planets=_json({
+            p.name: {"longitude": p.longitude, "rashi": p.rashi, "nakshatra": p.nakshatra,
+                     "pada": p.pada, "house": p.house, "retrograde": p.retrograde}
+            for p in chart.vedic.planets
+        }),
+    )
+
+    # Periods running at `at`, not now, so reruns agree (as in PredictionTimeline)
+    birth = chart.astronomy.utc_datetime.replace(tzinfo=None)
+    chain = DashaTree(chart.vedic.moon_longitude, birth).active(at, "Antar")
+    for level, node in zip(("maha", "antar"), chain):
+        row[f"{level}_lord"] = node.lord
+        row[f"{level}_start"] = node.start.isoformat()
+        row[f"{level}_end"] = node.end.isoformat()
+    dashas = [node.to_period(at) for node in chain]
+    transits = transit_calc.calculate(chart, at)
+    row["signals"] = _json(compute_signals(chart, dashas, transits))
+    return tuple(row.values())
+
+
+# ---- input ----
+
+def input_format(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        return "parquet"
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if suffix == ".csv":
+        return "csv"
+    raise ValueError(f"Unknown input type {suffix!r}; expected .csv, .ndjson, .jsonl or .parquet")
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_input(path: Path) -> Iterator[Tuple[int, Record]]:
+    fmt = input_format(path)
+    if fmt != "parquet":
+        return read_records(open(path, "rb"), fmt)
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet input needs pyarrow (pip install pyarrow)")
+    return _parquet_records(pq.ParquetFile(path))
+
+
+def _parquet_records(source) -> Iterator[Tuple[int, Record]]:
+    columns = [name for name in source.schema_arrow.names if name in CSV_FIELDS]
+    index = 0
+    for batch in source.iter_batches(batch_size=DEFAULT_CHUNK_SIZE, columns=columns):
+        for record in batch.to_pylist():
+            yield index, {k: v for k, v in record.items() if v is not None}
+            index += 1
+
+
+def chunked(records: Iterator[Tuple[int, Record]], size: int, start: int = 0) -> Iterator[Chunk]:
+    """Consecutive chunks of `size` records, numbered from 0; those before `start` are read but not yielded."""
+    chunk: List[Tuple[int, Record]] = []
+    number = 0
+    for item in records:
+        chunk.append(item)
+        if len(chunk) == size:
+            if number >= start:
+                yield number, chunk
+            chunk, number = [], number + 1
+    if chunk and number >= start:
+        yield number, chunk
+
+
+# ---- output ----
+
+class SQLiteSink:
+    """Rows in table `charts`; progress in <output>.partial until finished."""
+
+    def __init__(self, path: Path, meta: Dict[str, str], resume: bool):
+        self.path = path
+        self.work = path.with_name(path.name + ".partial")
+        if path.exists():
+            raise FileExistsError(f"{path} exists; remove it to recompute")
+        if self.work.exists() and not resume:
+            raise FileExistsError(f"{self.work} holds an interrupted run; pass --resume or remove it")
+        self.conn = sqlite3.connect(self.work)
+        columns = ", ".join(f"{name} {_SQLITE_TYPES[kind]}" + (" PRIMARY KEY" if name == "idx" else "")
+                            for name, kind in COLUMNS)
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS charts ({columns})")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            stored = dict(self.conn.execute("SELECT key, value FROM meta WHERE key != 'next_chunk'"))
+            _check_meta(stored, meta, self.work)
+            self.conn.executemany("INSERT OR IGNORE INTO meta VALUES (?, ?)", sorted(meta.items()))
+
+    def next_chunk(self) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_chunk'").fetchone()
+        return int(row[0]) if row else 0
+
+    def write(self, chunk_no: int, rows: Sequence[Row]) -> None:
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self.conn:  # rows and checkpoint commit together
+            self.conn.executemany(f"INSERT OR REPLACE INTO charts VALUES ({placeholders})", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('next_chunk', ?)", (str(chunk_no + 1),))
+
+    def finish(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM meta WHERE key = 'next_chunk'")
+        # A fresh file, so page layout and header counters don't depend on how often the run was resumed
+        self.conn.execute("VACUUM INTO ?", (str(self.path),))
+        self.close()
+        self.work.unlink()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class ParquetSink:
+    """One part-NNNNNN.parquet per chunk in the output directory; _SUCCESS when finished."""
+
+    def __init__(self, path: Path, meta: Dict[str, str], resume: bool):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet output needs pyarrow (pip install pyarrow); use --format sqlite")
+        self._pa, self._pq = pa, pq
+        types = {"int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(), "str": pa.string()}
+        self.schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+        self.path = path
+        if (path / "_SUCCESS").exists():
+            raise FileExistsError(f"{path} holds a finished run; remove it to recompute")
+        meta_file = path / "_meta.json"
+        if meta_file.exists() and not resume:
+            raise FileExistsError(f"{path} holds an interrupted run; pass --resume or remove it")
+        path.mkdir(parents=True, exist_ok=True)
+        if meta_file.exists():
+            _check_meta(json.loads(meta_file.read_text(encoding="utf-8")), meta, path)
+        else:
+            meta_file.write_text(_json(meta) + "\n", encoding="utf-8")
+
+    def _part(self, chunk_no: int) -> Path:
+        return self.path / f"part-{chunk_no:06d}.parquet"
+
+    def next_chunk(self) -> int:
+        n = 0
+        while self._part(n).exists():
+            n += 1
+        return n
+
+    def write(self, chunk_no: int, rows: Sequence[Row]) -> None:
+        columns = list(zip(*rows))
+        table = self._pa.table(
+            [self._pa.array(list(values), type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        tmp = self._part(chunk_no).with_suffix(".tmp")
+        self._pq.write_table(table, tmp)
+        os.replace(tmp, self._part(chunk_no))  # a part either exists whole or not at all
+
+    def finish(self) -> None:
+        (self.path / "_SUCCESS").touch()
+
+    def close(self) -> None:
+        pass
+
+
+SINKS = {"sqlite": SQLiteSink, "parquet": ParquetSink}
+
+
+def _check_meta(stored: Dict[str, str], meta: Dict[str, str], where: Path) -> None:
+    if stored and stored != meta:
+        changed = sorted(k for k in meta if stored.get(k) != meta[k])
+        raise ValueError(f"{where} was started with a different {', '.join(changed)}; remove it to recompute")
+
+
+# ---- driver ----
+
+class Progress:
+    """Records/second on stderr: redrawn in place on a terminal, every 10 s otherwise."""
+
+    def __init__(self, enabled: bool = True, stream=sys.stderr):
+        self.enabled = enabled
+        self.stream = stream
+        self.tty = stream.isatty()
+        self.interval = 0.5 if self.tty else 10.0
+        self.started = self._shown = time.monotonic()
+
+    def update(self, records: int, errors: int, chunk: int, final: bool = False) -> None:
+        now = time.monotonic()
+        if not self.enabled or (not final and now - self._shown < self.interval):
+            return
+        self._shown = now
+        elapsed = now - self.started
+        rate = records / elapsed if elapsed > 0 else 0.0
+        line = f"chunk {chunk}  {records} records  {errors} errors  {rate:.1f} rec/s  {elapsed:.0f}s"
+        if self.tty:
+            self.stream.write("\r" + line + ("\n" if final else ""))
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+
+def run(input_path: Path, output: Path, at: datetime, fmt: str = "sqlite", workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = False, max_chunks: Optional[int] = None,
+        progress: Optional[Progress] = None) -> Dict[str, Any]:
+    """Compute every record of input_path into output; returns run statistics."""
+    if chunk_size < 1:
+        raise ValueError("chunk size must be positive")
+    workers = workers or os.cpu_count() or 1
+    progress = progress or Progress(enabled=False)
+    input_format(input_path)
+    meta = {
+        "calculation_version": CALCULATION_VERSION,
+        "input_sha256": file_digest(input_path),
+        "at": at.isoformat(),
+        "chunk_size": str(chunk_size),
+    }
+    sink = SINKS[fmt](output, meta, resume)
+    start = sink.next_chunk()
+    chunks = chunked(read_input(input_path), chunk_size, start)
+    records = errors = written = 0
+    finished = False
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            # Chunks are written in order; a couple per worker are queued ahead so none idles
+            queued: Deque[Any] = deque()
+            while True:
+                while len(queued) < 2 * workers and (max_chunks is None or written + len(queued) < max_chunks):
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    queued.append(pool.apply_async(compute_chunk, ((chunk, at),)))
+                if not queued:
+                    break
+                chunk_no, rows = queued.popleft().get()
+                sink.write(chunk_no, rows)
+                written += 1
+                records += len(rows)
+                errors += sum(1 for row in rows if row[-1] is not None)
+                progress.update(records, errors, chunk_no)
+        finished = max_chunks is None or next(chunks, None) is None
+        if finished:
+            sink.finish()
+    finally:
+        if not finished:
+            sink.close()
+    elapsed = time.monotonic() - progress.started
+    progress.update(records, errors, start + written - 1, final=True)
+    return {
+        "output": str(output),
+        "complete": finished,
+        "resumed_from_chunk": start,
+        "chunks": written,
+        "records": records,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(records / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def _utc(value: str) -> datetime:
+    at = datetime.fromisoformat(value)
+    return at.astimezone(timezone.utc).replace(tzinfo=None) if at.tzinfo else at
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", type=Path, help=".csv, .ndjson/.jsonl or .parquet")
+    parser.add_argument("--output", type=Path, required=True, help="SQLite file, or directory for parquet")
+    parser.add_argument("--at", type=_utc, required=True,
+                        help="UTC instant for active dashas and transits, e.g. 2025-01-01")
+    parser.add_argument("--format", dest="fmt", choices=sorted(SINKS), default="sqlite")
+    parser.add_argument("--workers", type=int, help="processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="records per checkpoint (part of the output's identity)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run")
+    parser.add_argument("--max-chunks", type=int, help="stop after this many chunks (resume later)")
+    parser.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = run(args.input, args.output, args.at, args.fmt, args.workers,
+                    args.chunk_size, args.resume, args.max_chunks, Progress(enabled=not args.quiet))
+    except (ValueError, FileExistsError, FileNotFoundError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
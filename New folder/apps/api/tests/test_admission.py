@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.admission import AdmissionController, AdmissionMiddleware, RoutePolicy, Shed
+
+READ = RoutePolicy(priority=0, max_concurrent=4, max_queue=8, max_wait=1.0)
+HEAVY = RoutePolicy(priority=2, max_concurrent=1, max_queue=2, max_wait=1.0)
+
+
+def test_cached_reads_start_before_queued_heavy_work():
+    ctl = AdmissionController({"/read": READ, "/heavy": HEAVY}, capacity=1)
+    order = []
+
+    async def request(route):
+        await ctl.acquire(route)
+        order.append(route)
+        await asyncio.sleep(0.01)
+        ctl.release(route, 0.01)
+
+    async def run():
+        await ctl.acquire("/heavy")  # occupies the only slot
+        tasks = [asyncio.ensure_future(request(r)) for r in ("/heavy", "/read", "/read")]
+        await asyncio.sleep(0)
+        assert ctl.snapshot()["routes"]["/heavy"]["queued"] == 1
+        ctl.release("/heavy", 0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["/read", "/read", "/heavy"]
+
+
+def test_full_queue_and_expected_wait_shed_immediately():
+    ctl = AdmissionController({"/heavy": HEAVY}, capacity=4)
+
+    async def run():
+        await ctl.acquire("/heavy")
+        waiters = [asyncio.ensure_future(ctl.acquire("/heavy")) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Shed) as full:
+            await ctl.acquire("/heavy")
+        for w in waiters:
+            w.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+        ctl._routes["/heavy"].service_s = 5.0  # one request already takes longer than max_wait
+        with pytest.raises(Shed) as late:
+            await ctl.acquire("/heavy")
+        return full.value, late.value
+
+    full, late = asyncio.run(run())
+    assert (full.reason, late.reason, late.retry_after) == ("queue_full", "deadline", 5)
+    routes = ctl.snapshot()["routes"]["/heavy"]
+    assert routes["queued"] == 0 and routes["shed"] == {"queue_full": 1, "deadline": 1}
+
+
+def test_waiter_is_shed_when_its_deadline_passes():
+    ctl = AdmissionController({"/heavy": HEAVY}, capacity=4)
+
+    async def run():
+        await ctl.acquire("/heavy")
+        with pytest.raises(Shed) as e:
+            await ctl.acquire("/heavy", budget=0.02)
+        return e.value
+
+    assert asyncio.run(run()).reason == "deadline"
+    assert ctl.snapshot()["routes"]["/heavy"]["queued"] == 0
+
+
+def test_middleware_rejects_with_retry_after_and_skips_ungoverned_routes():
+    ctl = AdmissionController({"/slow": RoutePolicy(2, 1, 0, 1.0)}, capacity=4)
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=ctl, router=app.router)
+
+    @app.get("/slow")
+    async def slow():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/slow").status_code == 200
+
+    ctl.active = ctl._routes["/slow"].active = 1  # as if a request were running
+    r = client.get("/slow")
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
+    assert r.json()["detail"].startswith("Server busy")
+    assert client.get("/health").status_code == 200
+    assert ("astro_admission_shed_total", (("route", "/slow"), ("reason", "queue_full")), 1) in ctl.samples()
@@ -0,0 +1,22 @@
+from benchmarks.suite import compare, summarize
+from benchmarks.synthetic import EARLIEST, LATEST, MAX_LATITUDE, chart_inputs
+
+
+def test_synthetic_inputs_are_deterministic_and_spread():
+    inputs = chart_inputs(60)
+    assert inputs == chart_inputs(60)
+    assert inputs != chart_inputs(60, seed=8)
+    assert all(EARLIEST <= i.local_datetime < LATEST for i in inputs)
+    assert all(abs(i.lat) <= MAX_LATITUDE for i in inputs)
+    assert any(i.timezone is None for i in inputs)
+    assert len({i.timezone for i in inputs}) > 10
+
+
+def test_compare_flags_regressions_over_threshold():
+    def results(**medians):
+        return {"benchmarks": {name: summarize([us / 1e6]) for name, us in medians.items()}}
+
+    report = compare(results(a=100, b=100, gone=5), results(a=110, b=130, added=1), threshold=0.15)
+    assert report["regressions"] == ["b"]
+    assert report["stages"]["a"]["ratio"] == 1.1
+    assert report["missing"] == ["gone"] and report["new"] == ["added"]
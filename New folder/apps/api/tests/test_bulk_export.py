@@ -0,0 +1,87 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from core.bulk_export import BulkExporter, UploadTooLarge, detect_format, read_records, spool_upload
+from core.models import ChartInput
+from core.pipeline import ChartPipeline
+
+RECORD = {
+    "name": "Bulk",
+    "local_datetime": "1993-01-15T14:20:00",
+    "place": "Bengaluru, India",
+    "lat": 12.97,
+    "lon": 77.59,
+    "timezone": "Asia/Kolkata",
+}
+
+CSV = (
+    "name,local_datetime,place,lat,lon,timezone,unknown_time\n"
+    'A,1990-03-01T06:00:00,"Pune, India",18.52,73.86,Asia/Kolkata,false\n'
+    "B,1985-07-20T23:10:00,London,51.51,-0.13,Europe/London,\n"
+    "C,2990-01-01T00:00:00,Nowhere,0,0,UTC,\n"
+    "D,1971-11-02T12:00:00,New York,40.71,-74.01,America/New_York,true\n"
+)
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    exporter = BulkExporter(workers=1, window=2)
+    yield exporter
+    exporter.shutdown()
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _export(exporter, data: bytes, fmt: str, **kwargs):
+    async def run():
+        upload = await spool_upload(_chunks(data))
+        return [chunk async for chunk in exporter.stream(upload, fmt, **kwargs)]
+
+    chunks = asyncio.run(run())
+    lines = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    return lines[:-1], lines[-1]["summary"]
+
+
+def test_ndjson_export_in_input_order_matches_pipeline(exporter):
+    records = [RECORD, {"name": "Bad"}, "not an object", dict(RECORD, name="Again")]
+    data = "\n".join(json.dumps(r) for r in records).encode() + b"\n\n"
+    lines, summary = _export(exporter, data, "ndjson")
+
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert "local_datetime: Field required" in lines[1]["error"]
+    assert lines[2]["error"] == "Record must be a JSON object"
+    expected = ChartPipeline().calculate(ChartInput(**RECORD))
+    assert lines[0]["chart"]["vedic"]["moon_longitude"] == pytest.approx(expected.vedic.moon_longitude)
+    assert lines[3]["chart"]["input_echo"]["name"] == "Again"
+    assert summary == {"records": 4, "offset": 0, "charts": 2, "errors": 2, "next_offset": 4}
+
+
+def test_csv_export_resumes_from_offset_in_completion_order(exporter):
+    lines, summary = _export(exporter, CSV.encode(), "csv", order="completion", offset=1)
+
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == [1, 2, 3]
+    assert "future" in by_index[2]["error"]
+    assert by_index[3]["chart"]["input_echo"]["local_datetime"].startswith("1971-11-02T12:00")
+    assert (summary["charts"], summary["errors"], summary["next_offset"]) == (2, 1, 4)
+    assert exporter.snapshot()["active"] == 0
+
+
+def test_upload_checks():
+    with pytest.raises(ValueError):
+        read_records(io.BytesIO(b"name,birthday\nA,1990-01-01\n"), "csv")
+
+    async def oversized():
+        await spool_upload(_chunks(b"x" * 100), max_bytes=50)
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(oversized())
+    assert detect_format("text/csv; charset=utf-8") == "csv"
+    assert detect_format("application/x-ndjson") == "ndjson"
+    assert detect_format("application/json") is None
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from chart_store import ChartStore, chart_id_for, charts_json, encode
+from core.models import ChartInput
+from core.pipeline import ChartPipeline
+from db import Base
+from models import ChartRecord
+
+
+def _input(name="Store", hour=14):
+    return ChartInput(
+        name=name,
+        local_datetime=datetime(1993, 1, 15, hour, 20),
+        place="Bengaluru",
+        lat=12.97,
+        lon=77.59,
+        timezone="Asia/Kolkata",
+    )
+
+
+@pytest.fixture(scope="module")
+def charts():
+    pipeline = ChartPipeline()
+    out = []
+    for i in range(3):
+        chart = pipeline.calculate(_input(hour=10 + i))
+        chart.chart_id = chart_id_for(chart.input_echo)
+        out.append(chart)
+    return out
+
+
+def _with_store(tmp_path, fn, **kwargs):
+    async def run():
+        eng = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'charts.db'}")
+        async with eng.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(eng, expire_on_commit=False)
+        try:
+            return await fn(ChartStore(sessions, **kwargs), sessions)
+        finally:
+            await eng.dispose()
+
+    return asyncio.run(run())
+
+
+def test_chart_id_is_derived_from_the_normalized_input():
+    pipeline = ChartPipeline()
+    a = chart_id_for(pipeline.normalize(_input()))
+    assert a == chart_id_for(pipeline.normalize(_input())) and len(a) == 32
+    assert a != chart_id_for(pipeline.normalize(_input(name="Other")))
+    assert a != chart_id_for(pipeline.normalize(_input()), calculation_version="2.0.0")
+
+
+def test_put_get_and_bulk_json(tmp_path, charts):
+    first, second, _ = charts
+
+    async def run(store, _):
+        assert await store.put(first) and await store.put(second)
+        assert not await store.put(first)
+        loaded = await store.get(first.chart_id)
+        found = await store.get_json([second.chart_id, "0" * 32])
+        return loaded, found, store
+
+    loaded, found, store = _with_store(tmp_path, run)
+    assert loaded.model_dump() == first.model_dump()
+    assert len(encode(first)) * 4 < len(first.model_dump_json())
+    body = json.loads(charts_json(found, [second.chart_id, "0" * 32, second.chart_id]))
+    assert [c["chart_id"] for c in body["charts"]] == [second.chart_id]
+    assert body["missing"] == ["0" * 32]
+    assert (store.hits, store.misses, store.stored) == (2, 1, 2)
+
+
+def test_eviction_by_retention_then_least_recently_used(tmp_path, charts):
+    now = datetime.now(timezone.utc)
+
+    async def run(store, sessions):
+        for chart in charts:
+            await store.put(chart)
+        ages = {charts[0].chart_id: 400, charts[1].chart_id: 2, charts[2].chart_id: 1}
+        async with sessions() as db:
+            for chart_id, days in ages.items():
+                await db.execute(update(ChartRecord).where(ChartRecord.chart_id == chart_id)
+                                 .values(last_used_at=now - timedelta(days=days)))
+            await db.commit()
+        result = await store.evict(now)
+        left = await store.get_json(c.chart_id for c in charts)
+        return result, set(left), await store.snapshot()
+
+    result, left, snapshot = _with_store(tmp_path, run, retention_days=180, max_charts=1)
+    assert result == {"expired": 1, "over_capacity": 1}
+    assert left == {charts[2].chart_id}
+    assert snapshot["charts"] == 1 and snapshot["evicted"] == 2
@@ -0,0 +1,68 @@
+"""
+Property test: vectorized dasha batch agrees with the scalar engine
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core.dasha import VimshottariDasha
+from core.dasha_batch import LORDS, active_dashas
+
+
+def _scalar_active(engine: VimshottariDasha, moon: float, birth: datetime, when: datetime):
+    mahas = [d for d in engine.calculate(moon, birth) if d.level == "Maha"]
+    maha = next((m for m in mahas if m.start_date <= when < m.end_date), None)
+    if maha is None:
+        return None, None
+    antar = next(a for a in engine._generate_antardashas(maha) if a.start_date <= when < a.end_date)
+    return maha, antar
+
+
+def _us(dt: datetime) -> np.datetime64:
+    return np.datetime64(dt, "us")
+
+
+def test_batch_matches_scalar_engine():
+    rng = random.Random(20240601)
+    engine = VimshottariDasha()
+    moons, births, queries = [], [], []
+    for _ in range(400):
+        moons.append(rng.uniform(0.0, 360.0))
+        births.append(datetime(1800, 1, 1) + timedelta(seconds=rng.randrange(0, 225 * 365 * 86400)))
+        queries.append(births[-1] + timedelta(seconds=rng.randrange(-5 * 365 * 86400, 125 * 365 * 86400)))
+
+    batch = active_dashas(moons, births, queries)
+
+    for i, (moon, birth, when) in enumerate(zip(moons, births, queries)):
+        maha, antar = _scalar_active(engine, moon, birth, when)
+        if maha is None:
+            assert batch.maha_lord[i] == -1 and batch.antar_lord[i] == -1
+            continue
+        # Skip queries within a second of a boundary; both sides round to microseconds
+        if min(abs((when - d).total_seconds()) for d in (maha.start_date, maha.end_date, antar.start_date, antar.end_date)) < 1:
+            continue
+        assert LORDS[batch.maha_lord[i]] == maha.planet
+        assert LORDS[batch.antar_lord[i]] == antar.planet.split("/")[1]
+        for got, want in (
+            (batch.maha_start[i], maha.start_date), (batch.maha_end[i], maha.end_date),
+            (batch.antar_start[i], antar.start_date), (batch.antar_end[i], antar.end_date),
+        ):
+            assert abs(got - _us(want)) <= np.timedelta64(1, "ms")
+
+
+def test_batch_broadcasts_single_query_and_names_lords():
+    births = [datetime(1990, 1, 1), datetime(1975, 7, 4)]
+    batch = active_dashas([100.0, 5.0], births, datetime(2025, 6, 1))
+    assert batch.maha_lord.shape == (2,)
+    assert list(batch.lord_names()) == [LORDS[i] for i in batch.maha_lord]
+    assert (batch.antar_start >= batch.maha_start).all()
+    assert (batch.antar_end <= batch.maha_end).all()
+
+
+def test_batch_before_birth_is_invalid():
+    batch = active_dashas([42.0], [datetime(2000, 1, 1)], [datetime(1999, 1, 1)])
+    assert batch.maha_lord[0] == -1
+    assert np.isnat(batch.maha_start[0])
+    assert batch.lord_names()[0] == ""
@@ -0,0 +1,93 @@
+"""
+Tests for the lazy Vimshottari dasha tree
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from core.dasha import VimshottariDasha
+from core.dasha_tree import DashaTree, LEVELS
+
+
+BIRTH = datetime(1990, 1, 1, 6, 30)
+
+
+def _close(a: datetime, b: datetime, seconds: float = 1.0) -> bool:
+    return abs((a - b).total_seconds()) <= seconds
+
+
+class TestDashaTree:
+    """Lazy tree must agree with the eager engine and stay internally consistent"""
+
+    @pytest.fixture
+    def tree(self):
+        return DashaTree(100.0, BIRTH)
+
+    def test_mahadashas_match_engine(self, tree):
+        eager = [d for d in VimshottariDasha().calculate(100.0, BIRTH) if d.level == "Maha"]
+        lazy = list(tree.mahadashas())
+        assert [m.lord for m in lazy] == [d.planet for d in eager]
+        for m, d in zip(lazy, eager):
+            assert _close(m.start, d.start_date) and _close(m.end, d.end_date)
+
+    def test_antardashas_match_engine(self, tree):
+        eager = [d for d in VimshottariDasha().calculate(100.0, BIRTH) if d.level == "Antar"]
+        first_maha = tree.mahadasha(0)
+        lazy = list(first_maha.children())
+        assert [n.to_period().planet for n in lazy] == [d.planet for d in eager[:9]]
+        for n, d in zip(lazy, eager):
+            assert _close(n.start, d.start_date) and _close(n.end, d.end_date)
+
+    def test_active_chain_is_nested(self, tree):
+        when = datetime(2025, 6, 1, 12, 0)
+        chain = tree.active(when)
+        assert [n.level for n in chain] == LEVELS
+        for parent, child in zip(chain, chain[1:]):
+            assert parent.start <= child.start and child.end <= parent.end
+            assert child.lords[:-1] == parent.lords
+        assert all(n.contains(when) for n in chain)
+
+    def test_active_chain_matches_brute_force(self, tree):
+        when = datetime(2031, 2, 14, 3, 0)
+        node = next(m for m in tree.mahadashas(18) if m.contains(when))
+        expected = [node]
+        for _ in range(4):
+            node = next(c for c in node.children() if c.contains(when))
+            expected.append(node)
+        assert [n.lords for n in tree.active(when)] == [n.lords for n in expected]
+
+    def test_active_before_birth_is_empty(self, tree):
+        assert tree.active(BIRTH - timedelta(days=1)) == []
+
+    def test_periods_cover_window_contiguously(self, tree):
+        start, end = datetime(2024, 1, 1), datetime(2025, 1, 1)
+        periods = list(tree.periods("Sookshma", start, end))
+        assert periods[0].start <= start < periods[0].end
+        assert periods[-1].start < end <= periods[-1].end
+        for a, b in zip(periods, periods[1:]):
+            assert a.end == b.start
+        assert all(p.level == "Sookshma" for p in periods)
+
+    def test_periods_cross_cycle_boundary(self, tree):
+        start = tree.mahadasha(8).start
+        end = tree.mahadasha(9).end
+        mahas = list(tree.periods("Maha", start, end))
+        assert [m.lord for m in mahas] == [tree.mahadasha(8).lord, tree.mahadasha(9).lord]
+        assert mahas[1].lord == tree.start_lord
+
+    def test_later_cycles_are_contiguous_and_full_length(self):
+        # Venus nakshatra with 0.5 years of balance left at birth
+        tree = DashaTree(26.6667 - 0.025 * 13.333333, BIRTH)
+        assert tree.start_lord == "Venus"
+        mahas = list(tree.mahadashas(18))
+        for a, b in zip(mahas, mahas[1:]):
+            assert a.end == b.start
+        for m in mahas[9:]:
+            years = (m.end - m.start).days / 365.25
+            assert years == pytest.approx(VimshottariDasha.DASHA_YEARS[m.lord], abs=0.01)
+        for when in (datetime(2060, 1, 1), mahas[9].start, datetime(2150, 6, 1)):
+            chain = tree.active(when)
+            assert all(n.contains(when) for n in chain)
+
+    def test_invalid_level(self, tree):
+        with pytest.raises(ValueError):
+            tree.active(BIRTH, level="Hora")
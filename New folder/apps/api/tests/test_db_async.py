@@ -0,0 +1,45 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from db import Base, TimedAsyncQueuePool, pool_stats, to_async_url
+from models import LocationCache, LocationUsage
+
+
+def test_to_async_url_drivers():
+    assert to_async_url("postgresql://u:p@db:5432/x") == "postgresql+asyncpg://u:p@db:5432/x"
+    assert to_async_url("postgres://u:p@db/x") == "postgresql+asyncpg://u:p@db/x"
+    assert to_async_url("postgresql+psycopg2://u@db/x") == "postgresql+asyncpg://u@db/x"
+    assert to_async_url("sqlite:///./dev.db") == "sqlite+aiosqlite:///./dev.db"
+    assert to_async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+def test_async_session_roundtrip_records_pool_wait(tmp_path):
+    async def run():
+        eng = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'async.db'}",
+            poolclass=TimedAsyncQueuePool,
+            pool_size=2,
+            max_overflow=0,
+        )
+        async with eng.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(eng, expire_on_commit=False)
+        async with Session() as db:
+            db.add(LocationUsage(tz="Asia/Kolkata", lat_round=19.1, lon_round=72.9))
+            db.add(LocationCache(query="Mumbai", provider="nominatim", result_json=[{"name": "Mumbai"}]))
+            await db.commit()
+        async with Session() as db:
+            usage = (await db.execute(select(LocationUsage))).scalars().all()
+            cached = (await db.execute(
+                select(LocationCache).filter(LocationCache.query == "Mumbai").limit(1)
+            )).scalars().first()
+        await eng.dispose()
+        return usage, cached
+
+    before = pool_stats.snapshot()["checkouts"]
+    usage, cached = asyncio.run(run())
+    assert len(usage) == 1 and usage[0].tz == "Asia/Kolkata"
+    assert cached.result_json == [{"name": "Mumbai"}]
+    assert pool_stats.snapshot()["checkouts"] > before
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pytest
+
+from benchmarks.loadtest import FakeNominatim, histogram, parse_mix, percentiles
+from core import pipeline as pipeline_module
+from core.models import ChartInput
+
+
+def test_pipeline_geocodes_through_configured_nominatim(monkeypatch):
+    with FakeNominatim(latency_ms=0) as geo:
+        monkeypatch.setattr(pipeline_module, "NOMINATIM_URL", geo.url)
+        chart = pipeline_module.ChartPipeline().calculate(ChartInput(
+            name="Load", local_datetime=datetime(1990, 5, 1, 8, 0), place="Synthetic Town 1",
+            lat=None, lon=None, timezone="UTC"
+        ))
+        assert geo.requests == 1
+    assert chart.vedic.planets
+
+
+def test_mix_and_histogram():
+    assert parse_mix("geo_search=3,chart_flow") == {"geo_search": 3.0, "chart_flow": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("report=1")
+    samples = [1.0, 7.0, 30.0, 30.0, 20000.0]
+    counts = histogram(samples)
+    assert counts["<=5"] == 1 and counts["<=50"] == 2 and counts[">10000"] == 1
+    assert sum(counts.values()) == len(samples)
+    assert percentiles(samples)["p50"] == 30.0
@@ -0,0 +1,104 @@
+"""Allocation budgets for the calculation core.
+
+Peaks are traced Python allocations above the level before the call, after one
+warm-up call (lazy imports and caches). Budgets leave roughly 50% headroom over
+the measured figures; raise one only with a reason in the commit.
+"""
+
+import gc
+from datetime import datetime
+
+import pytest
+
+from core.dasha import VimshottariDasha
+from core.memory import MemoryTracker, measure
+from core.models import ChartInput
+from core.pipeline import ChartPipeline
+from core.predictions import PredictionEngine
+from core.signals import compute_signals
+from core.transits import TransitCalculator
+
+KiB = 1024
+
+# measured: calculate ~61 KiB, compute_signals ~13 KiB, generate ~20 KiB
+BUDGETS = {
+    "pipeline.calculate": 96 * KiB,
+    "signals.compute": 24 * KiB,
+    "predictions.generate": 32 * KiB,
+}
+
+
+def _input():
+    return ChartInput(
+        name="Budget",
+        local_datetime=datetime(1993, 1, 15, 14, 20),
+        place="Bengaluru",
+        lat=12.97,
+        lon=77.59,
+        timezone="Asia/Kolkata",
+        unknown_time=False
+    )
+
+
+@pytest.fixture(scope="module")
+def core():
+    pipeline = ChartPipeline()
+    chart = pipeline.calculate(_input())
+    dashas = VimshottariDasha().calculate(chart.vedic.moon_longitude, datetime(1993, 1, 15, 8, 50))
+    transits = TransitCalculator().calculate(chart, datetime(2025, 6, 1))
+    engine = PredictionEngine()  # no result cache: every call evaluates the rules
+    engine.generate(chart, dashas, transits)
+    return pipeline, chart, dashas, transits, engine
+
+
+def _peak(fn, *args):
+    fn(*args)  # warm-up
+    gc.collect()
+    _, peak, _ = measure(fn, *args)
+    return peak
+
+
+def test_pipeline_calculate_budget(core):
+    pipeline = core[0]
+    assert _peak(lambda: pipeline.calculate(_input())) <= BUDGETS["pipeline.calculate"]
+
+
+def test_compute_signals_budget(core):
+    _, chart, dashas, transits, _ = core
+    assert _peak(compute_signals, chart, dashas, transits) <= BUDGETS["signals.compute"]
+
+
+def test_prediction_generate_budget(core):
+    _, chart, dashas, transits, engine = core
+    assert _peak(engine.generate, chart, dashas, transits) <= BUDGETS["predictions.generate"]
+
+
+def test_repeated_calculation_does_not_retain_charts(core):
+    # pytz keeps a few hundred bytes of localized datetimes in the first calls;
+    # a leaked chart would be ~60 KiB per call
+    pipeline = core[0]
+    calls = 100
+
+    def run():
+        for _ in range(calls):
+            pipeline.calculate(_input())
+        gc.collect()
+
+    run()
+    _, _, retained = measure(run)
+    assert retained / calls < 1 * KiB
+
+
+def test_snapshot_diff_reports_growth():
+    tracker = MemoryTracker()
+    tracker.start()
+    try:
+        tracker.snapshot()
+        kept = [bytearray(1000) for _ in range(200)]
+        tracker.snapshot()
+        diff = tracker.diff(top=3)
+        assert diff["size_diff_bytes"] >= 200 * 1000
+        assert "test_memory_budgets.py" in diff["top"][0]["where"][0]
+        assert kept
+    finally:
+        tracker.stop()
@@ -0,0 +1,68 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core import metrics as metrics_mod
+from core.metrics import MetricsMiddleware, MetricsRegistry, server_timing, span, timed
+
+
+def test_render_prometheus_text():
+    reg = MetricsRegistry(buckets=(0.01, 0.1))
+    stage = (("stage", "pipeline.vedic"),)
+    for seconds in (0.005, 0.05, 0.5):
+        reg.observe(metrics_mod.STAGE_SECONDS, stage, seconds)
+    reg.cache_lookup("horoscope", True)
+    reg.cache_lookup("horoscope", False)
+    reg.register_cache("prediction", lambda: (3, 1))
+    text = reg.render()
+
+    assert '# TYPE astro_stage_duration_seconds histogram' in text
+    assert 'astro_stage_duration_seconds_bucket{stage="pipeline.vedic",le="0.01"} 1' in text
+    assert 'astro_stage_duration_seconds_bucket{stage="pipeline.vedic",le="0.1"} 2' in text
+    assert 'astro_stage_duration_seconds_bucket{stage="pipeline.vedic",le="+Inf"} 3' in text
+    assert 'astro_stage_duration_seconds_count{stage="pipeline.vedic"} 3' in text
+    assert 'astro_cache_hit_ratio{cache="horoscope"} 0.5' in text
+    assert 'astro_cache_hit_ratio{cache="prediction"} 0.75' in text
+
+
+def test_server_timing_merges_repeated_stages():
+    header = server_timing([("transits.calculate", 0.001), ("transits.calculate", 0.002), ("rules.evaluate", 0.0005)],
+                           0.01)
+    assert header == ('transits.calculate;dur=3.000;desc="2 calls", rules.evaluate;dur=0.500, '
+                      'total;dur=10.000')
+
+
+def test_middleware_reports_stages_per_route():
+    reg = MetricsRegistry()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, router=app.router, registry=reg)
+
+    @timed("test.compute")
+    def compute(x):
+        return x * 2
+
+    @app.get("/items/{x}")
+    async def item(x: int):
+        with span("test.lookup"):
+            pass
+        return {"value": compute(x)}
+
+    client = TestClient(app)
+    for x in (1, 2):
+        r = client.get(f"/items/{x}")
+        assert r.json() == {"value": 2 * x}
+        stages = [part.split(";")[0] for part in r.headers["server-timing"].split(", ")]
+        assert stages == ["test.lookup", "test.compute", "total"]
+
+    text = reg.render()
+    assert 'astro_http_request_duration_seconds_count{method="GET",route="/items/{x}",status="200"} 2' in text
+    assert 'astro_http_requests_in_flight{method="GET",route="/items/{x}"} 0' in text
+
+
+def test_disabled_metrics_leave_functions_untouched(monkeypatch):
+    monkeypatch.setattr(metrics_mod, "METRICS_ENABLED", False)
+
+    def fn():
+        return 1
+
+    assert timed("test.off")(fn) is fn
+    assert span("test.off") is span("test.other")
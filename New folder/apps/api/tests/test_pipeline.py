@@ -186,3 +186,18 @@ class TestGoldenCases:
         local_hour = 18
         utc_hour = chart.astronomy.utc_datetime.hour
         assert utc_hour == (local_hour - 5) or utc_hour == (local_hour - 6)
+
+
+def test_direct_serialization_matches_response_model():
+    """/v1/chart serializes the chart directly instead of re-validating it; the body must not change."""
+    import json
+    from core.models import ChartResponse
+
+    chart = ChartPipeline().calculate(ChartInput(
+        name="Direct", local_datetime=datetime(1993, 1, 15, 14, 20), place="Bengaluru",
+        lat=12.97, lon=77.59, timezone="Asia/Kolkata"
+    ))
+    direct = json.loads(chart.model_dump_json())
+    revalidated = json.loads(json.dumps(ChartResponse.model_validate(chart.model_dump()).model_dump(mode="json")))
+    assert direct == revalidated
+    assert list(direct) == list(revalidated)
@@ -0,0 +1,57 @@
+import csv
+import json
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import precompute
+from benchmarks.synthetic import chart_inputs
+
+AT = datetime(2025, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def users(tmp_path_factory):
+    path = tmp_path_factory.mktemp("precompute") / "users.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "local_datetime", "place", "lat", "lon", "timezone", "unknown_time"])
+        for i in chart_inputs(6, seed=3):
+            writer.writerow([i.name, i.local_datetime.isoformat(), i.place, i.lat, i.lon, i.timezone or "", i.unknown_time])
+        writer.writerow(["Late", "2999-01-01T00:00:00", "Nowhere", 0, 0, "UTC", ""])
+    return path
+
+
+def test_rows_hold_chart_dasha_and_signals(users, tmp_path):
+    out = tmp_path / "charts.sqlite"
+    stats = precompute.run(users, out, AT, workers=2, chunk_size=3)
+    assert (stats["complete"], stats["chunks"], stats["records"], stats["errors"]) == (True, 3, 7, 1)
+
+    conn = sqlite3.connect(out)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM charts ORDER BY idx").fetchall()
+    assert [r["idx"] for r in rows] == list(range(7))
+    first = rows[0]
+    assert first["name"] == "Synthetic 0" and first["error"] is None
+    signals = json.loads(first["signals"])
+    assert signals["dasha"]["maha"]["lord"] == first["maha_lord"]
+    assert first["maha_start"] <= AT.isoformat() < first["maha_end"]
+    assert "future" in rows[6]["error"] and rows[6]["signals"] is None
+    assert dict(conn.execute("SELECT key, value FROM meta"))["at"] == AT.isoformat()
+
+
+def test_resumed_run_matches_fresh_run_byte_for_byte(users, tmp_path):
+    fresh, resumed = tmp_path / "fresh.sqlite", tmp_path / "resumed.sqlite"
+    precompute.run(users, fresh, AT, workers=1, chunk_size=2)
+
+    partial = precompute.run(users, resumed, AT, workers=2, chunk_size=2, max_chunks=2)
+    assert not partial["complete"] and not resumed.exists()
+    with pytest.raises(FileExistsError):
+        precompute.run(users, resumed, AT, chunk_size=2)
+    with pytest.raises(ValueError):
+        precompute.run(users, resumed, datetime(2025, 2, 1), chunk_size=2, resume=True)
+    rest = precompute.run(users, resumed, AT, workers=2, chunk_size=2, resume=True)
+
+    assert (rest["resumed_from_chunk"], rest["chunks"], rest["complete"]) == (2, 2, True)
+    assert fresh.read_bytes() == resumed.read_bytes()
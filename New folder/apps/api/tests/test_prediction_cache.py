@@ -0,0 +1,104 @@
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from core.dasha import VimshottariDasha
+from core.models import ChartInput
+from core.pipeline import ChartPipeline
+from core.prediction_cache import PredictionCache, prediction_key
+from core.predictions import PredictionEngine
+from core.rule_sets import RuleSet, RuleSetManager
+from core.signals import SignalContext, SignalStats
+from core.transits import TransitCalculator
+
+VEDIC = Path(__file__).parent.parent / "core" / "rules" / "vedic.json"
+
+
+def _inputs(when=datetime(2025, 6, 1)):
+    chart = ChartPipeline().calculate(ChartInput(
+        name="Cache",
+        local_datetime=datetime(1993, 1, 15, 14, 20),
+        place="Bengaluru",
+        lat=12.97,
+        lon=77.59,
+        timezone="Asia/Kolkata",
+        unknown_time=False
+    ))
+    dashas = VimshottariDasha().calculate(chart.vedic.moon_longitude)
+    return chart, dashas, TransitCalculator().calculate(chart, when)
+
+
+def _ids(result):
+    return [p.id for preds in result["predictions"].values() for p in preds]
+
+
+def test_prediction_ids_are_deterministic():
+    chart, dashas, transits = _inputs()
+    first = _ids(PredictionEngine().generate(chart, dashas, transits))
+    assert first
+    assert _ids(PredictionEngine().generate(chart, dashas, transits)) == first
+    # Same transit signals a few hours later: same key, same IDs
+    later = TransitCalculator().calculate(chart, datetime(2025, 6, 1, 3))
+    assert [t.current_sign for t in later] == [t.current_sign for t in transits]
+    assert _ids(PredictionEngine().generate(chart, dashas, later)) == first
+
+
+def test_repeat_request_skips_signal_evaluation():
+    chart, dashas, transits = _inputs()
+    cache = PredictionCache()
+    engine = PredictionEngine(cache=cache)
+    first = engine.generate(chart, dashas, transits)
+
+    stats = SignalStats()
+    ctx = SignalContext(chart.vedic, dashas, transits, stats=stats)
+    again = engine.generate(chart, dashas, transits, context=ctx)
+    assert stats.snapshot() == {}
+    assert _ids(again) == _ids(first)
+    assert cache.snapshot()["hits"] == 1
+
+    # A different sky is a different key
+    moved = TransitCalculator().calculate(chart, datetime(2025, 9, 1))
+    key = prediction_key(chart, dashas, moved, engine.rule_sets())
+    assert key != prediction_key(chart, dashas, transits, engine.rule_sets())
+    engine.generate(chart, dashas, moved)
+    assert cache.snapshot()["misses"] == 2
+
+
+def test_rule_swap_invalidates_entries(tmp_path):
+    shutil.copy(VEDIC, tmp_path / "vedic.json")
+    manager = RuleSetManager(tmp_path, poll_seconds=0)
+    cache = PredictionCache()
+    engine = PredictionEngine(rule_sets=manager, cache=cache)
+    chart, dashas, transits = _inputs()
+    before = engine.generate(chart, dashas, transits)
+    assert cache.snapshot()["entries"] == 1
+
+    rules = json.loads(VEDIC.read_text(encoding="utf-8"))
+    (tmp_path / "vedic.json").write_text(json.dumps(rules[:1]), encoding="utf-8")
+    assert manager.reload() == ["vedic"]
+    assert cache.snapshot()["entries"] == 0
+    after = engine.generate(chart, dashas, transits)
+    assert after["rule_versions"]["vedic"] > before["rule_versions"]["vedic"]
+    assert set(_ids(after)) != set(_ids(before))
+
+
+def test_dasha_dates_join_the_key_only_when_rules_read_them():
+    chart, dashas, transits = _inputs()
+    dated = RuleSet.from_bytes(Path("dated.json"), json.dumps([{"id": "maha_start", "conditions": {"all": [
+        {"path": "dasha.maha.start", "op": "ne", "value": ""},
+    ]}}]).encode(), (0, 0), 1)
+    vedic = RuleSet.load(VEDIC)
+    assert dated.reads_dasha_dates and not vedic.reads_dasha_dates
+    shifted = [d.model_copy(update={"end_date": d.end_date.replace(year=d.end_date.year + 1)}) for d in dashas]
+    assert prediction_key(chart, dashas, transits, [vedic]) == prediction_key(chart, shifted, transits, [vedic])
+    assert prediction_key(chart, dashas, transits, [dated]) != prediction_key(chart, shifted, transits, [dated])
+
+
+def test_lru_eviction():
+    cache = PredictionCache(maxsize=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, ["vedic"], {"key": key})
+    assert cache.get("a") is None
+    assert cache.get("c") == {"key": "c"}
+    assert cache.snapshot()["evictions"] == 1
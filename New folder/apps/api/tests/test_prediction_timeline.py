@@ -0,0 +1,98 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.dasha_tree import DashaTree
+from core.models import ChartInput
+from core.pipeline import ChartPipeline
+from core.prediction_timeline import PredictionTimeline
+from core.predictions import PredictionEngine
+from core.rule_sets import RuleSetManager
+from core.signals import compute_signals
+from core.transits import TransitCalculator, sky_state_cache_stats
+
+
+def _chart():
+    return ChartPipeline().calculate(ChartInput(
+        name="Timeline",
+        local_datetime=datetime(1993, 1, 15, 14, 20),
+        place="Bengaluru",
+        lat=12.97,
+        lon=77.59,
+        timezone="Asia/Kolkata",
+        unknown_time=False
+    ))
+
+
+def _rules_dir(tmp_path, with_aspects=False):
+    fast = [{"id": f"moon_{h}", "domain": "mood", "headline": f"Moon {h}", "conditions": {"all": [
+        {"path": "transit.houses.Moon.from_moon", "op": "in", "value": [h, h + 1]},
+        {"path": "natal.strength.Moon", "op": "ge", "value": 0.0},
+    ]}} for h in (1, 5, 9)]
+    slow = [{"id": "antar_any", "domain": "career", "headline": "Antar", "conditions": {"all": [
+        {"path": "dasha.antar.placement.house_from_lagna", "op": "in", "value": [1, 2, 3, 4, 5, 6]},
+        {"path": "transit.houses.Sun.from_lagna", "op": "in", "value": [1, 2, 3, 4, 5, 6]},
+    ]}}]
+    if with_aspects:
+        slow.append({"id": "mars_aspects_moon", "domain": "health", "headline": "Mars", "conditions": {"all": [
+            {"path": "transit.by_planet.Mars.aspects_natal", "op": "ne", "value": []},
+            {"path": "natal.strength.Mars", "op": "ge", "value": 0.0},
+        ]}})
+    (tmp_path / "fast.json").write_text(json.dumps(fast))
+    (tmp_path / "slow.json").write_text(json.dumps(slow))
+    return tmp_path
+
+
+def _brute_force(engine, chart, start, end, step):
+    """Full recomputation at every step, merged into windows."""
+    tree = DashaTree(chart.vedic.moon_longitude, chart.astronomy.utc_datetime.replace(tzinfo=None))
+    tc = TransitCalculator()
+    runs, open_at = [], {}
+    t = start
+    while t < end:
+        dashas = [n.to_period(t) for n in tree.active(t, "Antar")]
+        signals = compute_signals(chart, dashas, tc.calculate(chart, t))
+        fired = {(rs.name, c.id) for rs in engine.rule_sets() for c in rs.compiled if c.match(signals)}
+        for k in [k for k in open_at if k not in fired]:
+            runs.append((k[0], k[1], open_at.pop(k), t))
+        for k in fired:
+            open_at.setdefault(k, t)
+        t += step
+    runs += [(k[0], k[1], s, end) for k, s in open_at.items()]
+    return sorted(runs, key=lambda r: (r[2], r[0], r[1]))
+
+
+@pytest.mark.parametrize("with_aspects", [False, True])
+def test_incremental_scan_matches_full_recomputation(tmp_path, with_aspects):
+    engine = PredictionEngine(rule_sets=RuleSetManager(_rules_dir(tmp_path, with_aspects), poll_seconds=0))
+    chart = _chart()
+    start, end, step = datetime(2025, 3, 1), datetime(2025, 7, 1), timedelta(hours=12)
+    result = PredictionTimeline(engine).scan(chart, start, end, step)
+    got = [(w.rule_set, w.rule_id, w.start, w.end) for w in result["windows"]]
+    assert got == _brute_force(engine, chart, start, end, step)
+    assert any(w.rule_id.startswith("moon_") for w in result["windows"])
+    # Rules are only re-evaluated when something they read changed
+    assert result["evaluations"] < result["steps"]
+
+
+def test_year_scan_reuses_most_steps():
+    engine = PredictionEngine()
+    chart = _chart()
+    cache_before = sky_state_cache_stats()
+    result = PredictionTimeline(engine).scan(chart, datetime(2025, 1, 1), datetime(2026, 1, 1))
+    assert result["steps"] == 365
+    # Scan instants stay out of the shared sky-state cache
+    assert sky_state_cache_stats() == cache_before
+    # Moon ingresses (~every 2.3 days) dominate; slow planets rarely force work
+    assert result["evaluations"] < 200
+    assert result["rule_versions"] == {"vedic": 1}
+
+
+def test_scan_rejects_bad_ranges():
+    timeline = PredictionTimeline(PredictionEngine())
+    chart = _chart()
+    with pytest.raises(ValueError):
+        timeline.scan(chart, datetime(2025, 1, 1), datetime(2024, 1, 1))
+    with pytest.raises(ValueError):
+        timeline.scan(chart, datetime(2025, 1, 1), datetime(2035, 1, 1), step=timedelta(minutes=5))
@@ -41,3 +41,54 @@ def test_predictions_summary_and_triggers():
         assert "executive" in summ
         assert "activated_themes" in summ
         assert "caution_flags" in summ
+
+
+def _coords_inputs():
+    chart = ChartPipeline().calculate(ChartInput(
+        name="Snapshot",
+        local_datetime=datetime(1993, 1, 15, 14, 20),
+        place="Bengaluru",
+        lat=12.97,
+        lon=77.59,
+        timezone="Asia/Kolkata",
+        unknown_time=False
+    ))
+    dashas = VimshottariDasha().calculate(chart.vedic.moon_longitude)
+    transits = TransitCalculator().calculate(chart, datetime(2025, 6, 1))
+    return chart, dashas, transits
+
+
+def _evidence(result):
+    return {tf: [(p.evidence[0].rule_id, p.evidence[0].triggers) for p in preds]
+            for tf, preds in result["predictions"].items()}
+
+
+def test_only_referenced_signals_are_evaluated():
+    from core.signals import SignalContext, SignalStats, compute_signals
+
+    chart, dashas, transits = _coords_inputs()
+    pe = PredictionEngine()
+    stats = SignalStats()
+    ctx = SignalContext(chart.vedic, dashas, transits, stats=stats)
+    lazy = pe.generate(chart, dashas, transits, context=ctx)
+    evaluated = set(stats.snapshot())
+    assert "natal.graha_drishti" not in evaluated and "natal.d9" not in evaluated
+    rule_set = pe.rule_sets()[0]
+    assert rule_set.required_signals <= evaluated
+    assert any(lazy["predictions"].values())
+
+    full = compute_signals(chart, dashas, transits)
+    fired = {r["id"] for r in rule_set.rules if pe._evaluate(r, full)[0]}
+    assert fired == {rule_id for preds in _evidence(lazy).values() for rule_id, _ in preds}
+
+
+def test_unknown_rule_paths_rejected_at_load(tmp_path):
+    import json
+    import pytest
+
+    base = {"id": "r1", "domain": "career", "headline": "h", "conditions": {"all": []}}
+    for path in ("natal.houses.Pluto.from_lagna", "natal.bogus.Sun", "transit.houses.Sun.from_sun"):
+        rules = tmp_path / "rules.json"
+        rules.write_text(json.dumps([{**base, "conditions": {"all": [{"path": path, "op": "eq", "value": 1}]}}]))
+        with pytest.raises(ValueError, match="r1"):
+            PredictionEngine(rules)
@@ -0,0 +1,86 @@
+import pstats
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from core.profiling import CaptureStore, Profiler, ProfilingMiddleware, profiled
+
+
+def _busy(ms: float) -> int:
+    end = time.perf_counter() + ms / 1000
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def _app(tmp_path):
+    profiler = Profiler(CaptureStore(tmp_path, max_captures=3))
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, authorized=lambda t: t == "admin",
+                       router=app.router)
+
+    @app.get("/work/{ms}")
+    async def work(ms: int):
+        return {"n": _busy(ms)}
+
+    @app.get("/offloaded/{ms}")
+    async def offloaded(ms: int):
+        return {"n": await run_in_threadpool(profiled, _busy, ms)}
+
+    return app, profiler
+
+
+def test_header_profiles_only_with_admin_token(tmp_path):
+    app, profiler = _app(tmp_path)
+    client = TestClient(app)
+    client.get("/work/5", headers={"X-Profile": "cprofile"})
+    client.get("/work/5", headers={"X-Profile": "cprofile", "X-Admin-Token": "wrong"})
+    assert profiler.store.list() == []
+
+    client.get("/work/5", headers={"X-Profile": "cprofile", "X-Admin-Token": "admin"})
+    [capture] = profiler.store.list()
+    assert (capture["route"], capture["trigger"], capture["status"]) == ("/work/{ms}", "header", 200)
+    stats = pstats.Stats(str(profiler.store.path(capture["id"])))
+    assert any(func[2] == "_busy" for func in stats.stats)
+
+
+def test_sampled_stacks_are_collapsed(tmp_path):
+    app, profiler = _app(tmp_path)
+    TestClient(app).get("/work/50", headers={"X-Profile": "sample", "X-Admin-Token": "admin"})
+    [capture] = profiler.store.list()
+    lines = profiler.store.path(capture["id"]).read_text().splitlines()
+    assert capture["samples"] == sum(int(line.rsplit(" ", 1)[1]) for line in lines)
+    assert any("test_profiling.py:work;test_profiling.py:_busy" in line for line in lines)
+
+
+def test_work_in_worker_threads_is_captured(tmp_path):
+    app, profiler = _app(tmp_path)
+    client = TestClient(app)
+    client.get("/offloaded/50", headers={"X-Profile": "sample", "X-Admin-Token": "admin"})
+    client.get("/offloaded/5", headers={"X-Profile": "cprofile", "X-Admin-Token": "admin"})
+    cprofile, sample = profiler.store.list()
+    assert "test_profiling.py:_busy " in profiler.store.path(sample["id"]).read_text()
+    stats = pstats.Stats(str(profiler.store.path(cprofile["id"])))
+    assert any(func[2] == "_busy" for func in stats.stats)
+    # Outside a capture the call is unchanged
+    assert profiled(_busy, 0) >= 0
+
+
+def test_schedule_profiles_route_until_expiry_and_prunes(tmp_path):
+    app, profiler = _app(tmp_path)
+    client = TestClient(app)
+    profiler.arm("/work/{ms}", percent=100, seconds=60)
+    for _ in range(5):
+        client.get("/work/1")
+    captures = profiler.store.list()
+    assert len(captures) == 3  # max_captures
+    assert {c["trigger"] for c in captures} == {"schedule"}
+    assert profiler.status()["schedules"][0]["profiled"] == 5
+
+    profiler.schedules["/work/{ms}"].until = time.time() - 1
+    client.get("/work/1")
+    assert profiler.schedules == {}
+    assert profiler.store.path("../x") is None
@@ -0,0 +1,47 @@
+import numpy as np
+
+from benchmarks.rules import sample_signals, synthetic_rules
+from core.predictions import PredictionEngine
+from core.rule_batch import evaluate_batch
+from core.rule_sets import RuleSet
+
+
+def _corpus():
+    trees = sample_signals(30, seed=21)
+    # Charts without dasha or transit inputs exercise missing signals
+    trees += [{**t, "transit": {}} for t in trees[:5]] + [{**t, "dasha": {}} for t in trees[5:10]]
+    return trees
+
+
+def _synthetic_set(tmp_path, n=300):
+    import json
+    path = tmp_path / "synthetic.json"
+    path.write_text(json.dumps(synthetic_rules(n, seed=17)))
+    return RuleSet.load(path)
+
+
+def test_batch_matches_per_chart_engine(tmp_path):
+    rule_sets = [PredictionEngine().rule_sets()[0], _synthetic_set(tmp_path)]
+    trees = _corpus()
+    result = evaluate_batch(rule_sets, trees)
+    compiled = [c for rs in rule_sets for c in rs.compiled]
+    assert result.fired.shape == (len(trees), len(compiled))
+    assert result.fired.any()
+    for i, tree in enumerate(trees):
+        for j, rule in enumerate(compiled):
+            hit = rule.match(tree)
+            assert result.fired[i, j] == (hit is not None), (i, rule.id)
+            assert result.confidence[i, j] == (hit[1] if hit else 0.0)
+
+
+def test_rule_subset_and_rates(tmp_path):
+    rs = _synthetic_set(tmp_path, 50)
+    trees = _corpus()
+    ids = [c.id for c in rs.compiled[:5]]
+    result = evaluate_batch([rs], trees, rule_ids=ids)
+    assert result.rule_ids == ids
+    rates = result.rates()
+    assert set(rates) == set(ids)
+    col = result.column(ids[2])
+    assert np.isclose(rates[ids[2]], result.fired[:, col].mean())
+    assert evaluate_batch([rs], [], rule_ids=ids).fired.shape == (0, 5)
@@ -0,0 +1,62 @@
+import pytest
+
+from benchmarks.rules import sample_signals, synthetic_rules
+from core.predictions import PredictionEngine
+from core.rule_compiler import CompiledRule, RuleIndex, compile_rules
+
+
+def test_compiled_rules_match_reference_interpreter():
+    engine = PredictionEngine()
+    rules = synthetic_rules(400, seed=3)
+    compiled = compile_rules(rules)
+    for signals in sample_signals(4, seed=5):
+        for rule, c in zip(rules, compiled):
+            ok, why, tf, conf = engine._evaluate(rule, signals)
+            hit = c.match(signals)
+            assert (hit is not None) == ok, rule["id"]
+            if ok:
+                assert hit == (why, conf) and c.timeframe == tf
+
+
+def test_selective_atoms_run_first_but_why_keeps_authored_order():
+    rule = CompiledRule({"id": "r", "conditions": {"all": [
+        {"path": "natal.strength.Sun", "op": "ge", "value": 0.1, "why_format": "a"},
+        {"path": "natal.houses.Sun.from_lagna", "op": "eq", "value": 10, "why_format": "b"},
+    ]}})
+    assert [a.path for a in rule.all_atoms] == ["natal.houses.Sun.from_lagna", "natal.strength.Sun"]
+    signals = {"natal": {"strength": {"Sun": 0.5}, "houses": {"Sun": {"from_lagna": 10}}}}
+    assert rule.match(signals) == (["a", "b"], pytest.approx(0.7))
+
+
+def test_invalid_ops_rejected_at_compile_time():
+    with pytest.raises(ValueError, match="bad"):
+        compile_rules([{"id": "bad", "conditions": {"all": [{"path": "natal.dignity.Sun", "op": "like", "value": "O"}]}}])
+
+
+def test_index_candidates_cover_every_firing_rule():
+    compiled = compile_rules(synthetic_rules(600, seed=9))
+    index = RuleIndex(compiled)
+    for signals in sample_signals(4, seed=13):
+        fired = [c.id for c in compiled if c.match(signals) is not None]
+        candidates = index.candidates(signals)
+        assert [c.id for c in candidates if c.match(signals) is not None] == fired
+        assert len(candidates) < len(compiled) / 2
+
+
+def test_index_requires_every_indexed_atom():
+    rules = [
+        {"id": "jup10", "conditions": {"all": [
+            {"path": "transit.houses.Jupiter.from_moon", "op": "eq", "value": 10},
+            {"path": "natal.dignity.Venus", "op": "in", "value": ["Own", "Exalted"]}]}},
+        {"id": "jup7", "conditions": {"all": [
+            {"path": "transit.houses.Jupiter.from_moon", "op": "in", "value": [7]},
+            {"path": "natal.strength.Venus", "op": "ge", "value": 0.5}]}},
+        {"id": "strong", "conditions": {"all": [
+            {"path": "natal.strength.Sun", "op": "ge", "value": 0.5},
+            {"path": "natal.strength.Moon", "op": "ge", "value": 0.5}]}},
+    ]
+    index = RuleIndex(compile_rules(rules))
+    signals = {"transit": {"houses": {"Jupiter": {"from_moon": 10}}}, "natal": {"dignity": {"Venus": "Own"}}}
+    assert [c.id for c in index.candidates(signals)] == ["jup10", "strong"]
+    signals["natal"]["dignity"]["Venus"] = "Neutral"
+    assert [c.id for c in index.candidates(signals)] == ["strong"]
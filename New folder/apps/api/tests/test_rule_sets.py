@@ -0,0 +1,97 @@
+import json
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from core.predictions import PredictionEngine
+from core.rule_sets import RuleSet, RuleSetManager
+
+VEDIC = Path(__file__).parent.parent / "core" / "rules" / "vedic.json"
+
+
+def _rule(rule_id: str, path: str = "natal.houses.Sun.from_lagna"):
+    return {"id": rule_id, "domain": "career", "headline": rule_id, "conditions": {"all": [
+        {"path": path, "op": "in", "value": list(range(1, 13))},
+        {"path": "natal.strength.Sun", "op": "ge", "value": 0.0},
+    ]}}
+
+
+def _write(path: Path, rules) -> None:
+    path.write_text(json.dumps(rules), encoding="utf-8")
+
+
+@pytest.fixture
+def rules_dir(tmp_path):
+    shutil.copy(VEDIC, tmp_path / "vedic.json")
+    _write(tmp_path / "western.json", [_rule("western_1")])
+    return tmp_path
+
+
+def test_loads_every_file_side_by_side(rules_dir):
+    manager = RuleSetManager(rules_dir, poll_seconds=0)
+    assert sorted(manager.snapshot()) == ["vedic", "western"]
+    assert manager.versions() == {"vedic": 1, "western": 2}
+    engine = PredictionEngine(rule_sets=manager)
+    assert [rs.name for rs in engine.rule_sets(["western"])] == ["western"]
+    with pytest.raises(ValueError):
+        engine.rule_sets(["tarot"])
+
+
+def test_edit_swaps_new_version_and_notifies(rules_dir):
+    manager = RuleSetManager(rules_dir, poll_seconds=0)
+    swaps = []
+    manager.subscribe(lambda name, old, new: swaps.append((name, old.version, new.version)))
+    before = manager.snapshot()
+
+    assert manager.reload() == []  # nothing changed
+    _write(rules_dir / "western.json", [_rule("western_1"), _rule("western_2")])
+    assert manager.reload() == ["western"]
+    assert swaps == [("western", 2, 3)]
+    assert len(manager.get("western").rules) == 2
+    # Readers holding the old snapshot keep a consistent view
+    assert len(before["western"].rules) == 1 and before["vedic"] is manager.get("vedic")
+
+
+def test_invalid_edit_keeps_serving_previous_version(rules_dir):
+    manager = RuleSetManager(rules_dir, poll_seconds=0)
+    _write(rules_dir / "western.json", [_rule("broken", path="natal.houses.Pluto.from_lagna")])
+    assert manager.reload() == []
+    assert manager.get("western").version == 2
+    assert "broken" in manager.errors["western"]
+    _write(rules_dir / "western.json", [_rule("fixed")])
+    assert manager.reload() == ["western"] and "western" not in manager.errors
+
+
+def test_invalid_file_at_startup_is_rejected(rules_dir):
+    _write(rules_dir / "western.json", [_rule("broken", path="natal.houses.Pluto.from_lagna")])
+    with pytest.raises(ValueError, match="western"):
+        RuleSetManager(rules_dir, poll_seconds=0)
+
+
+def test_removed_file_is_dropped(rules_dir):
+    manager = RuleSetManager(rules_dir, poll_seconds=0)
+    removed = []
+    manager.subscribe(lambda name, old, new: removed.append((name, new)))
+    (rules_dir / "western.json").unlink()
+    assert manager.reload() == ["western"]
+    assert removed == [("western", None)] and list(manager.snapshot()) == ["vedic"]
+
+
+def test_background_watcher_picks_up_edits(rules_dir):
+    manager = RuleSetManager(rules_dir, poll_seconds=0.02)
+    manager.start()
+    try:
+        _write(rules_dir / "western.json", [_rule("a"), _rule("b"), _rule("c")])
+        deadline = time.time() + 5
+        while len(manager.get("western").rules) != 3 and time.time() < deadline:
+            time.sleep(0.02)
+        assert manager.get("western").version == 3
+    finally:
+        manager.stop()
+
+
+def test_missing_file_loads_as_empty_set(tmp_path):
+    rs = RuleSet.load(tmp_path / "vedic.json")
+    assert rs.rules == [] and rs.name == "vedic"
@@ -32,3 +32,42 @@ def test_strengths_and_yogas():
     assert 0.0 <= strengths["Sun"] <= 1.0
     yogas = compute_yogas(chart.vedic)
     assert isinstance(yogas, dict)
+
+
+def _coords_chart():
+    return ChartPipeline().calculate(ChartInput(
+        name="Test",
+        local_datetime=datetime(1995, 5, 20, 10, 30),
+        place="Mumbai",
+        lat=19.07,
+        lon=72.88,
+        timezone="Asia/Kolkata",
+        unknown_time=False
+    ))
+
+
+def test_each_signal_evaluated_once_per_context():
+    from core.dasha import VimshottariDasha
+    from core.signals import SIGNALS, SignalContext, SignalStats, compute_signals
+
+    chart = _coords_chart()
+    dashas = VimshottariDasha().calculate(chart.vedic.moon_longitude)
+    stats = SignalStats()
+    ctx = SignalContext(chart.vedic, dashas, stats=stats)
+    sig = compute_signals(chart, dashas, [], context=ctx)
+    assert set(sig) == {"natal", "dasha", "transit"} and sig["transit"] == {}
+    maha = sig["dasha"]["maha"]
+    assert maha["placement"]["house_from_lagna"] == sig["natal"]["houses"][maha["lord"]]["from_lagna"]
+    counts = {name: s["count"] for name, s in stats.snapshot().items()}
+    # Transit signals are skipped without transits; everything else ran exactly once
+    assert counts == {name: 1 for name in SIGNALS if not name.startswith("transit.")}
+
+
+def test_dependencies_are_registered():
+    import pytest
+    from core.signals import SIGNALS, signal
+
+    for spec in SIGNALS.values():
+        assert all(dep in SIGNALS for dep in spec.deps)
+    with pytest.raises(ValueError):
+        signal("natal.bogus", deps=("natal.missing",))(lambda ctx: None)
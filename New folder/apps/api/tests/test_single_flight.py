@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+from core.single_flight import SingleFlight
+from db import advisory_lock, advisory_lock_id
+
+
+def test_concurrent_runs_share_one_computation():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def compute(key):
+        calls.append(key)
+        await asyncio.sleep(0.02)
+        return {"key": key}
+
+    async def run():
+        return await asyncio.gather(
+            *[flights.run(k, lambda k=k: compute(k)) for k in ["a"] * 10 + ["b"] * 5]
+        )
+
+    results = asyncio.run(run())
+    assert sorted(calls) == ["a", "b"]
+    assert all(r is results[0] for r in results[:10])
+    assert flights.snapshot()["leaders"] == 2 and flights.snapshot()["shared"] == 13
+
+
+def test_failure_reaches_every_waiter_and_is_not_remembered():
+    flights = SingleFlight("test", linger=60)
+    attempts = []
+
+    async def fail():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*[flights.run("k", fail) for _ in range(4)], return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(run()))
+    asyncio.run(run())
+    assert len(attempts) == 2
+
+
+def test_cancelled_waiter_does_not_cancel_the_computation():
+    flights = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def run():
+        leader = asyncio.ensure_future(flights.run("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("k", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == 42
+
+
+def test_threaded_calls_and_linger():
+    flights = SingleFlight("test", linger=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.call("k", compute))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len({id(r) for r in results}) == 1
+    # Finished result is still shared within the linger window
+    assert flights.call("k", compute) is results[0]
+    assert len(calls) == 1
+
+
+def test_advisory_lock_is_a_noop_off_postgres():
+    async def run():
+        async with advisory_lock("horoscope:x") as held:
+            return held
+
+    assert asyncio.run(run()) is False
+    assert advisory_lock_id("a") == advisory_lock_id("a") != advisory_lock_id("b")
+    assert -2**63 <= advisory_lock_id("a") < 2**63
+
+
+def test_no_linger_recomputes_after_completion():
+    flights = SingleFlight("test")
+    calls = []
+    flights.call("k", lambda: calls.append(1))
+    flights.call("k", lambda: calls.append(1))
+    assert len(calls) == 2
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import swisseph as swe
+
+from core.transit_events import TransitEventSearch, brent, to_jd
+
+
+def _sidereal(planet_id: int, jd: float):
+    data = swe.calc_ut(jd, planet_id)[0]
+    return (data[0] - swe.get_ayanamsa_ut(jd)) % 360, data[3]
+
+
+def test_brent_finds_root():
+    root = brent(lambda x: x * x - 2.0, 0.0, 2.0, -2.0, 2.0, tol=1e-10)
+    assert abs(root - 2 ** 0.5) < 1e-9
+
+
+def test_sign_ingresses_and_stations_match_daily_sampling():
+    start, end = datetime(2024, 1, 1), datetime(2026, 1, 1)
+    search = TransitEventSearch()
+    events = list(search.events(start, end, planets=["Mercury", "Saturn"],
+                                kinds=["sign_ingress", "station"]))
+    assert [e.at for e in events] == sorted(e.at for e in events)
+
+    for planet, pid in (("Mercury", swe.MERCURY), ("Saturn", swe.SATURN)):
+        found = [e for e in events if e.planet == planet]
+        ingress_days, station_days = [], []
+        day = start
+        prev_lon, prev_speed = _sidereal(pid, to_jd(day))
+        while day < end:
+            nxt = day + timedelta(days=1)
+            lon, speed = _sidereal(pid, to_jd(nxt))
+            if int(lon // 30) != int(prev_lon // 30):
+                ingress_days.append(day)
+            if (speed > 0) != (prev_speed > 0):
+                station_days.append(day)
+            day, prev_lon, prev_speed = nxt, lon, speed
+
+        ingresses = [e for e in found if e.event == "sign_ingress"]
+        stations = [e for e in found if e.event.startswith("station")]
+        assert len(ingresses) == len(ingress_days)
+        assert len(stations) == len(station_days)
+        for ev, d in zip(ingresses, ingress_days):
+            assert d <= ev.at <= d + timedelta(days=1)
+            # The reported sign is the one entered
+            lon, _ = _sidereal(pid, to_jd(ev.at + timedelta(minutes=5)))
+            assert int(lon // 30) == int(ev.longitude // 30)
+        for ev, d in zip(stations, station_days):
+            assert d <= ev.at <= d + timedelta(days=1)
+
+
+def test_year_scan_uses_few_ephemeris_calls():
+    search = TransitEventSearch()
+    events = list(search.events(datetime(2025, 1, 1), datetime(2026, 1, 1)))
+    assert events
+    # Daily sampling of the same eight bodies would need ~2900 calls before refinement
+    assert search.calls < 1000
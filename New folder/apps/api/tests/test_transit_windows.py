@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+import swisseph as swe
+
+from core.models import ChartInput
+from core.pipeline import ChartPipeline
+from core.transit_events import to_jd
+from core.transit_windows import LongCycleWindows, house_segments
+
+
+def _saturn_sign(dt: datetime) -> int:
+    jd = to_jd(dt)
+    lon = (swe.calc_ut(jd, swe.SATURN)[0][0] - swe.get_ayanamsa_ut(jd)) % 360
+    return int(lon // 30)
+
+
+def test_sade_sati_windows_match_sampling():
+    moon_sign = 9  # Capricorn
+    start, end = datetime(1980, 1, 1), datetime(2030, 1, 1)
+    windows = LongCycleWindows().windows("sade_sati", moon_sign, start, end)
+    assert windows
+
+    def in_phase(dt: datetime) -> bool:
+        return any(p.start <= dt < p.end for w in windows for p in w.phases)
+
+    day = start
+    while day < end:
+        house = ((_saturn_sign(day) - moon_sign) % 12) + 1
+        # Skip samples within a day of an ingress
+        near_edge = any(abs((day - b).total_seconds()) < 86400
+                        for w in windows for p in w.phases for b in (p.start, p.end))
+        if not near_edge:
+            assert in_phase(day) == (house in (12, 1, 2)), day
+        day += timedelta(days=7)
+
+
+def test_windows_group_retrograde_reentries():
+    windows = LongCycleWindows().windows("sade_sati", 9, datetime(1980, 1, 1), datetime(2030, 1, 1))
+    for w in windows:
+        assert w.start == w.phases[0].start and w.end == w.phases[-1].end
+        assert w.phases[0].phase.startswith("Rising")
+        assert w.phases[-1].phase.startswith("Setting")
+        assert (w.end - w.start) < timedelta(days=365 * 9)
+    assert any(len(w.phases) > 3 for w in windows)
+
+
+def test_results_cached_per_natal_sign_and_era():
+    lc = LongCycleWindows()
+    lc.windows("ashtama_shani", 4, datetime(1950, 1, 1), datetime(2050, 1, 1))
+    before = house_segments.cache_info().hits
+    lc.windows("ashtama_shani", 4, datetime(1950, 1, 1), datetime(2050, 1, 1))
+    assert house_segments.cache_info().hits > before
+
+
+def test_node_axis_and_unknown_kind():
+    lc = LongCycleWindows()
+    windows = lc.windows("node_axis", 0, datetime(2000, 1, 1), datetime(2040, 1, 1))
+    assert windows and all(w.planet == "Rahu" for w in windows)
+    with pytest.raises(ValueError):
+        lc.windows("mars_return", 0, datetime(2000, 1, 1), datetime(2001, 1, 1))
+
+
+def test_for_chart_rejects_ranges_over_the_cap():
+    chart = ChartPipeline().calculate(ChartInput(
+        name="Windows", local_datetime=datetime(1993, 1, 15, 14, 20), place="Bengaluru",
+        lat=12.97, lon=77.59, timezone="Asia/Kolkata",
+    ))
+    lc = LongCycleWindows()
+    assert lc.for_chart(chart, datetime(1993, 1, 1), datetime(2093, 1, 1), kinds=["jupiter_return"])
+    with pytest.raises(ValueError, match="at most"):
+        lc.for_chart(chart, datetime(1993, 1, 1), datetime(9999, 1, 1))
@@ -1,5 +1,5 @@
 from core.pipeline import ChartPipeline
-from core.transits import TransitCalculator
+from core.transits import PLANET_IDS, TransitCalculator, clear_sky_state_cache, sky_state_cache_stats
 from core.models import ChartInput
 from datetime import datetime
 
@@ -23,4 +23,64 @@ def test_transit_overlay_houses_signs():
     assert jup.current_sign in [
         "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
         "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
-    ]
\ No newline at end of file
+    ]
+
+def _chart(when: datetime, lat: float, lon: float):
+    return ChartPipeline().calculate(ChartInput(
+        name="Test",
+        local_datetime=when,
+        place="Coordinates",
+        lat=lat,
+        lon=lon,
+        timezone="UTC",
+        unknown_time=False
+    ))
+
+
+def _reference_transits(chart, when: datetime):
+    """Per-planet ephemeris computation the snapshot replaced"""
+    import swisseph as swe
+    jd = swe.julday(when.year, when.month, when.day, when.hour + when.minute/60.0)
+    ayanamsa = swe.get_ayanamsa_ut(jd)
+    tc = TransitCalculator()
+    out = {}
+    for name in TransitCalculator.PLANETS:
+        if name == 'Ketu':
+            lon = (swe.calc_ut(jd, swe.MEAN_NODE)[0][0] + 180) % 360
+        else:
+            lon = swe.calc_ut(jd, PLANET_IDS[name])[0][0]
+        sid = (lon - ayanamsa) % 360
+        out[name] = (tc.SIGNS[int(sid / 30) % 12], tc._get_aspected_planets(chart, sid))
+    return out
+
+
+def test_snapshot_overlay_matches_per_planet_computation():
+    chart = _chart(datetime(1984, 3, 9, 6, 45), 28.61, 77.21)
+    when = datetime(2025, 7, 14, 18, 20, 41)
+    ref = _reference_transits(chart, when)
+    for t in TransitCalculator().calculate(chart, when):
+        assert (t.current_sign, t.aspects_natal) == ref[t.planet]
+
+
+def test_snapshot_shared_within_bucket():
+    clear_sky_state_cache()
+    minute = TransitCalculator()
+    a = minute.snapshot(datetime(2025, 1, 1, 10, 15, 5))
+    b = minute.snapshot(datetime(2025, 1, 1, 10, 15, 55))
+    assert a is b and sky_state_cache_stats() == (1, 1)
+    hourly = TransitCalculator(precision=3600)
+    assert hourly.snapshot(datetime(2025, 1, 1, 10, 59)).bucket_start == datetime(2025, 1, 1, 10, 0)
+    assert not a.longitudes.flags.writeable
+
+
+def test_overlay_many_matches_single_chart_overlay():
+    tc = TransitCalculator()
+    charts = [
+        _chart(datetime(1990, 1, 1, 12, 0), 28.61, 77.21),
+        _chart(datetime(1972, 8, 30, 3, 10), 19.07, 72.88),
+        _chart(datetime(2001, 11, 5, 22, 30), 51.51, -0.13),
+    ]
+    sky = tc.snapshot(datetime(2025, 3, 1, 0, 0))
+    batch = tc.overlay_many(charts, sky)
+    assert batch == [tc.overlay(c, sky) for c in charts]
+    assert tc.overlay_many([], sky) == []